@@ -9,6 +9,62 @@ DB_PORT = int(os.getenv("HANA_PORT", 30015))
 DB_USER = os.getenv("HANA_USER")
 DB_PASSWORD = os.getenv("HANA_PASSWORD")
 
+# Pool de conexiones HANA (tiempos en segundos; DB_POOL_ACQUIRE_TIMEOUT=0 espera sin límite)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 4))
+DB_POOL_IDLE_TIMEOUT = int(os.getenv("DB_POOL_IDLE_TIMEOUT", 300))
+DB_POOL_ACQUIRE_TIMEOUT = int(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", 0))
+
+# Lectura columnar (fetchmany -> buffers NumPy por columna) en lugar de pd.read_sql, y filas por fetchmany
+FETCH_COLUMNAR = os.getenv("FETCH_COLUMNAR", "true").lower() == "true"
+DB_FETCH_SIZE = int(os.getenv("DB_FETCH_SIZE", 5000))
+
+# Lectura por chunks: chunks precargados en segundo plano (0 = desactivado) y tope de memoria
+PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", 2))
+PREFETCH_MAX_MB = int(os.getenv("PREFETCH_MAX_MB", 512))
+
+# Lectura particionada en paralelo (1 = lectura serial) y prefijos de ItemCode por partición
+READ_PARALLELISM = int(os.getenv("READ_PARALLELISM", 1))
+READ_PARTITION_PREFIXES = [p.strip() for p in os.getenv(
+    "READ_PARTITION_PREFIXES", "PTLAMI,PTMANG,PTFUND,PTEPET,PTTAPA").split(",") if p.strip()]
+
+# Proyección: leer solo las columnas que usan las reglas (más columnas extra opcionales).
+# Las columnas de la vista que ninguna regla lee no llegan a cleaned_data ni a dataValues;
+# agregarlas en FETCH_EXTRA_COLUMNS o usar FETCH_PROJECTION=false para leer la vista completa.
+FETCH_PROJECTION = os.getenv("FETCH_PROJECTION", "true").lower() == "true"
+FETCH_EXTRA_COLUMNS = [c.strip() for c in os.getenv("FETCH_EXTRA_COLUMNS", "").split(",") if c.strip()]
+
+# Esquema declarado de la vista (app/services/schema.py): categóricas y numéricos compactos
+# aplicados una sola vez por chunk al leer
+APPLY_SCHEMA = os.getenv("APPLY_SCHEMA", "true").lower() == "true"
+
+# Modo incremental: solo se revalidan artículos nuevos o modificados.
+# Con INCREMENTAL_WATERMARK_COLUMN (columna de fecha de actualización de la vista) se filtra en la consulta;
+# sin ella se detectan cambios con un hash de contenido por ItemCode.
+# Tras la primera corrida, los perfiles (dataProfiling, dataValues, validValues) y las métricas del
+# historial cubren solo los artículos revalidados; el historial las guarda con estado 'incremental'.
+INCREMENTAL_MODE = os.getenv("INCREMENTAL_MODE", "false").lower() == "true"
+INCREMENTAL_WATERMARK_COLUMN = os.getenv("INCREMENTAL_WATERMARK_COLUMN", "")
+INCREMENTAL_STATE_PATH = os.getenv("INCREMENTAL_STATE_PATH", os.path.join("outputs", "estado", "incremental.db"))
+
+# Unicidad global (ItemCode, ItemName, U_Codigo_Secundario) entre todos los lotes: índice por
+# hash particionado que se vuelca a disco al superar UNIQUENESS_MEMORY_MB, con pasada final
+UNIQUENESS_INDEX_ENABLE = os.getenv("UNIQUENESS_INDEX_ENABLE", "true").lower() == "true"
+UNIQUENESS_MEMORY_MB = int(os.getenv("UNIQUENESS_MEMORY_MB", 64))
+UNIQUENESS_PARTITIONS = int(os.getenv("UNIQUENESS_PARTITIONS", 16))
+UNIQUENESS_SPILL_DIR = os.getenv("UNIQUENESS_SPILL_DIR", os.path.join("outputs", "estado", "unicidad"))
+
+# Posibles duplicados de ItemName (MinHash/LSH sobre tokens normalizados, entre todos los lotes)
+NEAR_DUPLICATE_ENABLE = os.getenv("NEAR_DUPLICATE_ENABLE", "true").lower() == "true"
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0.85))  # Jaccard mínimo
+NEAR_DUPLICATE_PERMUTATIONS = int(os.getenv("NEAR_DUPLICATE_PERMUTATIONS", 128))
+NEAR_DUPLICATE_BANDS = int(os.getenv("NEAR_DUPLICATE_BANDS", 16))
+NEAR_DUPLICATE_MAX_BUCKET = int(os.getenv("NEAR_DUPLICATE_MAX_BUCKET", 50))
+
+# Historial de corridas (SQLite): métricas por regla y tiempos por etapa para tendencias
+RUN_HISTORY_ENABLE = os.getenv("RUN_HISTORY_ENABLE", "true").lower() == "true"
+RUN_HISTORY_PATH = os.getenv("RUN_HISTORY_PATH", os.path.join("outputs", "estado", "historial.db"))
+
 # Excel Configuration
 EXCEL_FILE_PATH = os.path.join("inputs", "Diccionario Articulos.xlsx")
 EXCEL_SHEET_NAME = "Diccionario Gobierno Datos"
@@ -38,4 +94,45 @@ if not os.path.exists(DATA_QUALITY_OUTPUT):
 # Cleaning Configuration
 DATA_CLEANING_OUTPUT = os.path.join("outputs", "limpieza")
 if not os.path.exists(DATA_CLEANING_OUTPUT):
-    os.makedirs(DATA_CLEANING_OUTPUT, exist_ok=True)
\ No newline at end of file
+    os.makedirs(DATA_CLEANING_OUTPUT, exist_ok=True)
+
+# Formato de salidas: "csv" (por defecto, mismas rutas de siempre), "parquet" (comprimido,
+# particionado por fecha de corrida y lote; requiere pyarrow, dependencia opcional de
+# requirements.txt, y cambia las rutas: ver README) o "none" (sin salidas, para benchmarks).
+# Cada corrida deja un manifiesto JSON en OUTPUT_MANIFEST_DIR.
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "csv").lower()
+OUTPUT_PARQUET_COMPRESSION = os.getenv("OUTPUT_PARQUET_COMPRESSION", "zstd")
+OUTPUT_MANIFEST_DIR = os.getenv("OUTPUT_MANIFEST_DIR", os.path.join("outputs", "manifiestos"))
+# Escritura de salidas en segundo plano (cola acotada de DataFrames pendientes).
+# Modo "thread": en un hilo del mismo proceso (pyarrow libera el GIL al escribir Parquet);
+# modo "process": en un proceso aparte, útil con CSV (to_csv retiene el GIL).
+OUTPUT_ASYNC = os.getenv("OUTPUT_ASYNC", "true").lower() == "true"
+OUTPUT_ASYNC_MODE = os.getenv("OUTPUT_ASYNC_MODE", "thread").lower()
+OUTPUT_QUEUE_SIZE = int(os.getenv("OUTPUT_QUEUE_SIZE", 4))
+
+# Reglas por familia de ItemCode (prefijo + ItmsGrpCod): las reglas con familia declarada
+# (business_rules.RULE_FAMILIES) se evalúan solo sobre las filas de su familia
+RULE_FAMILY_PARTITIONING = os.getenv("RULE_FAMILY_PARTITIONING", "true").lower() == "true"
+
+# Reglas `expr` de rules.yaml: por defecto se evalúan con numpy (medido más rápido que numexpr en
+# máquinas de un núcleo con estas reglas booleanas). Con "true" y numexpr instalado (dependencia
+# opcional, no está en requirements.txt) se evalúan en una pasada fusionada; mismo resultado.
+RULE_EXPR_NUMEXPR = os.getenv("RULE_EXPR_NUMEXPR", "false").lower() == "true"
+
+# Caché persistente de resultados de reglas (por hash de contenido de fila y huella de la regla)
+RULE_CACHE_ENABLE = os.getenv("RULE_CACHE_ENABLE", "false").lower() == "true"
+RULE_CACHE_DIR = os.getenv("RULE_CACHE_DIR", os.path.join("outputs", "cache", "reglas"))
+RULE_CACHE_MAX_MB = int(os.getenv("RULE_CACHE_MAX_MB", 256))
+
+# Perfilado aproximado (dataValues): las columnas que superan el umbral de valores distintos
+# pasan a sketches de memoria fija (HyperLogLog, Count-Min/top-K, t-digest).
+# Umbral por columna: "Columna:N,..." (0 = siempre aproximada).
+PROFILE_SKETCH_MODE = os.getenv("PROFILE_SKETCH_MODE", "false").lower() == "true"
+PROFILE_SKETCH_THRESHOLD = int(os.getenv("PROFILE_SKETCH_THRESHOLD", 10000))
+PROFILE_SKETCH_COLUMN_THRESHOLDS = {
+    col.strip(): int(n) for col, n in (
+        item.split(":") for item in os.getenv(
+            "PROFILE_SKETCH_COLUMN_THRESHOLDS", "ItemName:0,FrgnName:0,U_Codigo_Secundario:0,PicturName:0"
+        ).split(",") if item.strip())
+}
+PROFILE_SKETCH_TOP_K = int(os.getenv("PROFILE_SKETCH_TOP_K", 50))
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+# Códigos de tipo de SAP HANA (cursor.description) de texto y fecha:
+# van directo a un buffer de objetos (sin inferencia)
+HANA_OBJECT_TYPE_CODES = {8, 9, 10, 11, 14, 15, 16, 25, 26, 29, 30, 51, 52, 55, 61, 62, 63, 64}
+
+# Tipos inferidos (pd.api.types.infer_dtype, en C) que caben en un buffer numérico
+_NUMERIC_KINDS = {'integer', 'floating', 'mixed-integer-float', 'decimal', 'empty'}
+
+
+# Mayor magnitud entera que float64 representa exactamente
+_FLOAT_EXACT_LIMIT = 2 ** 53
+
+
+def _as_int64(values):
+    """Enteros (objetos) como int64, o None si alguno no cabe (pd.read_sql los deja como objetos)."""
+    try:
+        return values.astype(np.int64)
+    except OverflowError:
+        return None
+
+
+def _exact_in_float(values):
+    return not len(values) or int(np.abs(values).max()) <= _FLOAT_EXACT_LIMIT
+
+
+class _ColumnBuffer:
+    """
+    Buffer tipado de una columna para un chunk: int64 mientras solo lleguen enteros (o nulos),
+    float64 si aparecen decimales y objeto en cuanto aparece otro tipo. Al cerrar el chunk
+    replica los tipos de pd.read_sql: int64 si todo fue entero sin nulos, float64 con NaN si hubo
+    nulos, bool si todo fue booleano sin nulos, y objetos si la columna solo tuvo nulos o no es
+    numérica. Los enteros nunca pasan por float64 si pierden precisión (más de 2**53): en ese
+    caso la columna queda en objetos (int exactos y None) en lugar de redondear.
+    """
+
+    def __init__(self, capacity, object_hint=False):
+        self.object_hint = object_hint
+        self.kind = 'object' if object_hint else 'int'
+        self.data = np.empty(capacity, dtype=object if object_hint else np.int64)
+        self.nulls = np.zeros(capacity, dtype=bool)
+        self.seen_value = False
+
+    def _to_float(self, length):
+        """Pasa los enteros escritos a float64 (a objetos si float64 los redondearía)."""
+        values = self.data[:length][~self.nulls[:length]]
+        if not _exact_in_float(values):
+            self._to_object(length)
+            return
+        data = self.data.astype(np.float64)
+        data[:length][self.nulls[:length]] = np.nan
+        self.data, self.kind = data, 'float'
+
+    def _to_object(self, length):
+        """Pasa el buffer a objetos conservando enteros como int y nulos como None."""
+        data = np.empty(len(self.data), dtype=object)
+        data[:length] = self.data[:length].astype(object)
+        data[:length][self.nulls[:length]] = None
+        self.data, self.kind = data, 'object'
+
+    def write(self, start, values):
+        """Escribe `values` (arreglo de objetos) a partir de la posición `start`."""
+        end = start + len(values)
+        if self.kind != 'object':
+            kind = pd.api.types.infer_dtype(values, skipna=True)
+            if kind in _NUMERIC_KINDS:
+                nulls = pd.isna(values)
+                self.seen_value = self.seen_value or kind != 'empty'
+                self.nulls[start:end] = nulls
+                present = values[~nulls]
+                if kind in ('integer', 'empty'):
+                    numbers = _as_int64(present)
+                    if numbers is not None and (self.kind == 'int' or _exact_in_float(numbers)):
+                        out = self.data[start:end]
+                        out[~nulls] = numbers
+                        if self.kind == 'float':
+                            out[nulls] = np.nan
+                        return
+                    self._to_object(start)
+                else:
+                    if self.kind == 'int':
+                        self._to_float(start)
+                    if self.kind == 'float':
+                        out = self.data[start:end]
+                        out[nulls] = np.nan
+                        out[~nulls] = present.astype(np.float64)
+                        return
+            else:
+                self._to_object(start)
+        self.data[start:end] = values
+
+    def finish(self, length):
+        data = self.data[:length]
+        if self.kind == 'object':
+            if not self.object_hint and pd.api.types.infer_dtype(data, skipna=False) == 'boolean':
+                return data.astype(bool)
+            return data
+        if not self.seen_value:
+            return np.full(length, None, dtype=object)
+        nulls = self.nulls[:length]
+        if self.kind == 'float' or not nulls.any():
+            return data.copy()
+        if _exact_in_float(data[~nulls]):
+            values = data.astype(np.float64)
+            values[nulls] = np.nan
+            return values
+        values = data.astype(object)
+        values[nulls] = None
+        return values
+
+
+def read_columnar_chunks(conn, query, params=None, chunk_size=50000, fetch_size=5000):
+    """
+    Ejecuta `query` y entrega DataFrames de hasta `chunk_size` filas.
+    Lee con `cursor.fetchmany(fetch_size)` y transpone cada lote de filas directo
+    a buffers tipados por columna (int64/float64/objeto; los códigos de texto y fecha de
+    `cursor.description` van directo a objeto). En memoria solo convive un lote de
+    filas con los buffers del chunk, sin diccionarios por fila ni la conversión
+    genérica de pd.read_sql. Los buffers son NumPy y no Arrow: pyarrow es opcional
+    (solo para las salidas Parquet) y la lectura no debe depender de él.
+    """
+    cursor = conn.cursor()
+    try:
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        if not cursor.description:
+            return
+        columns = [desc[0] for desc in cursor.description]
+        object_hints = [desc[1] in HANA_OBJECT_TYPE_CODES for desc in cursor.description]
+
+        def new_buffers():
+            return [_ColumnBuffer(chunk_size, hint) for hint in object_hints]
+
+        buffers, filled = new_buffers(), 0
+        while True:
+            rows = cursor.fetchmany(min(fetch_size, chunk_size - filled))
+            if rows:
+                # Transposición del lote: una matriz de objetos y luego cada columna a su buffer
+                batch = np.empty((len(rows), len(columns)), dtype=object)
+                batch[:] = rows if isinstance(rows[0], tuple) else [tuple(r) for r in rows]
+                for j, buf in enumerate(buffers):
+                    buf.write(filled, batch[:, j])
+                filled += len(batch)
+            if filled and (not rows or filled >= chunk_size):
+                yield pd.DataFrame({name: buf.finish(filled) for name, buf in zip(columns, buffers)},
+                                   columns=columns)
+                buffers, filled = new_buffers(), 0
+            if not rows:
+                break
+    finally:
+        cursor.close()
+
+
+def read_query_chunks(conn, query, params=None, chunk_size=50000, columnar=True, fetch_size=5000):
+    """Lectura por chunks: ruta columnar (por defecto) o pd.read_sql."""
+    if columnar:
+        return read_columnar_chunks(conn, query, params, chunk_size=chunk_size, fetch_size=fetch_size)
+    return pd.read_sql(query, conn, params=params or None, chunksize=chunk_size)
@@ -0,0 +1,157 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe.
+    - `connect`: función que abre una conexión nueva (p. ej. get_hana_connection).
+    - `min_size`/`max_size`: conexiones que se mantienen abiertas / máximo simultáneo.
+    - `idle_timeout`: segundos que una conexión ociosa puede esperar antes de cerrarse
+      (nunca por debajo de `min_size`).
+    - `health_query`: consulta de verificación al entregar una conexión reutilizada
+      (si el driver ofrece `isconnected()` se usa eso).
+    - `acquire_timeout`: segundos máximos de espera por una conexión libre (None = sin límite).
+    Uso: `with pool.connection() as conn: ...`
+    """
+
+    def __init__(self, connect, min_size=1, max_size=4, idle_timeout=300,
+                 health_query="SELECT 1 FROM DUMMY", acquire_timeout=None):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"Tamaños de pool inválidos: min={min_size}, max={max_size}")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_query = health_query
+        self.acquire_timeout = acquire_timeout
+        self._idle = deque()  # (conexion, momento en que quedó libre)
+        self._size = 0        # conexiones abiertas (libres + en uso)
+        self._closed = False
+        self._cond = threading.Condition()
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+    def _open(self):
+        conn = self._connect()
+        self._size += 1
+        return conn
+
+    def _discard(self, conn):
+        self._size -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn):
+        try:
+            is_connected = getattr(conn, 'isconnected', None)
+            if is_connected is not None:
+                return bool(is_connected())
+            if self.health_query:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(self.health_query)
+                    cursor.fetchall()
+                finally:
+                    cursor.close()
+            return True
+        except Exception as e:
+            print(f"[DB Pool] Conexión descartada (falló verificación): {e}")
+            return False
+
+    def _evict_idle(self):
+        """Cierra conexiones ociosas vencidas, respetando min_size. Requiere el lock."""
+        if not self.idle_timeout:
+            return
+        now = time.monotonic()
+        keep = deque()
+        while self._idle:
+            conn, since = self._idle.popleft()
+            if now - since > self.idle_timeout and self._size > self.min_size:
+                self._discard(conn)
+            else:
+                keep.append((conn, since))
+        self._idle = keep
+
+    def acquire(self):
+        """Entrega una conexión sana: reutiliza una libre, abre una nueva o espera."""
+        deadline = None if self.acquire_timeout is None else time.monotonic() + self.acquire_timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("El pool de conexiones está cerrado")
+                self._evict_idle()
+                conn = None
+                if self._idle:
+                    conn, _ = self._idle.pop()  # La más reciente (más probable que siga viva)
+                elif self._size < self.max_size:
+                    self._size += 1  # Reservar el cupo antes de conectar fuera del lock
+                else:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No hay conexiones libres (máximo {self.max_size})")
+                    self._cond.wait(remaining)
+                    continue
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            if self._is_healthy(conn):
+                return conn
+            with self._cond:
+                self._discard(conn)
+                self._cond.notify()
+
+    def release(self, conn, broken=False):
+        """Devuelve la conexión al pool (o la cierra si está rota o el pool se cerró)."""
+        with self._cond:
+            if broken or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._evict_idle()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager: toma una conexión del pool y la devuelve al salir."""
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            # Deshacer cualquier transacción abierta; si ni eso funciona, la conexión está rota
+            try:
+                conn.rollback()
+                broken = False
+            except Exception:
+                broken = True
+            self.release(conn, broken=broken)
+            raise
+        else:
+            self.release(conn)
+
+    def close_all(self):
+        """Cierra las conexiones libres; las que están en uso se cierran al devolverse."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._discard(conn)
+            self._cond.notify_all()
@@ -1,7 +1,16 @@
 from hdbcli import dbapi
 from app.config import settings as config
+from app.infrastructure.prefetch import prefetch_chunks
+from app.infrastructure.partitioned_reader import build_prefix_partitions, read_partitions
+from app.infrastructure.projection import resolve_projection, select_clause
+from app.infrastructure.connection_pool import ConnectionPool
+from app.infrastructure.columnar_fetch import read_query_chunks
 
-import pandas as pd
+import atexit
+import threading
+
+_pool = None
+_pool_lock = threading.Lock()
 
 def get_hana_connection():
     """
@@ -20,54 +29,134 @@ def get_hana_connection():
         print(f"Error al conectar a HANA: {e}")
         raise
 
+def get_connection_pool():
+    """
+    Retorna el pool de conexiones HANA compartido del proceso (se crea en el primer uso).
+    Todo acceso a la base debe pasar por aquí para reutilizar conexiones ya autenticadas.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                get_hana_connection,
+                min_size=config.DB_POOL_MIN,
+                max_size=config.DB_POOL_MAX,
+                idle_timeout=config.DB_POOL_IDLE_TIMEOUT,
+                acquire_timeout=config.DB_POOL_ACQUIRE_TIMEOUT or None,
+            )
+            atexit.register(_pool.close_all)
+        return _pool
+
+def get_connection():
+    """Context manager con una conexión del pool: `with get_connection() as conn: ...`"""
+    return get_connection_pool().connection()
+
 def fetch_data_from_view(view_name):
     """
     Ejecuta un SELECT * sobre la vista especificada y retorna los resultados
     como una lista de diccionarios.
     """
-    conn = get_hana_connection()
-    cursor = conn.cursor()
-    try:
-        query = f"SELECT * FROM {view_name}"
-        cursor.execute(query)
-        
-        # Obtener nombres de columnas
-        if cursor.description:
-            columns = [desc[0] for desc in cursor.description]
-            data = cursor.fetchall()
-            # Convertir a lista de diccionarios
-            result = [dict(zip(columns, row)) for row in data]
-        else:
-            result = []
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            query = f"SELECT * FROM {view_name}"
+            cursor.execute(query)
             
-        print(f"Datos obtenidos de la vista '{view_name}': {len(result)} filas.")
-        return result
-    except Exception as e:
-        print(f"Error al consultar la vista {view_name}: {e}")
-        raise
-    finally:
-        cursor.close()
-        conn.close()
+            # Obtener nombres de columnas
+            if cursor.description:
+                columns = [desc[0] for desc in cursor.description]
+                data = cursor.fetchall()
+                # Convertir a lista de diccionarios
+                result = [dict(zip(columns, row)) for row in data]
+            else:
+                result = []
+                
+            print(f"Datos obtenidos de la vista '{view_name}': {len(result)} filas.")
+            return result
+        except Exception as e:
+            print(f"Error al consultar la vista {view_name}: {e}")
+            raise
+        finally:
+            cursor.close()
 
-def fetch_data_in_chunks(view_name, chunk_size=50000):
+def fetch_data_in_chunks(view_name, chunk_size=50000, prefetch_depth=None, prefetch_max_mb=None, columns=None,
+                         where=None, params=None):
     """
     Recupera datos de la vista usando pandas en chunks para eficiencia de memoria.
     Retorna un iterador de DataFrames.
+
+    Con `prefetch_depth` > 0 (por defecto PREFETCH_DEPTH) un hilo de fondo mantiene
+    los siguientes chunks en vuelo mientras se procesa el actual, con un tope de
+    memoria de `prefetch_max_mb` MB (por defecto PREFETCH_MAX_MB).
+
+    Con READ_PARALLELISM > 1 se usa la lectura particionada en paralelo
+    (ver `fetch_data_partitioned`), que ya solapa lectura y procesamiento.
+
+    `columns` es la proyección deseada (ver `column_projection.required_columns`):
+    se intersecta con las columnas reales de la vista; None = SELECT *.
+
+    `where`/`params` filtra la lectura (p. ej. la marca de agua del modo incremental).
+    """
+    if config.READ_PARALLELISM > 1:
+        return fetch_data_partitioned(view_name, chunk_size=chunk_size, columns=columns,
+                                      where=where, params=params)
+
+    depth = config.PREFETCH_DEPTH if prefetch_depth is None else prefetch_depth
+    max_mb = config.PREFETCH_MAX_MB if prefetch_max_mb is None else prefetch_max_mb
+
+    chunks = _read_chunks(view_name, chunk_size, columns, where, params)
+    if depth and depth > 0:
+        print(f"[DB] Prefetch activo (profundidad: {depth}, tope: {max_mb} MB).")
+        return prefetch_chunks(chunks, depth=depth, max_bytes=max_mb * 1024 * 1024 if max_mb else None)
+    return chunks
+
+def fetch_data_partitioned(view_name, chunk_size=50000, parallelism=None, prefixes=None,
+                           connection_factory=None, columns=None, where=None, params=None):
     """
-    conn = get_hana_connection()
+    Lee la vista en particiones disjuntas por prefijo de ItemCode (más una partición
+    "resto"), en paralelo sobre varias conexiones de `connection_factory`
+    (context manager; por defecto `get_connection`, del pool).
+    Retorna un iterador de DataFrames que entrega los chunks a medida que llegan.
+    """
+    parallelism = config.READ_PARALLELISM if parallelism is None else parallelism
+    prefixes = config.READ_PARTITION_PREFIXES if prefixes is None else prefixes
+    connection_factory = connection_factory or get_connection
+    partitions = build_prefix_partitions(prefixes)
+    if columns:
+        with connection_factory() as conn:
+            columns = _projection(conn, view_name, columns)
+    print(f"[DB] Lectura particionada de '{view_name}': {len(partitions)} particiones, "
+          f"{parallelism} conexiones (Tam: {chunk_size}).")
+    return read_partitions(view_name, partitions, connection_factory,
+                           chunk_size=chunk_size, parallelism=parallelism, columns=columns,
+                           where=where, params=params)
+
+def _projection(conn, view_name, columns):
+    """Resuelve la proyección contra las columnas reales de la vista."""
+    projected = resolve_projection(conn, view_name, columns)
+    if projected:
+        print(f"[DB] Proyección: {len(projected)} columnas requeridas por las reglas.")
+    return projected
+
+def _read_chunks(view_name, chunk_size, columns=None, where=None, params=None):
+    """Generador de chunks sobre una conexión del pool (se devuelve al terminar)."""
     try:
-        query = f"SELECT * FROM {view_name}"
-        print(f"[DB] Iniciando lectura por chunks de '{view_name}' (Tam: {chunk_size})...")
-        
-        # read_sql retorna un generador si chunksize está definido
-        chunks = pd.read_sql(query, conn, chunksize=chunk_size)
-        
-        for chunk in chunks:
-            yield chunk
+        with get_connection() as conn:
+            projected = _projection(conn, view_name, columns) if columns else None
+            query = f"SELECT {select_clause(projected)} FROM {view_name}"
+            if where:
+                query += f" WHERE {where}"
+            print(f"[DB] Iniciando lectura por chunks de '{view_name}' (Tam: {chunk_size})...")
+            
+            # Ruta columnar (fetchmany -> buffers por columna) o pd.read_sql según FETCH_COLUMNAR
+            chunks = read_query_chunks(conn, query, params, chunk_size=chunk_size,
+                                       columnar=config.FETCH_COLUMNAR, fetch_size=config.DB_FETCH_SIZE)
+            
+            for chunk in chunks:
+                yield chunk
             
     except Exception as e:
         print(f"[DB Error] Fallo leyendo chunks: {e}")
         raise
     finally:
-        conn.close()
-        print("[DB] Conexión cerrada.")
+        print("[DB] Conexión devuelta al pool.")
@@ -34,3 +34,24 @@ def get_profiling_rules():
         return pd.DataFrame() # Retorna vacio si no hay estructura correcta
         
     return df[required_cols].dropna(subset=['reglas de perfilamiento'])
+
+def load_decision_table_rows(sheet_name):
+    """
+    Filas de una tabla de decisión definida en una hoja del Diccionario (una columna por
+    entrada/salida, más `motivo` opcional). Celdas vacías -> comodín (None);
+    valores separados por ';' -> lista (coincide con cualquiera).
+    """
+    if not os.path.exists(EXCEL_FILE_PATH):
+        raise FileNotFoundError(f"El archivo Excel no se encuentra en: {EXCEL_FILE_PATH}")
+    df = pd.read_excel(EXCEL_FILE_PATH, sheet_name=sheet_name)
+    rows = []
+    for record in df.to_dict('records'):
+        row = {}
+        for col, value in record.items():
+            if pd.isna(value):
+                continue
+            if isinstance(value, str) and ';' in value and col != 'motivo':
+                value = [v.strip() for v in value.split(';') if v.strip()]
+            row[str(col).strip()] = value
+        rows.append(row)
+    return rows
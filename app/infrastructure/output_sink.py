@@ -0,0 +1,108 @@
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+_STOP = object()
+
+ASYNC_MODES = ('thread', 'process')
+
+
+def _copy_on_write():
+    """True si pandas aplica Copy-on-Write: siempre desde pandas 3, opcional en pandas 2."""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    return pd.options.mode.copy_on_write is True
+
+
+class AsyncOutputSink:
+    """
+    Envoltorio asíncrono de un OutputWriter: `write` encola el DataFrame terminado y un
+    hilo de fondo lo entrega al escritor, así la escritura no suma a la latencia del lote.
+    - `mode='thread'`: el hilo serializa (to_csv compite por el GIL con el lote siguiente).
+    - `mode='process'`: el hilo envía el DataFrame a un proceso escritor y solo registra
+      el resultado en el manifiesto; la serialización corre en paralelo real.
+    - `max_pending`: tamaño de la cola; si se llena, `write` espera (contrapresión).
+    - Un error de escritura se relanza en el hilo principal en el siguiente `write`,
+      `flush` o `close`.
+    - `flush()` espera a que se escriba todo lo encolado; `close()` además detiene el
+      hilo (y el proceso) y cierra el escritor (manifiesto).
+    Los DataFrames se encolan como copia: superficial si pandas aplica Copy-on-Write
+    (pandas 3, o pandas 2 con `mode.copy_on_write`), profunda si no. Así cambios
+    posteriores del llamador no afectan lo que se escribe.
+    """
+
+    def __init__(self, writer, max_pending=4, mode='thread'):
+        if mode not in ASYNC_MODES:
+            raise ValueError(f"Modo de escritura asíncrona no soportado: {mode} (opciones: {', '.join(ASYNC_MODES)})")
+        self.writer = writer
+        self.mode = mode
+        self.batch_index = None
+        self._queue = queue.Queue(maxsize=max(1, max_pending))
+        self._error = None
+        self._closed = False
+        # 'spawn': el proceso escritor no hereda hilos ni conexiones del proceso principal
+        self._pool = (ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+                      if mode == 'process' else None)
+        self._thread = threading.Thread(target=self._worker, name="output-sink", daemon=True)
+        self._thread.start()
+
+    @property
+    def run_id(self):
+        return self.writer.run_id
+
+    def begin_batch(self, batch_index):
+        self.batch_index = batch_index
+
+    def _write(self, directory, name, df, per_batch, batch_index):
+        if self._pool is None:
+            self.writer.write(directory, name, df, per_batch=per_batch, batch_index=batch_index)
+            return
+        batch = self.writer.resolve_batch(per_batch, batch_index)
+        path = self._pool.submit(self.writer._write_file, directory, name, df, batch).result()
+        self.writer.record(directory, name, df, path, batch)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                if self._error is None:
+                    self._write(*item)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_pending(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Falló la escritura de salidas en segundo plano: {error}") from error
+
+    def write(self, directory, name, df, per_batch=True, batch_index=None):
+        """Encola la escritura (el lote se fija ahora, no cuando escribe el hilo)."""
+        self._raise_pending()
+        if self._closed:
+            raise RuntimeError("El sink de salidas está cerrado")
+        batch = batch_index if batch_index is not None else self.batch_index
+        self._queue.put((directory, name, df.copy(deep=not _copy_on_write()), per_batch, batch))
+
+    def flush(self):
+        """Bloquea hasta que todo lo encolado esté escrito; relanza el primer error."""
+        self._queue.join()
+        self._raise_pending()
+
+    def close(self):
+        """Escribe lo pendiente, detiene el hilo y cierra el escritor. Retorna lo que retorne `close`."""
+        if self._closed:
+            return None
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        self._raise_pending()
+        return self.writer.close()
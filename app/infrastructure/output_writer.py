@@ -0,0 +1,219 @@
+try:
+    import pyarrow  # noqa: F401 (motor de pandas.to_parquet)
+    PYARROW_INSTALLED = True
+except ImportError:
+    PYARROW_INSTALLED = False
+
+import atexit
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from app.config.settings import (OUTPUT_FORMAT, OUTPUT_PARQUET_COMPRESSION, OUTPUT_MANIFEST_DIR,
+                                 OUTPUT_ASYNC, OUTPUT_ASYNC_MODE, OUTPUT_QUEUE_SIZE)
+from app.infrastructure.output_sink import AsyncOutputSink
+
+
+class OutputWriter:
+    """
+    Escritor de salidas del pipeline (perfilado, calidad, limpieza).
+    - `write(directorio, nombre, df, per_batch)`: escribe un dataset; los de detalle
+      (`per_batch=True`) se asocian al lote actual (`begin_batch`).
+    - `close()`: escribe el manifiesto JSON de la corrida (archivos, filas, bytes, columnas).
+    Las subclases implementan `_write_file` (ver OUTPUT_WRITERS).
+    """
+
+    format = None
+
+    def __init__(self, manifest_dir=OUTPUT_MANIFEST_DIR, run_id=None):
+        self.manifest_dir = manifest_dir
+        self.started_at = datetime.now()
+        self.run_id = run_id or f"{self.started_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.batch_index = None
+        self._datasets = {}
+        self._lock = threading.Lock()
+
+    def begin_batch(self, batch_index):
+        self.batch_index = batch_index
+
+    def resolve_batch(self, per_batch=True, batch_index=None):
+        """Lote al que se asocia una escritura (None para datasets de la corrida completa)."""
+        if not per_batch:
+            return None
+        return batch_index if batch_index is not None else self.batch_index or 0
+
+    def write(self, directory, name, df: pd.DataFrame, per_batch=True, batch_index=None):
+        """Escribe `df` como dataset `name` en `directory`. Retorna la ruta generada."""
+        batch = self.resolve_batch(per_batch, batch_index)
+        path = self._write_file(directory, name, df, batch)
+        self.record(directory, name, df, path, batch)
+        return path
+
+    def record(self, directory, name, df, path, batch):
+        """Registra en el manifiesto un archivo ya escrito."""
+        print(f"[Generado] {path}")
+        with self._lock:
+            dataset = self._datasets.setdefault(f"{directory}/{name}", {
+                'columns': {c: str(t) for c, t in df.dtypes.items()},
+                'files': {},
+            })
+            # Un archivo que se reescribe (CSV) queda una sola vez con su último contenido
+            dataset['files'][path] = {'path': path, 'batch': batch, 'rows': len(df),
+                                      'bytes': os.path.getsize(path)}
+
+    def __getstate__(self):
+        # Solo la configuración viaja a un proceso escritor (sin lock ni manifiesto)
+        state = self.__dict__.copy()
+        state.pop('_lock', None)
+        state['_datasets'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _write_file(self, directory, name, df, batch):
+        raise NotImplementedError
+
+    def manifest(self):
+        with self._lock:
+            datasets = {
+                key: {
+                    'columns': info['columns'],
+                    'rows': sum(f['rows'] for f in info['files'].values()),
+                    'bytes': sum(f['bytes'] for f in info['files'].values()),
+                    'files': list(info['files'].values()),
+                }
+                for key, info in self._datasets.items()
+            }
+        return {
+            'run_id': self.run_id,
+            'format': self.format,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'datasets': datasets,
+        }
+
+    def close(self):
+        """Escribe el manifiesto de la corrida y retorna su ruta."""
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        path = os.path.join(self.manifest_dir, f"run_{self.run_id}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest(), f, ensure_ascii=False, indent=2, default=str)
+        print(f"[Generado] {path}")
+        return path
+
+
+class CsvOutputWriter(OutputWriter):
+    """Formato legado: un CSV por dataset, reescrito en cada lote (`directorio/nombre.csv`)."""
+
+    format = 'csv'
+
+    def _write_file(self, directory, name, df, batch):
+        path = os.path.join(directory, f"{name}.csv")
+        df.to_csv(path, index=False)
+        return path
+
+
+class ParquetOutputWriter(OutputWriter):
+    """
+    Parquet comprimido con particiones estilo Hive (lectura con filtros por partición):
+    `directorio/nombre/run_date=AAAA-MM-DD/run_id=.../batch=00001/part-00000.parquet`.
+    Cada lote agrega su propia parte; los datasets de la corrida completa no llevan `batch`.
+    """
+
+    format = 'parquet'
+
+    def __init__(self, manifest_dir=OUTPUT_MANIFEST_DIR, run_id=None, compression=OUTPUT_PARQUET_COMPRESSION):
+        super().__init__(manifest_dir, run_id)
+        self.compression = compression
+
+    def _write_file(self, directory, name, df, batch):
+        parts = [directory, name, f"run_date={self.started_at:%Y-%m-%d}", f"run_id={self.run_id}"]
+        if batch is not None:
+            parts.append(f"batch={batch:05d}")
+        folder = os.path.join(*parts)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, "part-00000.parquet")
+        _parquet_safe(df).to_parquet(path, engine='pyarrow', compression=self.compression, index=False)
+        return path
+
+
+class NullOutputWriter(OutputWriter):
+    """Sin salidas (benchmarks, OUTPUT_FORMAT=none): descarta los datasets y no deja manifiesto."""
+
+    format = 'none'
+
+    def write(self, directory, name, df: pd.DataFrame, per_batch=True, batch_index=None):
+        return None
+
+    def close(self):
+        return None
+
+
+def _parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas de objetos con tipos mezclados (p. ej. 'valor' de dataValues) pasan a texto."""
+    mixed = {
+        col: df[col].astype(str)
+        for col in df.columns
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed')
+    }
+    return df.assign(**mixed) if mixed else df
+
+
+# Registro de formatos de salida (extensible con nuevos escritores)
+OUTPUT_WRITERS = {
+    'csv': CsvOutputWriter,
+    'parquet': ParquetOutputWriter,
+    'none': NullOutputWriter,
+}
+
+
+def create_output_writer(fmt=None, **kwargs) -> OutputWriter:
+    """Crea el escritor del formato pedido (Parquet cae a CSV si falta pyarrow)."""
+    fmt = (fmt or OUTPUT_FORMAT).lower()
+    if fmt not in OUTPUT_WRITERS:
+        raise ValueError(f"Formato de salida no soportado: {fmt} (opciones: {', '.join(OUTPUT_WRITERS)})")
+    if fmt == 'parquet' and not PYARROW_INSTALLED:
+        print("[Advertencia] pyarrow no está instalado; las salidas se escriben en CSV.")
+        fmt = 'csv'
+    return OUTPUT_WRITERS[fmt](**kwargs)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_atexit_registered = False
+
+
+def get_output_writer():
+    """
+    Escritor de salidas de la corrida actual (se crea al primer uso).
+    Con OUTPUT_ASYNC se envuelve en un AsyncOutputSink (escritura en segundo plano,
+    en un hilo o en un proceso según OUTPUT_ASYNC_MODE).
+    """
+    global _writer, _atexit_registered
+    with _writer_lock:
+        if _writer is None:
+            _writer = create_output_writer()
+            if OUTPUT_ASYNC:
+                _writer = AsyncOutputSink(_writer, OUTPUT_QUEUE_SIZE, OUTPUT_ASYNC_MODE)
+            if not _atexit_registered:
+                # Usos fuera de main() (scripts, pruebas): no perder escrituras pendientes al salir
+                atexit.register(close_output_writer)
+                _atexit_registered = True
+        return _writer
+
+
+def close_output_writer():
+    """
+    Cierra la corrida: espera las escrituras pendientes (relanzando sus errores), escribe
+    el manifiesto y libera el escritor. Retorna la ruta del manifiesto.
+    """
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    return writer.close() if writer is not None else None
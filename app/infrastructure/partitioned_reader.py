@@ -0,0 +1,98 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings as config
+from app.infrastructure.projection import select_clause
+from app.infrastructure.columnar_fetch import read_query_chunks
+
+_DONE = object()
+
+
+def build_prefix_partitions(prefixes, key_column="ItemCode"):
+    """
+    Divide la vista en particiones disjuntas por prefijo de `key_column`.
+    Retorna una lista de (nombre, where, params): una partición por prefijo y una
+    partición final "resto" con todo lo que no coincide (incluye nulos), de modo
+    que la unión de las particiones es la vista completa.
+    Los prefijos no deben solaparse (p. ej. 'PTFUN' y 'PTFUND').
+    """
+    prefixes = [p for p in prefixes if p]
+    for a in prefixes:
+        for b in prefixes:
+            if a != b and b.startswith(a):
+                raise ValueError(f"Prefijos de partición solapados: '{a}' y '{b}'")
+    if len(set(prefixes)) != len(prefixes):
+        raise ValueError("Prefijos de partición duplicados")
+
+    col = f'"{key_column}"'
+    partitions = [(p, f"{col} LIKE ?", [f"{p}%"]) for p in prefixes]
+    if prefixes:
+        any_prefix = " OR ".join(f"{col} LIKE ?" for _ in prefixes)
+        rest = f"{col} IS NULL OR NOT ({any_prefix})"
+        partitions.append(("resto", rest, [f"{p}%" for p in prefixes]))
+    else:
+        partitions.append(("resto", None, []))
+    return partitions
+
+
+def read_partitions(view_name, partitions, connection_factory, chunk_size=50000, parallelism=4, columns=None,
+                    where=None, params=None):
+    """
+    Lee las particiones de la vista en paralelo, cada una con su propia conexión
+    obtenida de `connection_factory` (un context manager, p. ej. `pool.connection`),
+    y entrega los chunks a medida que llegan.
+    El orden entre particiones no está garantizado; dentro de una partición se
+    respeta el orden de lectura.
+    Un error en cualquier partición detiene la lectura y se relanza al consumidor.
+    `columns` limita el SELECT a esas columnas (None = todas).
+    `where`/`params` es un filtro adicional que se combina (AND) con cada partición.
+    """
+    results = queue.Queue(maxsize=max(1, parallelism))
+    stop = threading.Event()
+
+    def put(item):
+        # Espera espacio en la cola sin quedar bloqueado si el consumidor se detuvo
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker(name, part_where, part_params):
+        conditions = [f"({c})" for c in (part_where, where) if c]
+        query_params = list(part_params or []) + list(params or [])
+        try:
+            with connection_factory() as conn:
+                query = f"SELECT {select_clause(columns)} FROM {view_name}"
+                if conditions:
+                    query += " WHERE " + " AND ".join(conditions)
+                for chunk in read_query_chunks(conn, query, query_params, chunk_size=chunk_size,
+                                               columnar=config.FETCH_COLUMNAR, fetch_size=config.DB_FETCH_SIZE):
+                    if not put(chunk):
+                        break
+        except BaseException as e:
+            print(f"[DB Error] Fallo leyendo partición '{name}': {e}")
+            put(e)
+        finally:
+            put(_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="hana-part")
+    try:
+        for name, part_where, part_params in partitions:
+            executor.submit(worker, name, part_where, part_params)
+
+        pending = len(partitions)
+        while pending:
+            item = results.get()
+            if item is _DONE:
+                pending -= 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
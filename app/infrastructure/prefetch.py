@@ -0,0 +1,85 @@
+import threading
+from collections import deque
+
+import pandas as pd
+
+
+def _chunk_bytes(chunk):
+    """Tamaño aproximado en memoria de un chunk (0 si no es un DataFrame)."""
+    if isinstance(chunk, pd.DataFrame):
+        return int(chunk.memory_usage(index=True, deep=False).sum())
+    return 0
+
+
+def prefetch_chunks(iterable, depth=2, max_bytes=None):
+    """
+    Recorre `iterable` en un hilo de fondo y mantiene hasta `depth` chunks listos
+    mientras el consumidor procesa el actual (solapa lectura de red con CPU).
+
+    - `max_bytes`: tope de memoria de los chunks en espera; siempre se admite al
+      menos uno para no bloquear el flujo con chunks grandes.
+    - Los errores del productor se relanzan en el consumidor, después de entregar
+      los chunks que ya estaban en la cola.
+    - Si el consumidor se detiene antes de tiempo, el productor se cierra
+      (y con él la conexión del generador de origen).
+    """
+    buffer = deque()
+    cond = threading.Condition()
+    stop = threading.Event()
+    state = {'bytes': 0, 'done': False, 'error': None}
+
+    def is_full(size):
+        if not buffer:
+            return False
+        if len(buffer) >= depth:
+            return True
+        return bool(max_bytes) and state['bytes'] + size > max_bytes
+
+    def producer():
+        it = iter(iterable)
+        try:
+            for chunk in it:
+                size = _chunk_bytes(chunk)
+                with cond:
+                    while not stop.is_set() and is_full(size):
+                        cond.wait()
+                    if stop.is_set():
+                        break
+                    buffer.append((chunk, size))
+                    state['bytes'] += size
+                    cond.notify_all()
+        except BaseException as e:
+            with cond:
+                state['error'] = e
+        finally:
+            close = getattr(it, 'close', None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    print(f"[Prefetch] Error cerrando el origen: {e}")
+            with cond:
+                state['done'] = True
+                cond.notify_all()
+
+    thread = threading.Thread(target=producer, name="chunk-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            with cond:
+                while not buffer and not state['done']:
+                    cond.wait()
+                if buffer:
+                    chunk, size = buffer.popleft()
+                    state['bytes'] -= size
+                    cond.notify_all()
+                elif state['error'] is not None:
+                    raise state['error']
+                else:
+                    return
+            yield chunk
+    finally:
+        stop.set()
+        with cond:
+            cond.notify_all()
+        thread.join()
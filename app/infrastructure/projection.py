@@ -0,0 +1,27 @@
+def get_view_columns(conn, view_name):
+    """Retorna las columnas reales de la vista (consulta sin filas: WHERE 1=0)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT * FROM {view_name} WHERE 1=0")
+        return [desc[0] for desc in cursor.description] if cursor.description else []
+    finally:
+        cursor.close()
+
+
+def resolve_projection(conn, view_name, columns):
+    """
+    Intersecta las columnas requeridas con las de la vista, respetando el orden de la vista.
+    Retorna None (SELECT *) si no se pidió proyección o si no queda ninguna columna.
+    """
+    if not columns:
+        return None
+    wanted = set(columns)
+    projected = [c for c in get_view_columns(conn, view_name) if c in wanted]
+    return projected or None
+
+
+def select_clause(columns):
+    """Lista de columnas para el SELECT (identificadores entre comillas) o '*'."""
+    if not columns:
+        return "*"
+    return ", ".join('"{}"'.format(c.replace('"', '""')) for c in columns)
@@ -0,0 +1,213 @@
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Patrones compartidos por varias reglas (mantener en sincronía con business_rules)
+NAME_LAMINA_MANGA_PAT = 'LAMINA|MANGA'
+NAME_ENVASE_GROUP_PAT = 'ENVASE|TAPA|MANGA|BALDE|PREFORMA|FUNDA'
+NAME_ENVASE_NO_MANGA_PAT = 'ENVASE|TAPA|BALDE|PREFORMA|FUNDA'
+SPECIAL_FUND_CODES = ['PTFUND0212', 'PTFUND0216']
+
+# Columnas de origen de los derivados del contexto (necesarias aunque ninguna regla las lea directo)
+CONTEXT_COLUMNS = ['ItemCode', 'ItemName', 'UgpEntry', 'ItmsGrpCod']
+
+# Filas a las que apunta una regla: prefijos de familia (ItemCode contiene PTLAMI, PTMANG, ...,
+# como is_ptlami/is_ptmang) y/o grupos ItmsGrpCod (None = todos).
+# `default` es la validez que reciben las filas fuera de la familia.
+RuleFamily = namedtuple('RuleFamily', ['prefixes', 'groups', 'default'], defaults=(None, None, True))
+
+
+class BatchContext:
+    """
+    Contexto derivado de un lote (chunk) de datos.
+    Calcula de forma perezosa (una sola vez por lote) las columnas y máscaras
+    que comparten las reglas de perfilamiento, calidad y limpieza:
+    ItemCode/ItemName como texto, prefijos PT/PTLAMI/PTMANG, máscaras de nombre, etc.
+
+    Las reglas de limpieza que modifican ItemCode o ItemName deben llamar a
+    `invalidate(col)` para que los derivados se recalculen con el valor nuevo.
+
+    `reasons` guarda los códigos de motivo emitidos por las reglas, por etapa:
+    {'profiling': {regla: codigos}, 'quality': {...}}.
+
+    `families` agrupa el lote una sola vez por familia (prefijo de ItemCode, ItmsGrpCod);
+    `family_rows` y `subset` permiten evaluar una regla solo sobre las filas de su familia.
+    """
+
+    def __init__(self, df: pd.DataFrame, parent=None, rows=None):
+        self.df = df
+        self.reasons = {}
+        self._cache = {}
+        self._deps = {}
+        # Contexto de un subconjunto (ver `subset`): los derivados se toman del lote completo
+        self._parent = parent
+        self._rows = rows
+
+    def _get(self, key, source_col, builder):
+        if key not in self._cache:
+            if self._parent is not None and isinstance(key, str):
+                self._cache[key] = self._take(getattr(self._parent, key))
+            else:
+                self._cache[key] = builder()
+            self._deps[key] = source_col
+        return self._cache[key]
+
+    def _take(self, value):
+        if isinstance(value, pd.Series):
+            return value.iloc[self._rows]
+        if isinstance(value, np.ndarray):
+            return value[self._rows]
+        key, table = value  # families: clave por fila + tabla del lote
+        return key[self._rows], table
+
+    def invalidate(self, col):
+        """Descarta los derivados que dependen de la columna dada."""
+        stale = [k for k, dep in self._deps.items() if dep == col or (isinstance(dep, tuple) and col in dep)]
+        if self._parent is not None:
+            # La columna cambió en el subconjunto: los derivados ya no pueden venir del lote
+            self._parent = None
+        for key in stale:
+            self._cache.pop(key, None)
+            self._deps.pop(key, None)
+
+    def text(self, col):
+        """Columna convertida a texto (ItemCode/ItemName comparten `code`/`name`)."""
+        if col == 'ItemCode':
+            return self.code
+        if col == 'ItemName':
+            return self.name
+        return self._get(('text', col), col, lambda: self.df[col].astype(str))
+
+    def contains(self, col, pattern):
+        """Máscara: `col` como texto contiene el patrón regex (compartida por reglas y tablas de decisión)."""
+        key = ('contains', col, pattern)
+        if key not in self._cache and self._parent is not None:
+            self._cache[key] = self._take(self._parent.contains(col, pattern))
+            self._deps[key] = col
+        return self._get(key, col, lambda: self.text(col).str.contains(pattern, regex=True, na=False))
+
+    # --- ItemCode ---
+    @property
+    def code(self):
+        """ItemCode convertido a texto."""
+        return self._get('code', 'ItemCode', lambda: self.df['ItemCode'].astype(str))
+
+    @property
+    def is_pt(self):
+        return self._get('is_pt', 'ItemCode', lambda: self.code.str.startswith('PT', na=False))
+
+    @property
+    def is_ptlami(self):
+        return self._get('is_ptlami', 'ItemCode', lambda: self.code.str.contains('PTLAMI', na=False))
+
+    @property
+    def is_ptmang(self):
+        return self._get('is_ptmang', 'ItemCode', lambda: self.code.str.contains('PTMANG', na=False))
+
+    @property
+    def is_lami_mang(self):
+        """ItemCode contiene PTLAMI o PTMANG."""
+        return self._get('is_lami_mang', 'ItemCode', lambda: self.is_ptlami | self.is_ptmang)
+
+    @property
+    def is_ptfun(self):
+        return self._get('is_ptfun', 'ItemCode', lambda: self.code.str.contains('PTFUN', na=False))
+
+    @property
+    def code_has_imp(self):
+        return self._get('code_has_imp', 'ItemCode', lambda: self.code.str.contains('IMP', na=False))
+
+    @property
+    def is_special_fund(self):
+        """ItemCode es PTFUND0212 o PTFUND0216."""
+        return self._get('is_special_fund', 'ItemCode', lambda: self.code.isin(SPECIAL_FUND_CODES))
+
+    # --- ItemName ---
+    @property
+    def name(self):
+        """ItemName convertido a texto."""
+        return self._get('name', 'ItemName', lambda: self.df['ItemName'].astype(str))
+
+    @property
+    def name_stripped(self):
+        return self._get('name_stripped', 'ItemName', lambda: self.name.str.strip())
+
+    @property
+    def name_has_lamina_manga(self):
+        return self.contains('ItemName', NAME_LAMINA_MANGA_PAT)
+
+    @property
+    def name_has_envase_group(self):
+        """ItemName contiene ENVASE, TAPA, MANGA, BALDE, PREFORMA o FUNDA."""
+        return self.contains('ItemName', NAME_ENVASE_GROUP_PAT)
+
+    @property
+    def name_has_envase_no_manga(self):
+        """ItemName contiene ENVASE, TAPA, BALDE, PREFORMA o FUNDA (sin MANGA)."""
+        return self.contains('ItemName', NAME_ENVASE_NO_MANGA_PAT)
+
+    @property
+    def name_has_imp(self):
+        return self._get('name_has_imp', 'ItemName', lambda: self.name.str.contains('IMP', na=False))
+
+    # --- Familias ---
+    @property
+    def families(self):
+        """
+        Agrupación del lote por ItmsGrpCod, calculada una sola vez: (clave por fila, tabla) donde
+        la tabla tiene una fila por clave con su ItmsGrpCod numérico.
+        """
+        def build():
+            # Se factoriza primero y se convierten solo los valores distintos (pocos por lote)
+            if 'ItmsGrpCod' in self.df.columns:
+                grp_codes, grps = pd.factorize(self.df['ItmsGrpCod'])
+                grps = pd.to_numeric(pd.Series(np.asarray(grps, dtype=object)), errors='coerce').to_numpy(dtype=float)
+            else:
+                grp_codes, grps = np.full(len(self.df), -1, dtype=np.intp), np.array([], dtype=float)
+            key = grp_codes.astype(np.int64) + 1
+            uniq = np.flatnonzero(np.bincount(key, minlength=1))
+            table = pd.DataFrame({'grp': np.where(uniq > 0, grps[uniq - 1] if len(grps) else np.nan, np.nan)},
+                                 index=uniq)
+            return key, table
+        return self._get('families', 'ItmsGrpCod', build)
+
+    def family_rows(self, family):
+        """
+        Posiciones (ordenadas) de las filas de la familia (RuleFamily). Los prefijos usan el mismo
+        criterio que is_ptlami/is_ptmang/is_ptfun (ItemCode *contiene* el prefijo), así evaluar
+        una regla solo sobre su familia da el mismo resultado que evaluarla sobre el lote.
+        """
+        def build():
+            selected = np.ones(len(self.df), dtype=bool)
+            if family.prefixes is not None:
+                pattern = '|'.join(re.escape(p) for p in family.prefixes)
+                selected &= self.code.str.contains(pattern, na=False).to_numpy(dtype=bool)
+            if family.groups is not None:
+                key, table = self.families
+                in_group = np.zeros(int(table.index.max()) + 1 if len(table) else 1, dtype=bool)
+                in_group[table.index[table['grp'].isin(family.groups).to_numpy()]] = True
+                selected &= in_group[key]
+            return np.flatnonzero(selected)
+        return self._get(('family', family.prefixes, family.groups), ('ItemCode', 'ItmsGrpCod'), build)
+
+    def subset(self, rows, df=None):
+        """
+        Contexto de un subconjunto de filas (posiciones) de `df` (por defecto, el del lote):
+        los derivados se calculan una vez sobre el lote completo y se recortan, así `df`
+        solo necesita las columnas que lee la regla.
+        """
+        return BatchContext(df if df is not None else self.df.iloc[rows], parent=self, rows=rows)
+
+    # --- Numéricos ---
+    @property
+    def ugp_num(self):
+        """UgpEntry numérico (NaN/no numérico -> 0)."""
+        return self._get('ugp_num', 'UgpEntry',
+                         lambda: pd.to_numeric(self.df['UgpEntry'], errors='coerce').fillna(0))
+
+
+def get_context(df, ctx=None):
+    """Retorna el contexto recibido o crea uno nuevo para el DataFrame."""
+    return ctx if ctx is not None else BatchContext(df)
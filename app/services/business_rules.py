@@ -1,6 +1,9 @@
+import re
 import pandas as pd
 import numpy as np
-from app.services.rule_engine import load_rules, apply_rule
+from collections import namedtuple
+from app.services.rule_engine import evaluate_field, rule_set, decision_table, ENGINE_ENTRY_POINTS
+from app.services.batch_context import get_context, RuleFamily, CONTEXT_COLUMNS
 
 # ==========================================
 # --- Funciones de Ayuda ---
@@ -16,145 +19,270 @@ def _check_range(df, col, min_v, max_v):
 def _check_is_in(df, col, values):
     return df[col].isin(values)
 
+def _config_rule(df, field, default, types=None):
+    """Máscara de las reglas de rules.yaml para `field` (solo `types`); si no las define, `default(df)`."""
+    result = evaluate_field(df, field, types)
+    return default(df) if result is None else result
+
+# ==========================================
+# --- Códigos de motivo (Reason Codes) ---
+# Una regla puede retornar RuleResult(valid, reasons): la máscara booleana y,
+# calculado en la misma pasada, un arreglo entero por fila con los motivos del fallo.
+# El motivo i corresponde al bit (1 << i) y su mensaje está en REASON_CATALOG[regla][i]
+# (las reglas por tabla de decisión agregan la fila de la tabla, ver TABLE_REASON_FIELDS).
+RuleResult = namedtuple('RuleResult', ['valid', 'reasons'])
+
+def split_rule_result(result):
+    """Retorna (mascara, motivos) para el resultado de una regla (motivos=None si no emite)."""
+    if isinstance(result, RuleResult):
+        return result.valid, result.reasons
+    return result, None
+
+_RULE_COLUMNS = {}
+
+def _rule_columns(rule_func, df, with_context=False):
+    """
+    Columnas de `df` que lee la regla (más las de rules.yaml si lo usa). Los derivados del contexto
+    vienen del lote completo; `with_context` agrega sus columnas de origen (clave del caché).
+    """
+    if rule_func not in _RULE_COLUMNS:
+        from app.services.column_projection import trace_rule
+        trace = trace_rule(rule_func)
+        _RULE_COLUMNS[rule_func] = (trace.names, bool(trace.attributes & ENGINE_ENTRY_POINTS))
+    names, uses_engine = _RULE_COLUMNS[rule_func]
+    if uses_engine:
+        names = names | rule_set().columns()
+    if with_context:
+        names = names | set(CONTEXT_COLUMNS)
+    return [c for c in df.columns if c in names]
+
+def evaluate_rule(stage, rule_name, rule_func, df, ctx=None, cache=None, partitioned=True):
+    """
+    Evalúa una regla y retorna (mascara, motivos).
+    Si la regla declara una familia en RULE_FAMILIES[stage] (y `partitioned`), se evalúa solo
+    sobre las filas de esa familia; las demás reciben `family.default` y motivo 0.
+    `cache` (RuleResultCache, opcional) evita reevaluar filas ya validadas.
+    """
+    ctx = get_context(df, ctx)
+    family = RULE_FAMILIES.get(stage, {}).get(rule_name) if partitioned else None
+    rows = ctx.family_rows(family) if family is not None else None
+    if rows is None or len(rows) == len(df):
+        if cache is not None:
+            return cache.evaluate(stage, rule_name, rule_func, df, ctx)
+        return split_rule_result(rule_func(df, ctx))
+
+    valid = np.full(len(df), family.default, dtype=bool)
+    reasons = None
+    if len(rows):
+        sub = df[_rule_columns(rule_func, df, with_context=cache is not None)].iloc[rows]
+        sub_ctx = ctx.subset(rows, sub)
+        if cache is not None:
+            sub_valid, sub_reasons = cache.evaluate(stage, rule_name, rule_func, sub, sub_ctx)
+        else:
+            sub_valid, sub_reasons = split_rule_result(rule_func(sub, sub_ctx))
+        valid[rows] = np.asarray(sub_valid, dtype=bool)
+        if sub_reasons is not None:
+            reasons = np.zeros(len(df), dtype=np.int64)
+            reasons[rows] = sub_reasons
+    return pd.Series(valid, index=df.index), reasons
+
+def _reasons(*conds):
+    """Combina condiciones booleanas en códigos de motivo (la i-ésima condición es el bit 1 << i)."""
+    codes = np.zeros(len(conds[0]), dtype=np.int64)
+    for i, cond in enumerate(conds):
+        codes |= np.where(np.asarray(cond, dtype=bool), 1 << i, 0)
+    return codes
+
+# Reglas por tabla de decisión: campo -> (tabla, salida, cantidad de motivos fijos). Los motivos
+# fijos son bits como en las demás reglas; la fila de la tabla que falló va como número
+# (fila + 1) por encima de esos bits, así la tabla puede tener cualquier cantidad de filas.
+TABLE_REASON_FIELDS = {
+    'UgpEntry': ('ugp_por_nombre', 'UgpEntry', 1),
+    'PriceUnit': ('unidades_por_ugp', 'PriceUnit', 2),
+}
+
+def _table_reasons(rows, failed, *fixed):
+    """Motivos de una regla por tabla: bits fijos + (fila + 1) << len(fixed) donde `failed`."""
+    codes = _reasons(*fixed) if fixed else np.zeros(len(rows), dtype=np.int64)
+    failed = np.asarray(failed, dtype=bool) & (rows >= 0)
+    return codes | np.where(failed, (rows.astype(np.int64) + 1) << len(fixed), 0)
+
+def table_reasons(field):
+    """
+    (motivos fijos, plantilla por fila de la tabla) si `field` se valida con una tabla de
+    rules.yaml vigente; None si no (sus motivos son todos bits de REASON_CATALOG).
+    """
+    spec = TABLE_REASON_FIELDS.get(field)
+    table = decision_table(spec[0]) if spec else None
+    if table is None:
+        return None
+    return spec[2], table.reason_templates(spec[1])
+
+def _numeric_values(df, col):
+    """(nulo, número, no numérico) de `col`: máscara y motivos salen del mismo to_numeric (no lanza)."""
+    raw = df[col]
+    is_null = raw.isna()
+    num = pd.to_numeric(raw, errors='coerce')
+    return is_null, num, ~is_null & num.isna()
+
+def _range_reasons(values, min_v, max_v):
+    """Motivos: [nulo, fuera de rango, no numérico] (values = _numeric_values)."""
+    is_null, num, invalid = values
+    out_of_range = ~is_null & ~invalid & ((num < min_v) | (num > max_v))
+    return _reasons(is_null, out_of_range, invalid)
+
+def _value_reasons(df, col, expected):
+    """Motivos: [valor distinto al esperado]."""
+    return _reasons(df[col] != expected)
+
 # ===================================================
 # REGLAS DE PERFILAMIENTO (Reglas Simples / Formato)
 # ===================================================
 
-def rule_item_code(df):
+def rule_item_code(df, ctx=None):
     """
     ItemCode: Analizar si el codigo empieza por PT que no sea nulo y que 
     tenga mas de 10 caracteres alfanumericos en mayusculas.
     """
-    s = df['ItemCode'].astype(str)
-    cond_start = s.str.startswith('PT', na=False)
+    ctx = get_context(df, ctx)
+    s = ctx.code
+    cond_start = ctx.is_pt
     cond_len = s.str.len() > 10
     cond_alnum = s.str.isalnum()
     cond_upper = s.str.isupper()
-    return cond_start & cond_len & cond_alnum & cond_upper
+    valid = cond_start & cond_len & cond_alnum & cond_upper
+    return RuleResult(valid, _reasons(~cond_start, ~cond_len, ~cond_upper, ~cond_alnum))
 
-def rule_item_name(df):
+def rule_item_name(df, ctx=None):
     """ItemName: Debe estar todo en Mayusculas y sin tildes."""
-    s = df['ItemName'].astype(str)
+    s = get_context(df, ctx).name
     cond_upper = s.str.isupper()
     cond_no_tildes = ~s.str.contains('[ÁÉÍÓÚáéíóú]', regex=True, na=False)
-    return cond_upper & cond_no_tildes
+    return RuleResult(cond_upper & cond_no_tildes, _reasons(~cond_upper, ~cond_no_tildes))
 
-def rule_item_type(df):
+def rule_item_type(df, ctx=None):
     return _check_value(df, 'ItemType', 'I')
 
-def rule_itms_grp_cod(df):
+def rule_itms_grp_cod(df, ctx=None):
     return _check_not_null(df, 'ItmsGrpCod')
 
-def rule_ugp_entry(df):
+def rule_ugp_entry(df, ctx=None):
     """
-    UgpEntry debe cumplir:
-    - Si ItemName contiene LAMINA o MANGA -> debe ser 3
-    - Si ItemName contiene ENVASE, TAPA, MANGA, BALDE, PREFORMA o FUNDA -> debe ser 1
+    UgpEntry debe cumplir (tabla `ugp_por_nombre` de rules.yaml; la primera fila que aplica gana):
     - Si ItemCode es PTFUND0212 o PTFUND0216 -> debe ser 11
+    - Si ItemName contiene LAMINA o MANGA -> debe ser 3
+    - Si ItemName contiene ENVASE, TAPA, BALDE, PREFORMA o FUNDA -> debe ser 1
     """
-    name = df['ItemName'].astype(str)
-    code = df['ItemCode'].astype(str)
-    
-    # Condiciones específicas
-    is_lamina_manga = name.str.contains('LAMINA|MANGA', regex=True, na=False)
-    is_envase_group = name.str.contains('ENVASE|TAPA|MANGA|BALDE|PREFORMA|FUNDA', regex=True, na=False)
-    is_special_fund = code.isin(['PTFUND0212', 'PTFUND0216'])
-    
-    # Validaciones
-    check_3 = df['UgpEntry'] == 3
-    check_1 = df['UgpEntry'] == 1
-    check_11 = df['UgpEntry'] == 11
+    ctx = get_context(df, ctx)
+    table = decision_table('ugp_por_nombre')
+    if table is None:
+        return _rule_ugp_entry_where(df, ctx)
+    valid, rows = table.validate(df, 'UgpEntry', ctx)
+    # Motivos: [no numérico, una por fila de la tabla]
+    ok = df['UgpEntry'].isna() | np.isfinite(pd.to_numeric(df['UgpEntry'], errors='coerce'))
+    return RuleResult(valid, _table_reasons(rows, ok & ~valid, ~ok))
+
+def _rule_ugp_entry_where(df, ctx):
+    is_lamina_manga = ctx.name_has_lamina_manga
+    is_envase_group = ctx.name_has_envase_group
+    is_special_fund = ctx.is_special_fund
     
-    # Lógica: Por defecto True, aplicar validaciones específicas
     result = pd.Series(True, index=df.index)
+    result = np.where(is_lamina_manga, df['UgpEntry'] == 3, result)
+    result = np.where(is_envase_group & ~is_lamina_manga, df['UgpEntry'] == 1, result)
+    result = np.where(is_special_fund, df['UgpEntry'] == 11, result)
     
-    # Si es LAMINA o MANGA -> debe ser 3
-    result = np.where(is_lamina_manga, check_3, result)
-    
-    # Si es ENVASE, TAPA, etc. -> debe ser 1 (pero MANGA ya fue validado arriba)
-    result = np.where(is_envase_group & ~is_lamina_manga, check_1, result)
-    
-    # Si es PTFUND0212 o PTFUND0216 -> debe ser 11 (prioridad máxima)
-    result = np.where(is_special_fund, check_11, result)
-    
-    return result
-
-def rule_invnt_item(df):
-    return _check_value(df, 'InvntItem', 'Y')
-
-def rule_sell_item(df):
-    return _check_value(df, 'SellItem', 'Y')
-
-def rule_prchse_item(df):
-    cond_imp = df['ItemCode'].astype(str).str.contains('IMP', na=False)
+    # Motivos: [no numérico, PTFUND especial != 11, LAMINA/MANGA != 3, ENVASE/TAPA/... != 1]
+    num = pd.to_numeric(df['UgpEntry'], errors='coerce')
+    ok = df['UgpEntry'].isna() | np.isfinite(num)
+    is_lam = is_lamina_manga & ~is_special_fund
+    is_env = ctx.name_has_envase_no_manga & ~is_special_fund & ~is_lam
+    reasons = _reasons(
+        ~ok,
+        ok & is_special_fund & (num != 11),
+        ok & is_lam & (num != 3),
+        ok & is_env & (num != 1),
+    )
+    return RuleResult(result, reasons)
+
+def rule_invnt_item(df, ctx=None):
+    return RuleResult(_check_value(df, 'InvntItem', 'Y'), _value_reasons(df, 'InvntItem', 'Y'))
+
+def rule_sell_item(df, ctx=None):
+    return RuleResult(_check_value(df, 'SellItem', 'Y'), _value_reasons(df, 'SellItem', 'Y'))
+
+def rule_prchse_item(df, ctx=None):
+    cond_imp = get_context(df, ctx).code_has_imp
     check_compra = df['PrchseItem'] == 'Y'
     check_no = df['PrchseItem'] == 'N'
-    return np.where(cond_imp, check_compra, check_no)
+    return RuleResult(np.where(cond_imp, check_compra, check_no), _reasons(~check_compra))
 
-def rule_price_unit(df):
+def rule_price_unit(df, ctx=None):
     """
-    PriceUnit depende de UgpEntry:
+    PriceUnit depende de UgpEntry (tabla `unidades_por_ugp` de rules.yaml):
     - UgpEntry=1 -> PriceUnit=8
     - UgpEntry=3 -> PriceUnit=2
     - UgpEntry=11 -> PriceUnit=13
     """
-    ugp = pd.to_numeric(df['UgpEntry'], errors='coerce').fillna(0)
-    pu = pd.to_numeric(df['PriceUnit'], errors='coerce').fillna(0)
-    
-    # Validaciones
-    check_1 = pu == 8
-    check_3 = pu == 2
-    check_11 = pu == 13
-    
-    # Por defecto False seguro, o True? Mejor True y negar fallos.
-    result = pd.Series(True, index=df.index)
-    
-    result = np.where(ugp == 1, check_1, result)
-    result = np.where(ugp == 3, check_3, result)
-    result = np.where(ugp == 11, check_11, result)
-    
-    return result
-
-def rule_wt_liable(df):
+    ctx = get_context(df, ctx)
+    # Motivos: [no numérico, nulo, una por fila de la tabla]
+    pu_null = df['PriceUnit'].isna()
+    pu_raw = pd.to_numeric(df['PriceUnit'], errors='coerce')
+    ugp_raw = df['UgpEntry']
+    error = (~pu_null & pu_raw.isna()) | (ugp_raw.notna() & pd.to_numeric(ugp_raw, errors='coerce').isna())
+    ok = ~error & ~pu_null
+    table = decision_table('unidades_por_ugp')
+    if table is None:
+        ugp = ctx.ugp_num
+        pu = pu_raw.fillna(0)
+        rows = np.select([ugp == 1, ugp == 3, ugp == 11], [0, 1, 2], -1)
+        valid = np.where(ugp == 1, pu == 8, np.where(ugp == 3, pu == 2, np.where(ugp == 11, pu == 13, True)))
+        reasons = _reasons(error, ~error & pu_null, *[ok & (rows == i) & ~valid for i in range(3)])
+        return RuleResult(valid, reasons)
+    valid, rows = table.validate(df, 'PriceUnit', ctx)
+    return RuleResult(valid, _table_reasons(rows, ok & ~valid, error, ~error & pu_null))
+
+def rule_wt_liable(df, ctx=None):
     return _check_not_null(df, 'WTLiable')
 
-def rule_indirct_tax(df):
+def rule_indirct_tax(df, ctx=None):
     return _check_not_null(df, 'IndirctTax')
 
 # Cambiarlo
-def rule_item_class(df):
+def rule_item_class(df, ctx=None):
     """ItemClass: Siempre debe ser igual a 2"""
-    return _check_range(df, 'ItemClass', 2, 2)
+    return RuleResult(_check_range(df, 'ItemClass', 2, 2), _value_reasons(df, 'ItemClass', 2))
 
-def rule_mng_method(df):
-    return _check_value(df, 'MngMethod', 'A')
+def rule_mng_method(df, ctx=None):
+    return RuleResult(_check_value(df, 'MngMethod', 'A'), _value_reasons(df, 'MngMethod', 'A'))
 
-def rule_tax_code_ar(df):
+def rule_tax_code_ar(df, ctx=None):
     return _check_not_null(df, 'TaxCodeAR')
 
-def rule_gl_method(df):
+def rule_gl_method(df, ctx=None):
     return _check_not_null(df, 'GLMethod')
 
-def rule_eval_system(df):
+def rule_eval_system(df, ctx=None):
     return _check_not_null(df, 'EvalSystem')
 
-def rule_i_weight1(df):
-    return df['IWeight1'] > 0
+def rule_i_weight1(df, ctx=None):
+    values = _numeric_values(df, 'IWeight1')
+    return RuleResult(values[1] > 0, _range_reasons(values, 0, 1000))
 
-def rule_invntry_uom(df):
+def rule_invntry_uom(df, ctx=None):
     """
     UgpEntry (InvntryUom):
     - Si ItemName es LAMINA o MANGA -> KG
     - Si ItemName contiene ENVASE, TAPA, MANGA, BALDE, PREFORMA o FUNDA -> UN
     """
-    name = df['ItemName'].astype(str)
+    ctx = get_context(df, ctx)
+    name = ctx.name
     # Caso 1: Coincidencia Exacta -> KG
     # "si el ItemName contiene; LAMINA o MANGA usar KG"
     matches_kg = name.isin(['LAMINA', 'MANGA'])
     check_kg = df['InvntryUom'] == 'KG'
     # Caso 2: Contiene -> UN
-    patterns_un = ['ENVASE', 'TAPA', 'MANGA', 'BALDE', 'PREFORMA', 'FUNDA']
-    matches_un = name.str.contains('|'.join(patterns_un), regex=True, na=False)
+    matches_un = ctx.name_has_envase_group
     check_un = df['InvntryUom'] == 'UN'
     # Lógica: Por defecto True. Si matches_un -> check_un. Si matches_kg -> check_kg (sobrescribe).
     res = pd.Series(True, index=df.index)
@@ -164,85 +292,109 @@ def rule_invntry_uom(df):
     res = np.where(matches_kg, check_kg, res)
     return res
 
-def rule_dflt_wh(df):
-    return df['DfltWH'].astype(str).str.contains('_PROD', na=False)
+def rule_dflt_wh(df, ctx=None):
+    valid = df['DfltWH'].astype(str).str.contains('_PROD', na=False)
+    return RuleResult(valid, _reasons(~valid))
     
-def rule_planing_sys(df):
-    return _check_value(df, 'PlaningSys', 'M')
+def rule_planing_sys(df, ctx=None):
+    return RuleResult(_check_value(df, 'PlaningSys', 'M'), _value_reasons(df, 'PlaningSys', 'M'))
 
-def rule_pricing_prc(df):
+def rule_pricing_prc(df, ctx=None):
     """PricingPrc debe ser 0"""
     return _check_value(df, 'PricingPrc', 0)
 
-def rule_lead_time(df):
+def rule_lead_time(df, ctx=None):
     """LeadTime: Debe ser un numero entre 1 y 20"""
     return _check_range(df, 'LeadTime', 1, 20)
     
-def rule_toleran_day(df):
+def rule_toleran_day(df, ctx=None):
     """ToleranDay: Numero entero entre 0 y 24"""
     return _check_range(df, 'ToleranDay', 0, 24)
 
-def rule_pricing_prc(df):
+def rule_pricing_prc(df, ctx=None):
     """PricingPrc debe ser 0"""
     return df['PricingPrc'] == 0
 
-def rule_lead_time(df):
+def rule_lead_time(df, ctx=None):
     """LeadTime: Debe ser un numero entre 1 y 20"""
-    return df['LeadTime'].between(1, 20)
+    values = _numeric_values(df, 'LeadTime')
+    return RuleResult(values[1].between(1, 20), _range_reasons(values, 1, 20))
 
-def rule_toleran_day(df):
+def rule_toleran_day(df, ctx=None):
     """ToleranDay: Numero entero entre 0 y 24"""
-    return df['ToleranDay'].between(0, 24)
+    values = _numeric_values(df, 'ToleranDay')
+    return RuleResult(values[1].between(0, 24), _range_reasons(values, 0, 24))
 
-def rule_u_beas_gruppe(df):
+def rule_u_beas_gruppe(df, ctx=None):
     """U_beas_gruppe siempre valido (True proforma)"""
     return pd.Series(True, index=df.index)
 
-def rule_u_beas_prccode(df):
+def rule_u_beas_prccode(df, ctx=None):
     """U_beas_gruppe debe ser igual a U_beas_prccode"""
-    return df['U_beas_gruppe'].fillna('') == df['U_beas_prccode'].fillna('')
+    # Como texto: si vienen categóricas (schema.apply_schema) sus categorías difieren
+    return df['U_beas_gruppe'].astype(str).fillna('') == df['U_beas_prccode'].astype(str).fillna('')
 
-def rule_u_beas_prodrelease(df):
+def rule_u_beas_prodrelease(df, ctx=None):
     """U_beas_prodrelease debe ser 'Y'"""
     return df['U_beas_prodrelease'] == 'Y'
 
-def rule_u_beas_batchroh(df):
+def rule_u_beas_batchroh(df, ctx=None):
     """U_beas_batchroh siempre valido"""
     return pd.Series(True, index=df.index)
 
-def rule_pictur_name(df):
+def rule_pictur_name(df, ctx=None):
     """PicturName siempre valido"""
     return pd.Series(True, index=df.index)
 
-def rule_u_beas_dispo(df):
+def rule_u_beas_dispo(df, ctx=None):
     """U_beas_dispo debe ser 'A' o 'B'"""
     return df['U_beas_dispo'].isin(['A', 'B'])
 
-def rule_u_empa_espesor(df):
+def _empa_values(df, col):
+    """Retorna (vacio, numero, no_numerico) para un campo U_EMPA_*."""
+    raw = df[col]
+    empty = raw.isna() | (raw == '')
+    num = pd.to_numeric(raw, errors='coerce')
+    return empty, num, ~empty & num.isna()
+
+def rule_u_empa_espesor(df, ctx=None):
     # LLENAR CUANDO SEA PTLAMI Y PTMANG
-    cond_target = df['ItemCode'].astype(str).str.contains('PTLAMI|PTMANG', na=False, regex=True)
-    val_gt_0 = df['U_EMPA_ESPESOR'] > 0
+    cond_target = get_context(df, ctx).is_lami_mang
+    # Motivos: [vacío, fuera de rango 25-125, no numérico]
+    empty, num, invalid = _empa_values(df, 'U_EMPA_ESPESOR')
+    val_gt_0 = num > 0
     val_is_nan = df['U_EMPA_ESPESOR'].isna()
-    return np.where(cond_target, val_gt_0, val_is_nan)
-
-def rule_u_empa_desidad(df):
-    cond_target = df['ItemCode'].astype(str).str.contains('PTLAMI|PTMANG', na=False, regex=True)
-    val_gt_0 = df['U_EMPA_DESIDAD'] > 0
+    out_of_range = ~empty & ~invalid & ((num < 25) | (num > 125))
+    return RuleResult(np.where(cond_target, val_gt_0, val_is_nan), _reasons(empty, out_of_range, invalid))
+
+def rule_u_empa_desidad(df, ctx=None):
+    cond_target = get_context(df, ctx).is_lami_mang
+    # Motivos: [vacío, no numérico]
+    empty, num, invalid = _empa_values(df, 'U_EMPA_DESIDAD')
+    val_gt_0 = num > 0
     val_is_nan = df['U_EMPA_DESIDAD'].isna()
-    return np.where(cond_target, val_gt_0, val_is_nan)
-
-def rule_u_empa_ancho(df):
-    cond_target = df['ItemCode'].astype(str).str.contains('PTLAMI|PTMANG', na=False, regex=True)
-    val_gt_0 = df['U_EMPA_ANCHO'] > 0
+    return RuleResult(np.where(cond_target, val_gt_0, val_is_nan), _reasons(empty, invalid))
+
+def rule_u_empa_ancho(df, ctx=None):
+    ctx = get_context(df, ctx)
+    cond_target = ctx.is_lami_mang
+    # Motivos: [vacío, fuera de rango PTLAMI, fuera de rango PTMANG, no numérico]
+    empty, num, invalid = _empa_values(df, 'U_EMPA_ANCHO')
+    val_gt_0 = num > 0
     val_is_nan = df['U_EMPA_ANCHO'].isna()
-    return np.where(cond_target, val_gt_0, val_is_nan)
-
-def rule_u_plg_cicle(df):
-    cond_target = df['ItemCode'].astype(str).str.contains('PTLAMI|PTMANG|PTFUN', na=False, regex=True)
+    ok = ~empty & ~invalid
+    out_lami = ok & ctx.is_ptlami & ((num < 8.4) | (num > 120))
+    out_mang = ok & ~out_lami & ctx.is_ptmang & ((num < 5) | (num > 58))
+    reasons = _reasons(empty, out_lami, out_mang, invalid)
+    return RuleResult(np.where(cond_target, val_gt_0, val_is_nan), reasons)
+
+def rule_u_plg_cicle(df, ctx=None):
+    ctx = get_context(df, ctx)
+    cond_target = ctx.is_lami_mang | ctx.is_ptfun
     # Si es (Lami/Mang/Fun) -> Debe estar vacio (NaN)
     val_is_nan = df['U_PLG_CICLE'].isna()
-    # Si es (PT) -> Debe estar entre 1.00 y 160.00
-    val = df['U_PLG_CICLE']
+    # Si es (PT) -> Debe estar entre 1.00 y 160.00 (no numérico -> inválido, sin lanzar)
+    val = pd.to_numeric(df['U_PLG_CICLE'], errors='coerce')
     valid_range = (val >= 1.00) & (val <= 160.00)
     return np.where(cond_target, val_is_nan, valid_range)
 
@@ -255,7 +407,7 @@ def get_valid_from_profiling(df_profiling, col_name, item_codes):
         return df_profiling[col_name]
     return pd.Series(False, index=item_codes) 
 
-def check_u_codigo_secundario(df):
+def check_u_codigo_secundario(df, ctx=None):
     not_na = df['U_Codigo_Secundario'].notna()
     duplicates = df[not_na].duplicated(subset=['U_Codigo_Secundario'], keep=False)
     is_valid = ~duplicates
@@ -263,60 +415,61 @@ def check_u_codigo_secundario(df):
     mask.loc[not_na] = is_valid
     return mask
 
-def check_frgn_name(df):
+def check_frgn_name(df, ctx=None):
     return df['ItemName'] != df['FrgnName']
 
-def check_itms_grp_cod(df):
-    return _check_not_null(df, 'ItmsGrpCod')
+def check_itms_grp_cod(df, ctx=None):
+    return _config_rule(df, 'ItmsGrpCod', lambda d: _check_not_null(d, 'ItmsGrpCod'))
 
-def check_wt_liable(df):
-    return _check_not_null(df, 'WTLiable')
+def check_wt_liable(df, ctx=None):
+    return _config_rule(df, 'WTLiable', lambda d: _check_not_null(d, 'WTLiable'))
 
-def check_indirct_tax(df):
-    # Si IndirctTax == 'Y', TaxCodeAR debe tener valor.
+def check_indirct_tax(df, ctx=None):
+    # Si IndirctTax == 'Y', TaxCodeAR debe tener valor (expr de rules.yaml).
     # Si NO es 'Y', la regla no aplica (es válido por defecto).
+    return _config_rule(df, 'IndirctTax', _indirct_tax_where, types=('expr',))
+
+def _indirct_tax_where(df):
     cond_target = df['IndirctTax'] == 'Y'
     check_exists = df['TaxCodeAR'].notna()
     # Retorna True si: NO es target, O (SI es target Y existe)
     return np.where(cond_target, check_exists, True)
 
-def check_tax_code_ar(df):
-    return _check_not_null(df, 'TaxCodeAR')
+def check_tax_code_ar(df, ctx=None):
+    return _config_rule(df, 'TaxCodeAR', lambda d: _check_not_null(d, 'TaxCodeAR'))
 
-def check_gl_method(df):
-    return _check_value(df, 'GLMethod', 'C')
+def check_gl_method(df, ctx=None):
+    return _config_rule(df, 'GLMethod', lambda d: _check_value(d, 'GLMethod', 'C'))
 
-def check_eval_system(df):
-    return _check_not_null(df, 'EvalSystem')
+def check_eval_system(df, ctx=None):
+    return _config_rule(df, 'EvalSystem', lambda d: _check_not_null(d, 'EvalSystem'))
 
-def check_planing_sys(df):
-    starts_pt = df['ItemCode'].astype(str).str.startswith('PT', na=False)
+def check_planing_sys(df, ctx=None):
+    starts_pt = get_context(df, ctx).is_pt
     is_pnm = df['PlaningSys'] == 'M'
     valid_pt = starts_pt & is_pnm
     valid_other = (~starts_pt) & (df['PlaningSys'] != 'M')
     return valid_pt | valid_other
 
-def check_pricing_prc(df):
+def check_pricing_prc(df, ctx=None):
     return _check_not_null(df, 'PricingPrc')
 
-def check_lead_time(df):
-    rules = load_rules()
-    for rule in rules:
-        if rule['field'] == 'LeadTime':
-            return apply_rule(df, rule)
-    return _check_range(df, 'LeadTime', 0, 20)
+def check_lead_time(df, ctx=None):
+    return _config_rule(df, 'LeadTime', lambda d: _check_range(d, 'LeadTime', 0, 20))
 
-def check_toleran_day(df):
-    return (df['ToleranDay'] + df['LeadTime']) == 20
+def check_toleran_day(df, ctx=None):
+    # ToleranDay + LeadTime == 20 (expr de rules.yaml). Solo la regla entre columnas:
+    # el rango 0-24 de ToleranDay es del perfilado, no de este control.
+    return _config_rule(df, 'ToleranDay', lambda d: (d['ToleranDay'] + d['LeadTime']) == 20, types=('expr',))
 
-def check_u_beas_prodrelease(df):
-    starts_pt = df['ItemCode'].astype(str).str.startswith('PT', na=False)
+def check_u_beas_prodrelease(df, ctx=None):
+    starts_pt = get_context(df, ctx).is_pt
     is_y = df['U_beas_prodrelease'] == 'Y'
     valid_pt = starts_pt & is_y
     valid_other = (~starts_pt) & (~is_y)
     return valid_pt | valid_other
 
-def check_u_beas_dispo(df):
+def check_u_beas_dispo(df, ctx=None):
     grp = df['ItmsGrpCod']
     val = df['U_beas_dispo']
     is_pt = grp == 'PRODUCTO TERMINADO'
@@ -325,25 +478,22 @@ def check_u_beas_dispo(df):
     valid_b = np.where(is_semi, val=='B', val!='B')
     return pd.Series(valid_a | valid_b, index=df.index)
 
-def check_u_empa_espesor_range(df):
+def check_u_empa_espesor_range(df, ctx=None):
     # Calidad: PTLAMI/PTMANG -> 25 a 125 (¿Enteros?)
     # Diccionario dice "enteros desde 25 UM hasta 125 UM"
-    code = df['ItemCode'].astype(str)
-    is_ptlami = code.str.contains('PTLAMI', na=False)
-    is_ptmang = code.str.contains('PTMANG', na=False)
-    target = is_ptlami | is_ptmang
+    target = get_context(df, ctx).is_lami_mang
     
     val = df['U_EMPA_ESPESOR']
     is_valid_range = (val >= 25) & (val <= 125)
     return np.where(target, is_valid_range, True)
 
-def check_u_empa_ancho_range(df):
+def check_u_empa_ancho_range(df, ctx=None):
     # Calidad: PTLAMI -> 8.4-120, PTMANG -> 5-58
-    code = df['ItemCode'].astype(str)
+    ctx = get_context(df, ctx)
     val = pd.to_numeric(df['U_EMPA_ANCHO'], errors='coerce')
     
-    is_ptlami = code.str.contains('PTLAMI', na=False)
-    is_ptmang = code.str.contains('PTMANG', na=False)
+    is_ptlami = ctx.is_ptlami
+    is_ptmang = ctx.is_ptmang
     
     valid_lami = val.between(8.4, 120)
     valid_mang = val.between(5, 58)
@@ -352,159 +502,196 @@ def check_u_empa_ancho_range(df):
     # Usamos np.where anidado para evitar asignacion parcial que causa warnings
     return np.where(is_ptlami, valid_lami, np.where(is_ptmang, valid_mang, True))
 
-def check_u_empa_caracteristica_tipo(df):
+def check_u_empa_caracteristica_tipo(df, ctx=None):
     # Calidad: ESPECIFICO vs GENERICO basado en Cliente en Nombre
     # Asumiendo primero que los valores válidos son SOLO 'ESPECIFICO', 'GENERICO'.
     return df['U_EMPA_CARACTERISTICA_TIPO'].isin(['ESPECIFICO', 'GENERICO'])
 
-def check_u_empa_caracteristica_mp(df):
+def check_u_empa_caracteristica_mp(df, ctx=None):
     return _check_not_null(df, 'U_EMPA_CARACTERISTICA_MP')
 
-def check_item_code_complex(df):
+# ItemCode: estructura por grupo ItmsGrpCod
+# 102: PT + (Lista) + 4 digitos
+# "Despues de esos 6 caracteres si ItmsGrpCod es 102 deben tener 4 digitos" -> PT(2)+XXXX(4)
+# PT EPET (6) + 4 digitos. Total 10.
+# 103: PTPR + 6 digitos
+# "si ItmsGrpCod es 103 despues de PT debe ir PR, Despues de esos 4 caracteres deben tener 6 digitos"
+# PT PR = 4 carac. + 6 digitos.
+# 114: PT + 4 + IMP + 4
+# El usuario indico: "si ItmsGrpCod es 114 despues de PT y los 4 caracteres siguientes debe tener IMP."
+# Y tambien: "Despues de esos 9 caracteres si ItmsGrpCod es 114 deben tener 4 digitos"
+# Asi que 114 items empiezan con PT....IMP y luego 4 digitos.
+ITEM_CODE_LIST_102 = ['EPET', 'EPAD', 'TAPA', 'BALD', 'FUND', 'LAMI', 'MANG']
+ITEM_CODE_GROUP_PATTERNS = {
+    102: r'^PT(' + '|'.join(ITEM_CODE_LIST_102) + r')\d{4}$',
+    103: r'^PTPR\d{6}$',
+    114: r'^PT.{4}IMP\d{4}$',
+}
+
+def check_item_code_complex(df, ctx=None):
     """
     ItemCode: Unico, No nulo.
-    Estructura por Grupo (102, 103, 114).
+    Estructura por Grupo (102, 103, 114); otros grupos no tienen estructura valida.
+    El patron de cada grupo se evalua solo sobre las filas de ese grupo (ctx.family_rows).
     """
-    s = df['ItemCode'].astype(str)
-    grp = pd.to_numeric(df['ItmsGrpCod'], errors='coerce')
+    ctx = get_context(df, ctx)
+    s = ctx.code
     is_unique = ~s.duplicated(keep=False)
     not_null = s.notna() & (s != 'nan') & (s != '')
-    starts_pt = s.str.startswith('PT', na=False)
-    valid_struct = pd.Series(False, index=df.index)    
-    # 102: PT + (Lista) + 4 digitos
-    # "Despues de esos 6 caracteres si ItmsGrpCod es 102 deben tener 4 digitos" -> PT(2)+XXXX(4) 
-    # PT EPET (6) + 4 digitos. Total 10.
-    list_102 = ['EPET', 'EPAD', 'TAPA', 'BALD', 'FUND', 'LAMI', 'MANG']
-    pat_102 = r'^PT(' + '|'.join(list_102) + r')\d{4}$'
-    check_102 = s.str.match(pat_102, na=False)
-    # 103: PTPR + 6 digitos
-    # "si ItmsGrpCod es 103 despues de PT debe ir PR, Despues de esos 4 caracteres deben tener 6 digitos"
-    # PT PR = 4 carac. + 6 digitos.
-    pat_103 = r'^PTPR\d{6}$'
-    check_103 = s.str.match(pat_103, na=False)
-    # 114: PT + 4 + IMP + 4? 
-    # El usuario indico: "si ItmsGrpCod es 114 despues de PT y los 4 caracteres siguientes debe tener IMP."
-    # Y tambien: "Despues de esos 9 caracteres si ItmsGrpCod es 114 deben tener 4 digitos"
-    # Esto implica la estructura: PT (2) + XXXX (4) + IMP (3) = 9 caracteres?
-    # Asi que 114 items empiezan con PT....IMP y luego 4 digitos.    
-    pat_114_imp = r'^PT.{4}IMP'
-    check_114 = s.str.match(pat_114_imp, na=False)
-    pat_114 = r'^PT.{4}IMP\d{4}$'
-    check_114 = s.str.match(pat_114, na=False)
-    valid_struct = np.where(grp == 102, check_102, valid_struct)
-    valid_struct = np.where(grp == 103, check_103, valid_struct)
-    valid_struct = np.where(grp == 114, check_114, valid_struct)
+    starts_pt = ctx.is_pt
+    valid_struct = np.zeros(len(df), dtype=bool)
+    for group, pattern in ITEM_CODE_GROUP_PATTERNS.items():
+        rows = ctx.family_rows(RuleFamily(groups=(group,)))
+        if len(rows):
+            valid_struct[rows] = s.iloc[rows].str.match(pattern, na=False).to_numpy(dtype=bool)
     return is_unique & not_null & starts_pt & valid_struct
 
-def check_item_name_complex(df):
+# --- ItemName: estructura por prefijo de ItemCode y por tipo (patrones compilados al importar) ---
+ITEM_NAME_PREFIX_MAP = {
+    'PTEPET': ['ENVASE'],
+    'PTEPAD': ['ENVASE'],
+    'PTTAPA': ['TAPA', 'ANILLO', 'SOBRETAPA', 'TAZON', 'TAPON'],
+    'PTBALD': ['BALDE'],
+    'PTFUND': ['FUNDA', 'FUNDAS'],
+    'PTLAMI': ['LAMINA', 'BILAMINA'],
+    'PTMANG': ['MANGA'],
+    'PTMANI': ['MANIJA'],
+    'PTREPO': ['REPOSTERO']
+}
+ITEM_NAME_MATERIALS = ['MIX', 'PEAD', 'PET', 'PC', 'PEBD', 'POLIOLEFINA', 'BOPP', 'CAST', 'PP']
+_MAT_PAT = '|'.join(ITEM_NAME_MATERIALS)
+
+# Expresiones regulares estrictas
+# ENVASE: ENVASE [Mat] [Vol] [Unit] [Color] [Client?] [Weight] [Unit] [Mix?] [Neck?]
+# Validacion numerica acepta . o ,
+_FLOAT_NUM = r'\d+(?:[.,]\d+)?'
+
+ITEM_NAME_STRICT_PATTERNS = {
+    # ENVASE(Tipo) PET(MP) 5 LT(Cap) CRISTAL(Color) VOLCANIC(Client) 84 g(Weight) R(Mix) 48 mm(Neck)
+    # Regex: ^ENVASE (MAT) FLOAT (LT|ML...) COLOR (CLIENT?) FLOAT (g|GR|G)( R)?( FLOAT mm)?
+    'ENVASE': (
+        r'^ENVASE (' + _MAT_PAT + r') ' + _FLOAT_NUM + r' '
+        r'(?:LT|ML|GL|CM3) [A-Z]+(?: .*)? ' + _FLOAT_NUM + r' (?:g|GR|G)(?: R)?(?: ' + _FLOAT_NUM + r' mm)?$'
+    ),
+    # PREFORMA(Tipo) PET(MP) 16.5 GR(Weight) AZUL(Color) ORIENTAL(Client) R(Mix) 1881(Neck)
+    # Regex: ^PREFORMA (MAT) FLOAT (g|GR|G) COLOR (CLIENT?) (R )?INT
+    'PREFORMA': (
+        r'^PREFORMA (' + _MAT_PAT + r') ' + _FLOAT_NUM + r' (?:g|GR|G) [A-Z]+(?: .*)?(?: R)? \d+$'
+    ),
+    # LAMINA(Tipo) PEBD(MP) 32,7 CM X 95 MC(Dim) TRANSPARENTE(Color) ACEITE...(Client)
+    # Regex: ^LAMINA (MAT) FLOAT CM X FLOAT MC COLOR (CLIENT?)
+    'LAMINA': (
+        r'^LAMINA (' + _MAT_PAT + r') ' + _FLOAT_NUM + r' CM X ' + _FLOAT_NUM + r' MC [A-Z]+(?: .*)?$'
+    ),
+    # MANGA(Tipo) PEBD(MP) 36 "" X 60 MC(Dim) TRANSPARENTE(Color)
+    # Regex: ^MANGA (MAT) FLOAT "" X FLOAT MC COLOR
+    'MANGA': (
+        r'^MANGA (' + _MAT_PAT + r') ' + _FLOAT_NUM + r' "" X ' + _FLOAT_NUM + r' MC [A-Z]+$'
+    ),
+    # FUNDA(Tipo) PEBD(MP) 26,5"" X 66"" X 60 MC(Dim) TRANSPARENTE(Color)
+    # Regex: ^FUNDA (MAT) FLOAT "" X FLOAT "" X FLOAT MC COLOR
+    'FUNDA': (
+        r'^FUNDA (' + _MAT_PAT + r') ' + _FLOAT_NUM + r'"" X ' + _FLOAT_NUM + r'"" X ' + _FLOAT_NUM + r' MC [A-Z]+$'
+    ),
+    # TAPA(Tipo) PP(MP) REPOSTERO(Uso) DORADA(Color) 250 - 500 GR(Cap) DANEC(Client)
+    # Regex: ^TAPA (MAT) [A-Z]+ [A-Z]+ FLOAT( - FLOAT)? GR (CLIENT?)
+    'TAPA': (
+        r'^TAPA (' + _MAT_PAT + r') [A-Z]+ [A-Z]+ ' + _FLOAT_NUM + r'(?: - ' + _FLOAT_NUM + r')? GR(?: .*)?$'
+    )
+}
+
+
+class ItemNameMatcher:
+    """
+    Validador de estructura de ItemName en una sola pasada (patrones compilados una vez):
+    - Cada fila se despacha una sola vez: por su tipo (primer token, ej: 'ENVASE ') si
+      tiene patrón estricto; si no, por el prefijo de ItemCode (patrón general por prefijo).
+    - Solo se evalúa el patrón del grupo sobre sus filas; las filas sin patrón son válidas.
+    Equivale a validar por prefijo y luego sobrescribir con el patrón estricto del tipo.
+    """
+
+    def __init__(self, prefix_map, strict_patterns, materials):
+        mat_pat = '|'.join(materials)
+        lengths = {len(prefix) for prefix in prefix_map}
+        if len(lengths) != 1:
+            raise ValueError("Los prefijos de ItemCode deben tener la misma longitud")
+        self.prefix_len = lengths.pop()
+        # Largo mínimo que distingue los tipos entre sí (ENVASE/PREFORMA/... -> 1 letra)
+        types = list(strict_patterns)
+        self.type_len = next(n for n in range(1, max(map(len, types)) + 1)
+                             if len({t[:n] for t in types}) == len(types))
+        self.type_keys = pd.Index([t[:self.type_len] for t in types])
+        self.prefix_keys = pd.Index(list(prefix_map))
+        self.type_re = r'(?:' + '|'.join(re.escape(t) for t in types) + r') '
+        # Id de patrón: primero los estrictos (por tipo), luego los generales (por prefijo)
+        compiled = {}
+        patterns = list(strict_patterns.values()) + [
+            r'^(' + '|'.join(allowed_names) + r') (' + mat_pat + r').*' for allowed_names in prefix_map.values()
+        ]
+        self.patterns = [compiled.setdefault(p, re.compile(p)) for p in patterns]
+
+    def __call__(self, name: pd.Series, code: pd.Series) -> np.ndarray:
+        """Máscara booleana de estructura válida (name: ItemName sin espacios extremos)."""
+        ids = np.full(len(name), -1, dtype=np.int64)
+        has_type = name.str.match(self.type_re, na=False).to_numpy(dtype=bool)
+        typed = np.flatnonzero(has_type)
+        ids[typed] = self.type_keys.get_indexer(name.iloc[typed].str.slice(0, self.type_len))
+        untyped = np.flatnonzero(~has_type)
+        by_prefix = self.prefix_keys.get_indexer(code.iloc[untyped].str.slice(0, self.prefix_len))
+        ids[untyped] = np.where(by_prefix >= 0, by_prefix + len(self.type_keys), -1)
+
+        valid = np.ones(len(name), dtype=bool)
+        for pattern_id in np.unique(ids[ids >= 0]):
+            rows = np.flatnonzero(ids == pattern_id)
+            valid[rows] = name.iloc[rows].str.match(self.patterns[pattern_id], na=False).to_numpy(dtype=bool)
+        return valid
+
+
+_ITEM_NAME_MATCHER = ItemNameMatcher(ITEM_NAME_PREFIX_MAP, ITEM_NAME_STRICT_PATTERNS, ITEM_NAME_MATERIALS)
+
+def check_item_name_complex(df, ctx=None):
     """
     ItemName: Unico, No nulo.
-    Estructura: [ProductoMapped] [Material] [Specs]
+    Estructura: [ProductoMapped] [Material] [Specs] (ver ItemNameMatcher).
     """
-    name = df['ItemName'].astype(str).str.strip()
-    code = df['ItemCode'].astype(str)
+    ctx = get_context(df, ctx)
+    name = ctx.name_stripped
     is_unique = ~name.duplicated(keep=False)
     not_null = name.notna() & (name != 'nan') & (name != '')
-    prefix_map = {
-        'PTEPET': ['ENVASE'],
-        'PTEPAD': ['ENVASE'],
-        'PTTAPA': ['TAPA', 'ANILLO', 'SOBRETAPA', 'TAZON', 'TAPON'],
-        'PTBALD': ['BALDE'],
-        'PTFUND': ['FUNDA', 'FUNDAS'],
-        'PTLAMI': ['LAMINA', 'BILAMINA'],
-        'PTMANG': ['MANGA'],
-        'PTMANI': ['MANIJA'],
-        'PTREPO': ['REPOSTERO']
-    }
-    materials = ['MIX', 'PEAD', 'PET', 'PC', 'PEBD', 'POLIOLEFINA', 'BOPP', 'CAST', 'PP']
-    mat_pat = '|'.join(materials)
-    
-    # Expresiones regulares estrictas
-    # ENVASE: ENVASE [Mat] [Vol] [Unit] [Color] [Client?] [Weight] [Unit] [Mix?] [Neck?]
-    # Validacion numerica acepta . o ,
-    float_num = r'\d+(?:[.,]\d+)?'
-    
-    strict_patterns = {
-        # ENVASE(Tipo) PET(MP) 5 LT(Cap) CRISTAL(Color) VOLCANIC(Client) 84 g(Weight) R(Mix) 48 mm(Neck)
-        # Regex: ^ENVASE (MAT) FLOAT (LT|ML...) COLOR (CLIENT?) FLOAT (g|GR|G)( R)?( FLOAT mm)?
-        'ENVASE': (
-            r'^ENVASE (' + mat_pat + r') ' + float_num + r' '
-            r'(?:LT|ML|GL|CM3) [A-Z]+(?: .*)? ' + float_num + r' (?:g|GR|G)(?: R)?(?: ' + float_num + r' mm)?$'
-        ),
-        # PREFORMA(Tipo) PET(MP) 16.5 GR(Weight) AZUL(Color) ORIENTAL(Client) R(Mix) 1881(Neck)
-        # Regex: ^PREFORMA (MAT) FLOAT (g|GR|G) COLOR (CLIENT?) (R )?INT
-        'PREFORMA': (
-            r'^PREFORMA (' + mat_pat + r') ' + float_num + r' (?:g|GR|G) [A-Z]+(?: .*)?(?: R)? \d+$'
-        ),
-        # LAMINA(Tipo) PEBD(MP) 32,7 CM X 95 MC(Dim) TRANSPARENTE(Color) ACEITE...(Client)
-        # Regex: ^LAMINA (MAT) FLOAT CM X FLOAT MC COLOR (CLIENT?)
-        'LAMINA': (
-            r'^LAMINA (' + mat_pat + r') ' + float_num + r' CM X ' + float_num + r' MC [A-Z]+(?: .*)?$'
-        ),
-        # MANGA(Tipo) PEBD(MP) 36 "" X 60 MC(Dim) TRANSPARENTE(Color)
-        # Regex: ^MANGA (MAT) FLOAT "" X FLOAT MC COLOR
-        'MANGA': (
-            r'^MANGA (' + mat_pat + r') ' + float_num + r' "" X ' + float_num + r' MC [A-Z]+$'
-        ),
-        # FUNDA(Tipo) PEBD(MP) 26,5"" X 66"" X 60 MC(Dim) TRANSPARENTE(Color)
-        # Regex: ^FUNDA (MAT) FLOAT "" X FLOAT "" X FLOAT MC COLOR
-        'FUNDA': (
-            r'^FUNDA (' + mat_pat + r') ' + float_num + r'"" X ' + float_num + r'"" X ' + float_num + r' MC [A-Z]+$'
-        ),
-        # TAPA(Tipo) PP(MP) REPOSTERO(Uso) DORADA(Color) 250 - 500 GR(Cap) DANEC(Client)
-        # Regex: ^TAPA (MAT) [A-Z]+ [A-Z]+ FLOAT( - FLOAT)? GR (CLIENT?)
-        'TAPA': (
-            r'^TAPA (' + mat_pat + r') [A-Z]+ [A-Z]+ ' + float_num + r'(?: - ' + float_num + r')? GR(?: .*)?$'
-        )
-    }
-
-    valid_struct = pd.Series(True, index=df.index) 
-
-    # 1. Validacion General por Prefijo (Existente)
-    for prefix, allowed_names in prefix_map.items():
-        mask_prefix = code.str.startswith(prefix, na=False)
-        if not mask_prefix.any():
-            continue
-        names_pat = '|'.join(allowed_names)
-        full_pat = r'^(' + names_pat + r') (' + mat_pat + r').*'
-        check_row = name.str.match(full_pat, na=False)
-        valid_struct = np.where(mask_prefix, check_row, valid_struct)
-
-    # 2. Validacion Estricta por Tipo (Sobrescribe si aplica)
-    for key, pattern in strict_patterns.items():
-        # Aplica a filas que empiezan con el KEY (ej: 'ENVASE ')
-        # Se asume que el nombre debe empezar con el tipo seguido de espacio
-        mask_type = name.str.startswith(key + ' ', na=False)
-        if mask_type.any():
-            check_strict = name.str.match(pattern, na=False)
-            valid_struct = np.where(mask_type, check_strict, valid_struct)
-            
+    valid_struct = _ITEM_NAME_MATCHER(name, ctx.code)
     return is_unique & not_null & valid_struct
 
-def check_item_type(df):
+def check_item_type(df, ctx=None):
     s = df['ItemType']
     not_null = s.notna() & (s != '')
-    check_pt = np.where(df['ItemCode'].astype(str).str.startswith('PT', na=False), s == 'I', True)
+    check_pt = np.where(get_context(df, ctx).is_pt, s == 'I', True)
     return not_null & check_pt
 
-def check_invnt_item(df):
-    return _check_value(df, 'InvntItem', 'Y')
+def check_invnt_item(df, ctx=None):
+    return _config_rule(df, 'InvntItem', lambda d: _check_value(d, 'InvntItem', 'Y'))
 
-def check_sell_item(df):
-    return _check_value(df, 'SellItem', 'Y')
+def check_sell_item(df, ctx=None):
+    return _config_rule(df, 'SellItem', lambda d: _check_value(d, 'SellItem', 'Y'))
 
-def check_prchse_item(df):
-    has_imp = df['ItemName'].astype(str).str.contains('IMP', na=False)
+def check_prchse_item(df, ctx=None):
+    has_imp = get_context(df, ctx).name_has_imp
     return np.where(has_imp, df['PrchseItem'] == 'Y', True)
 
-def check_price_unit(df):
+def check_price_unit(df, ctx=None):
     """
     PriceUnit depende de UgpEntry:
     - UgpEntry=1 -> PriceUnit=8
     - UgpEntry=3 -> PriceUnit=2
     - UgpEntry=11 -> PriceUnit=13
+    (tabla `unidades_por_ugp` de rules.yaml; sin tabla configurada, cadena de np.where)
     """
-    ugp = pd.to_numeric(df['UgpEntry'], errors='coerce').fillna(0)
+    table = decision_table('unidades_por_ugp')
+    if table is None:
+        return _price_unit_where(df, ctx)
+    return table.validate(df, 'PriceUnit', get_context(df, ctx))[0]
+
+def _price_unit_where(df, ctx=None):
+    ugp = get_context(df, ctx).ugp_num
     pu = pd.to_numeric(df['PriceUnit'], errors='coerce').fillna(0)
     
     check_1 = pu == 8
@@ -518,70 +705,50 @@ def check_price_unit(df):
     
     return result
 
-def check_item_class(df):
-    rules = load_rules()
-    for rule in rules:
-        if rule['field'] == 'ItemClass':
-            return apply_rule(df, rule)
-    return _check_range(df, 'ItemClass', 2, 2)
-
-def check_mng_method(df):
-    rules = load_rules()
-    for rule in rules:
-        if rule['field'] == 'MngMethod':
-            return apply_rule(df, rule)
-    return _check_value(df, 'MngMethod', 'A')
-
-def check_i_weight1(df):
-    rules = load_rules()
-    for rule in rules:
-        if rule['field'] == 'IWeight1':
-            return apply_rule(df, rule)
-    return _check_range(df, 'IWeight1', 0, 1000)
-
-def check_invntry_uom(df):
+def check_item_class(df, ctx=None):
+    return _config_rule(df, 'ItemClass', lambda d: _check_range(d, 'ItemClass', 2, 2))
+
+def check_mng_method(df, ctx=None):
+    return _config_rule(df, 'MngMethod', lambda d: _check_value(d, 'MngMethod', 'A'))
+
+def check_i_weight1(df, ctx=None):
+    return _config_rule(df, 'IWeight1', lambda d: _check_range(d, 'IWeight1', 0, 1000))
+
+def check_invntry_uom(df, ctx=None):
     """
-    InvntryUom depende de UgpEntry:
+    InvntryUom depende de UgpEntry (tabla `unidades_por_ugp` de rules.yaml):
     - UgpEntry=1 -> 'UN'
     - UgpEntry=3 -> 'KG'
     - UgpEntry=11 -> 'PKG'
+    Otros UgpEntry se asumen válidos.
     """
-    ugp = pd.to_numeric(df['UgpEntry'], errors='coerce').fillna(0)
+    table = decision_table('unidades_por_ugp')
+    if table is not None:
+        return table.validate(df, 'InvntryUom', get_context(df, ctx))[0]
+    ugp = get_context(df, ctx).ugp_num
     uom = df['InvntryUom'].astype(str)
     
-    check_1 = uom == 'UN'
-    check_3 = uom == 'KG'
-    check_11 = uom == 'PKG'
-    
-    # Por defecto asumimos válido si no cae en estas reglas? 
-    # O inválido? Si UgpEntry es otro, ¿qué debería ser InvntryUom?
-    # Asumiremos True por defecto para no romper otros casos.
     result = pd.Series(True, index=df.index)
-    
-    result = np.where(ugp == 1, check_1, result)
-    result = np.where(ugp == 3, check_3, result)
-    result = np.where(ugp == 11, check_11, result)
+    result = np.where(ugp == 1, uom == 'UN', result)
+    result = np.where(ugp == 3, uom == 'KG', result)
+    result = np.where(ugp == 11, uom == 'PKG', result)
     
     return result
 
-def check_dflt_wh(df):
-    s = df['DfltWH'].astype(str)
-    return s.str.contains('_PROD', na=False)
+def check_dflt_wh(df, ctx=None):
+    return _config_rule(df, 'DfltWH', lambda d: d['DfltWH'].astype(str).str.contains('_PROD', na=False))
 
-def check_u_beas_gruppe(df):
-    return _check_not_null(df, 'U_beas_gruppe') & (df['U_beas_gruppe'] != '')
+def check_u_beas_gruppe(df, ctx=None):
+    return _config_rule(df, 'U_beas_gruppe', lambda d: _check_not_null(d, 'U_beas_gruppe') & (d['U_beas_gruppe'] != ''))
 
-def check_u_beas_prccode(df):
-    return _check_not_null(df, 'U_beas_prccode') & (df['U_beas_prccode'] != '')
+def check_u_beas_prccode(df, ctx=None):
+    return _config_rule(df, 'U_beas_prccode', lambda d: _check_not_null(d, 'U_beas_prccode') & (d['U_beas_prccode'] != ''))
 
-def check_u_beas_batchroh(df):
-    return _check_value(df, 'U_beas_batchroh', 'Y')
+def check_u_beas_batchroh(df, ctx=None):
+    return _config_rule(df, 'U_beas_batchroh', lambda d: _check_value(d, 'U_beas_batchroh', 'Y'))
 
-def check_u_beas_desidad(df):
-    code = df['ItemCode'].astype(str)
-    is_ptlami = code.str.contains('PTLAMI', na=False)
-    is_ptmang = code.str.contains('PTMANG', na=False)
-    target = is_ptlami | is_ptmang
+def check_u_beas_desidad(df, ctx=None):
+    target = get_context(df, ctx).is_lami_mang
     # Debe estar lleno = No Nulo. Asumir columna U_BEAS_DESIDAD existe.
     if 'U_BEAS_DESIDAD' not in df.columns:
         return pd.Series(False, index=df.index) # Fallar si falta columna
@@ -589,11 +756,8 @@ def check_u_beas_desidad(df):
     not_null = val.notna() & (val != '')
     return np.where(target, not_null, True)
 
-def check_u_plg_cicle(df):
-    code = df['ItemCode'].astype(str)
-    is_ptlami = code.str.contains('PTLAMI', na=False)
-    is_ptmang = code.str.contains('PTMANG', na=False)
-    target = is_ptlami | is_ptmang
+def check_u_plg_cicle(df, ctx=None):
+    target = get_context(df, ctx).is_lami_mang
     val = pd.to_numeric(df['U_PLG_CICLE'], errors='coerce')
     valid_null = df['U_PLG_CICLE'].isna() | (df['U_PLG_CICLE'] == '')
     valid_range = val.between(1, 160)
@@ -604,14 +768,14 @@ def check_u_plg_cicle(df):
 # Cada función recibe df y devuelve df modificado (in-place o copy)
 # ==========================================
 
-def clean_item_code(df):
+def clean_item_code(df, ctx=None):
     df['ItemCode_Obsolete'] = False
     return df
 
-def clean_item_name(df):
+def clean_item_name(df, ctx=None):
     # Validacion vectorizada de estructura nombre
     # >= 2 palabras y contiene materiales
-    s = df['ItemName'].astype(str)
+    s = get_context(df, ctx).name
     has_spaces = s.str.split().str.len() >= 2
     materials = ['PEBD', 'PEAD', 'PET', 'MIX', 'PP']
     # ¿Sensible a mayúsculas por 'PeBd' vs 'PEBD'? Código de usuario 'in' es sensible a mayúsculas
@@ -621,13 +785,13 @@ def clean_item_name(df):
     df['Needs_I_D_Review'] = ~df['ItemName_Valid']
     return df
 
-def clean_item_type(df):
+def clean_item_type(df, ctx=None):
     df['ItemType'] = df['ItemType'].replace('', 'I').fillna('I')
     return df
 
-def clean_invntry_uom(df):
+def clean_invntry_uom(df, ctx=None):
     # Vectorizacion: Si PTLAMI -> KG, else -> UN (si ItemCode no es na, sino original)
-    cond_ptlami = df['ItemCode'].astype(str).str.contains('PTLAMI', na=False)
+    cond_ptlami = get_context(df, ctx).is_ptlami
     new_val = np.where(cond_ptlami, 'KG', 'UN')
     # ¿Preservar NaN si ItemCode es NaN? Código usuario: if pd.isna(itemcode): return row['InvntryUom']
     # Pero si ItemCode es NaN, cond_ptlami es False ('UN').
@@ -637,66 +801,64 @@ def clean_invntry_uom(df):
     df['InvntryUom'] = final_val
     return df
 
-def clean_u_beas_prodrelease_fill(df):
+def clean_u_beas_prodrelease_fill(df, ctx=None):
     df['U_beas_prodrelease'] = df['U_beas_prodrelease'].replace('', 'Y').fillna('Y')
     return df
 
-def clean_u_beas_dispo_fill(df):
+def clean_u_beas_dispo_fill(df, ctx=None):
     df['U_beas_dispo'] = df['U_beas_dispo'].replace('', 'Y').fillna('Y')
     return df
 
-def clean_invnt_item_sell_item(df):
+def clean_invnt_item_sell_item(df, ctx=None):
     # InvntItem siempre debe ser 'Y'
     df['InvntItem'] = 'Y'
     
-    pt_mask = df['ItemCode'].astype(str).str.startswith('PT', na=False)
-    imp_mask = df['ItemCode'].astype(str).str.contains('IMP', na=False)
+    ctx = get_context(df, ctx)
+    pt_mask = ctx.is_pt
+    imp_mask = ctx.code_has_imp
     
     df.loc[pt_mask, 'SellItem'] = 'Y'
     df.loc[pt_mask & imp_mask, 'PrchseItem'] = 'Y'
     return df
 
-def clean_price_unit(df):
+def clean_price_unit(df, ctx=None):
     """
-    Asigna PriceUnit basado en UgpEntry:
+    Asigna PriceUnit basado en UgpEntry (tabla `unidades_por_ugp` de rules.yaml):
     - 1 -> 8
     - 3 -> 2
     - 11 -> 13
+    Otros UgpEntry conservan el valor previo.
     """
-    ugp = pd.to_numeric(df['UgpEntry'], errors='coerce').fillna(0)
-    
-    # Inicializar con 0 o mantener previo si no aplica? User implies strict mapping.
-    # Pero si UgpEntry no es 1,3,11? Asignar 0 o dejar como estaba?
-    # Asumiremos que UgpEntry ya fue limpiado y tiene 1,3,11 principalmente.
-    # Pero si hay otros valores, PriceUnit debería ser consistente?
-    # El usuario solo especificó reglas para 1, 3, 11.
-    
+    ctx = get_context(df, ctx)
+    table = decision_table('unidades_por_ugp')
+    if table is not None:
+        df['PriceUnit'] = table.fill(df, 'PriceUnit', ctx)
+        return df
+    ugp = ctx.ugp_num
     vals = df['PriceUnit'].copy()
-    
     vals[ugp == 1] = 8
     vals[ugp == 3] = 2
     vals[ugp == 11] = 13
-    
     df['PriceUnit'] = vals
     return df
 
-def clean_lot_number(df):
+def clean_lot_number(df, ctx=None):
     df['LotNumber'] = 'Lotes'
     return df
 
-def clean_manage_by(df):
+def clean_manage_by(df, ctx=None):
     df['ManageBy'] = 'EN TODAS LAS TRANSACCIONES'
     return df
 
-def clean_iweight1(df):
-    pt_mask = df['ItemCode'].astype(str).str.startswith('PT', na=False)
+def clean_iweight1(df, ctx=None):
+    pt_mask = get_context(df, ctx).is_pt
     df.loc[pt_mask, 'IWeight1'] = 500.0
     return df
 
-def clean_dflt_wh(df):
+def clean_dflt_wh(df, ctx=None):
     # Vectorización: Si ItemCode contiene '_PROD', preservar el valor actual de DfltWH
     # De lo contrario, asignar 'UIO_PROD' por defecto
-    code_upper = df['ItemCode'].astype(str).str.upper()
+    code_upper = get_context(df, ctx).code.str.upper()
     
     # Crear copia de valores actuales
     vals = df['DfltWH'].copy()
@@ -725,27 +887,27 @@ def clean_dflt_wh(df):
     df['DfltWH'] = vals
     return df
 
-def clean_planning_sys(df):
+def clean_planning_sys(df, ctx=None):
     df['PlaningSys'] = 'M'
     return df
 
-def clean_prchse_item_pt(df):
-    pt_mask = df['ItemCode'].astype(str).str.startswith('PT', na=False)
+def clean_prchse_item_pt(df, ctx=None):
+    pt_mask = get_context(df, ctx).is_pt
     df.loc[pt_mask, 'PrchseItem'] = 'EFECTUAR'
     return df
 
-def clean_lead_time_pt(df):
-    pt_mask = df['ItemCode'].astype(str).str.startswith('PT', na=False)
+def clean_lead_time_pt(df, ctx=None):
+    pt_mask = get_context(df, ctx).is_pt
     df.loc[pt_mask, 'LeadTime'] = 20
     return df
 
-def clean_toleran_day(df):
+def clean_toleran_day(df, ctx=None):
     df['ToleranDay'] = pd.to_numeric(df['ToleranDay'], errors='coerce').fillna(0).clip(0, 24)
     return df
 
-def clean_u_beas_gruppe_material(df):
+def clean_u_beas_gruppe_material(df, ctx=None):
     # Extraer material del Nombre
-    s = df['ItemName'].astype(str)
+    s = get_context(df, ctx).name
     materials = ['PEBD', 'PEAD', 'PET', 'MIX', 'PP']
     # Extracción vectorizada es complicada con prioridad, pero bucle es aceptable o regex
     pattern = '|'.join(materials)
@@ -754,24 +916,24 @@ def clean_u_beas_gruppe_material(df):
     df['U_beas_gruppe'] = extracted
     return df
 
-def clean_u_beas_prodrelease_check(df):
-    pt_mask = df['ItemCode'].astype(str).str.startswith('PT', na=False)
+def clean_u_beas_prodrelease_check(df, ctx=None):
+    pt_mask = get_context(df, ctx).is_pt
     df.loc[pt_mask, 'U_beas_prodrelease'] = 'Y'
     df.loc[~pt_mask, 'U_beas_prodrelease'] = np.nan
     return df
 
-def clean_u_beas_batchroh(df):
+def clean_u_beas_batchroh(df, ctx=None):
     df['U_beas_batchroh'] = 'DETERMINACION DE LOTE'
     return df
 
-def clean_pictur_name(df):
+def clean_pictur_name(df, ctx=None):
     s = df['PicturName'].astype(str)
     valid_ext = s.str.lower().str.endswith(('.jpg', '.png', '.pdf'))
     df['PicturName_Valid'] = valid_ext
     df['Needs_Design_Graphics_Review'] = ~valid_ext
     return df
 
-def clean_u_beas_dispo_letter(df):
+def clean_u_beas_dispo_letter(df, ctx=None):
     # Si PROD TERM -> A, SEMI -> B, sino -> A
     # Código de usuario maneja grupo nulo con cadena vacía
     grp = df.get('GrupoArticulo', pd.Series(['']*len(df))).fillna('') # Manejar si falta col
@@ -784,44 +946,35 @@ def clean_u_beas_dispo_letter(df):
     df['U_beas_dispo'] = np.where(cond_semi, 'B', 'A')
     return df
 
-def clean_u_empa_espesor(df):
-    pt_mask = df['ItemCode'].astype(str).str.startswith('PT', na=False)
-    code = df['ItemCode'].astype(str)
-    is_ptlami = code.str.contains('PTLAMI', na=False)
-    is_ptmang = code.str.contains('PTMANG', na=False)
-    lam_mang = is_ptlami | is_ptmang
+def clean_u_empa_espesor(df, ctx=None):
+    ctx = get_context(df, ctx)
+    pt_mask = ctx.is_pt
+    lam_mang = ctx.is_lami_mang
     mask = pt_mask & lam_mang
     df.loc[mask, 'U_EMPA_ESPESOR'] = df.loc[mask, 'U_EMPA_ESPESOR'].fillna(50)
     return df
 
-def clean_u_empa_desidad(df):
-    pt_mask = df['ItemCode'].astype(str).str.startswith('PT', na=False)
-    code = df['ItemCode'].astype(str)
-    is_ptlami = code.str.contains('PTLAMI', na=False)
-    is_ptmang = code.str.contains('PTMANG', na=False)
-    lam_mang = is_ptlami | is_ptmang
+def clean_u_empa_desidad(df, ctx=None):
+    ctx = get_context(df, ctx)
+    pt_mask = ctx.is_pt
+    lam_mang = ctx.is_lami_mang
     mask = pt_mask & lam_mang
     df.loc[mask, 'U_EMPA_DESIDAD'] = df.loc[mask, 'U_EMPA_DESIDAD'].fillna(0.92)
     df.loc[~mask, 'U_EMPA_DESIDAD'] = np.nan
     return df
 
-def clean_u_empa_ancho(df):
-    pt_mask = df['ItemCode'].astype(str).str.startswith('PT', na=False)
-    code = df['ItemCode'].astype(str)
-    is_ptlami = code.str.contains('PTLAMI', na=False)
-    is_ptmang = code.str.contains('PTMANG', na=False)
-    lam_mang = is_ptlami | is_ptmang
+def clean_u_empa_ancho(df, ctx=None):
+    ctx = get_context(df, ctx)
+    pt_mask = ctx.is_pt
+    lam_mang = ctx.is_lami_mang
     mask = pt_mask & lam_mang
     df.loc[mask, 'U_EMPA_ANCHO'] = df.loc[mask, 'U_EMPA_ANCHO'].fillna(10.0)
     return df
 
-def clean_u_plg_cicle(df):
-    pt_mask = df['ItemCode'].astype(str).str.startswith('PT', na=False)
-    code = df['ItemCode'].astype(str)
-    is_ptlami = code.str.contains('PTLAMI', na=False)
-    is_ptmang = code.str.contains('PTMANG', na=False)
-    is_ptfun = code.str.contains('PTFUN', na=False)
-    target = is_ptlami | is_ptmang | is_ptfun
+def clean_u_plg_cicle(df, ctx=None):
+    ctx = get_context(df, ctx)
+    pt_mask = ctx.is_pt
+    target = ctx.is_lami_mang | ctx.is_ptfun
     
     # 1. PT y Objetivo -> NaN
     df.loc[pt_mask & target, 'U_PLG_CICLE'] = np.nan
@@ -831,20 +984,22 @@ def clean_u_plg_cicle(df):
     df.loc[mask2, 'U_PLG_CICLE'] = df.loc[mask2, 'U_PLG_CICLE'].fillna(30.0)
     return df
 
-def clean_u_beas_gruppe_client_type(df):
+def clean_u_beas_gruppe_client_type(df, ctx=None):
     # clientes_especificos = ['DANEC', 'TERRAFERTIL'] -> ESPECIFICO, sino GENERIC
-    s = df['ItemName'].astype(str)
+    s = get_context(df, ctx).name
     clients_pattern = 'DANEC|TERRAFERTIL'
     is_specific = s.str.contains(clients_pattern, regex=True)
     df['U_beas_gruppe'] = np.where(is_specific, 'ESPECIFICO', 'GENERIC')
     return df
 
-def clean_item_code_format(df):
+def clean_item_code_format(df, ctx=None):
     """Corrige formato de ItemCode: convierte a mayúsculas"""
     df['ItemCode'] = df['ItemCode'].astype(str).str.upper()
+    if ctx is not None:
+        ctx.invalidate('ItemCode')
     return df
 
-def clean_item_name_format(df):
+def clean_item_name_format(df, ctx=None):
     """Corrige formato de ItemName: mayúsculas y sin tildes"""
     s = df['ItemName'].astype(str)
     # Convertir a mayúsculas
@@ -855,26 +1010,28 @@ def clean_item_name_format(df):
     for old, new in replacements.items():
         s = s.str.replace(old, new, regex=False)
     df['ItemName'] = s
+    if ctx is not None:
+        ctx.invalidate('ItemName')
     return df
 
-def clean_mng_method(df):
+def clean_mng_method(df, ctx=None):
     """Asigna MngMethod = 'A' por defecto"""
     df['MngMethod'] = df['MngMethod'].fillna('A')
     df.loc[df['MngMethod'] == '', 'MngMethod'] = 'A'
     return df
 
-def clean_item_class(df):
+def clean_item_class(df, ctx=None):
     """Asigna ItemClass = 2"""
     df['ItemClass'] = 2
     return df
 
-def clean_wt_liable(df):
+def clean_wt_liable(df, ctx=None):
     """Asigna WTLiable por defecto si está vacío"""
     df['WTLiable'] = df['WTLiable'].fillna('Y')
     df.loc[df['WTLiable'] == '', 'WTLiable'] = 'Y'
     return df
 
-def clean_indirct_tax(df):
+def clean_indirct_tax(df, ctx=None):
     """
     Asigna sugerencia para IndirctTax.
     Usuario solicita explícitamente: 'Asignar valor a TaxCodeAR'
@@ -896,60 +1053,53 @@ def clean_indirct_tax(df):
     
     return df
 
-def clean_tax_code_ar(df):
+def clean_tax_code_ar(df, ctx=None):
     """Asigna TaxCodeAR por defecto si está vacío"""
     df['TaxCodeAR'] = df['TaxCodeAR'].fillna('IVAV15')
     df.loc[df['TaxCodeAR'] == '', 'TaxCodeAR'] = 'IVAV15'
     return df
 
-def clean_gl_method(df):
+def clean_gl_method(df, ctx=None):
     """Asigna GLMethod = 'C' (Por Grupo de Artículos)"""
     df['GLMethod'] = 'C'
     return df
 
-def clean_eval_system(df):
+def clean_eval_system(df, ctx=None):
     """Asigna EvalSystem por defecto"""
     df['EvalSystem'] = df['EvalSystem'].fillna('A')
     df.loc[df['EvalSystem'] == '', 'EvalSystem'] = 'A'
     return df
 
-def clean_pricing_prc(df):
+def clean_pricing_prc(df, ctx=None):
     """Asigna PricingPrc = 0"""
     df['PricingPrc'] = 0
     return df
 
-def clean_ugp_entry(df):
+def clean_ugp_entry(df, ctx=None):
     """
-    Asigna UgpEntry según reglas:
+    Asigna UgpEntry según la tabla `ugp_por_nombre` de rules.yaml (la primera fila que aplica gana):
     - Si ItemCode es PTFUND0212 o PTFUND0216 -> 11
     - Si ItemName contiene LAMINA o MANGA -> 3
     - Si ItemName contiene ENVASE, TAPA, BALDE, PREFORMA o FUNDA -> 1
     - Por defecto -> 1
     """
-    name = df['ItemName'].astype(str)
-    code = df['ItemCode'].astype(str)
-    
-    # Inicializar con valor por defecto
-    df['UgpEntry'] = 1
-    
-    # Aplicar reglas en orden de prioridad (de menos a más específico)
-    # 1. Si contiene ENVASE, TAPA, BALDE, PREFORMA, FUNDA -> 1
-    mask_envase = name.str.contains('ENVASE|TAPA|BALDE|PREFORMA|FUNDA', regex=True, na=False)
-    df.loc[mask_envase, 'UgpEntry'] = 1
-    
-    # 2. Si contiene LAMINA o MANGA -> 3 (sobrescribe anterior si aplica)
-    mask_lamina_manga = name.str.contains('LAMINA|MANGA', regex=True, na=False)
-    df.loc[mask_lamina_manga, 'UgpEntry'] = 3
-    
-    # 3. Casos especiales PTFUND0212 o PTFUND0216 -> 11 (máxima prioridad)
-    mask_special = code.isin(['PTFUND0212', 'PTFUND0216'])
-    df.loc[mask_special, 'UgpEntry'] = 11
+    ctx = get_context(df, ctx)
+    table = decision_table('ugp_por_nombre')
+    if table is not None:
+        df['UgpEntry'] = table.fill(df, 'UgpEntry', ctx)
+    else:
+        # Reglas en orden de prioridad (de menos a más específico)
+        df['UgpEntry'] = 1
+        df.loc[ctx.name_has_envase_no_manga, 'UgpEntry'] = 1
+        df.loc[ctx.name_has_lamina_manga, 'UgpEntry'] = 3
+        df.loc[ctx.is_special_fund, 'UgpEntry'] = 11
+    ctx.invalidate('UgpEntry')
     
     return df
 
-def clean_itms_grp_cod(df):
+def clean_itms_grp_cod(df, ctx=None):
     """Asigna ItmsGrpCod por defecto basado en ItemCode"""
-    code = df['ItemCode'].astype(str)
+    code = get_context(df, ctx).code
     # Por defecto 102 (Producto Terminado)
     df.loc[df['ItmsGrpCod'].isna(), 'ItmsGrpCod'] = 102
     # Si contiene PTPR -> 103 (Preforma)
@@ -958,23 +1108,23 @@ def clean_itms_grp_cod(df):
     df.loc[code.str.contains('IMP', na=False), 'ItmsGrpCod'] = 114
     return df
 
-def clean_frgn_name(df):
+def clean_frgn_name(df, ctx=None):
     """Asigna FrgnName diferente a ItemName si son iguales"""
     mask_equal = df['FrgnName'] == df['ItemName']
     df.loc[mask_equal, 'FrgnName'] = df.loc[mask_equal, 'ItemName'] + ' (ENG)'
     return df
 
-def clean_u_empa_caracteristica_tipo(df):
+def clean_u_empa_caracteristica_tipo(df, ctx=None):
     """Asigna tipo ESPECIFICO o GENERICO basado en cliente"""
-    s = df['ItemName'].astype(str)
+    s = get_context(df, ctx).name
     clients_pattern = 'DANEC|TERRAFERTIL'
     is_specific = s.str.contains(clients_pattern, regex=True, na=False)
     df['U_EMPA_CARACTERISTICA_TIPO'] = np.where(is_specific, 'ESPECIFICO', 'GENERICO')
     return df
 
-def clean_u_empa_caracteristica_mp(df):
+def clean_u_empa_caracteristica_mp(df, ctx=None):
     """Asigna material predominante basado en ItemName"""
-    s = df['ItemName'].astype(str)
+    s = get_context(df, ctx).name
     materials = ['PEBD', 'PEAD', 'PET', 'MIX', 'PP', 'PC', 'POLIOLEFINA', 'BOPP', 'CAST']
     pattern = '|'.join(materials)
     extracted = s.str.extract(f'({pattern})', expand=False).fillna('MIX')
@@ -1056,6 +1206,19 @@ QUALITY_RULES = {
     "U_PLG_CICLE": check_u_plg_cicle,
 }
 
+# Familias de ItemCode a las que apunta cada regla (ver evaluate_rule): la regla se evalúa
+# solo sobre las filas de su familia y el resto recibe la validez por defecto (sin motivos).
+LAMI_MANG_FAMILY = RuleFamily(prefixes=('PTLAMI', 'PTMANG'), default=True)
+
+RULE_FAMILIES = {
+    'profiling': {},
+    'quality': {
+        "U_EMPA_ESPESOR": LAMI_MANG_FAMILY,
+        "U_EMPA_ANCHO": LAMI_MANG_FAMILY,
+        "U_BEAS_DESIDAD": LAMI_MANG_FAMILY,
+    },
+}
+
 PROFILING_DEPENDENCY_MAP = {
     "ItemType": "ItemType",
     "UgpEntry": "UgpEntry",
@@ -1169,3 +1332,51 @@ RULE_DESCRIPTIONS = {
     "ItemCode": "Estructura PT especí­fica por grupo (102, 103, 114).",
     "ItemName": "Estructura [Producto] [Material] [Specs] y prefijos válidos."
 }
+
+# Catálogo de motivos por regla: el mensaje i corresponde al bit (1 << i).
+# Marcadores: {valor} valor actual, {numero} valor como decimal, {entero} valor como entero,
+# {longitud} largo del texto del valor, {ItemCode} código del artículo.
+_MSG_NULL = "❌ Valor nulo o vacío"
+_MSG_NOT_NUMERIC = "❌ No es un valor numérico válido"
+_MSG_EMPTY_EMPA = "❌ Campo vacío o valor inválido"
+
+REASON_CATALOG = {
+    "ItemCode": [
+        "❌ No empieza con 'PT'",
+        "❌ Longitud insuficiente ({longitud} caracteres, requiere >10)",
+        "❌ No está en mayúsculas",
+        "❌ Contiene caracteres no alfanuméricos",
+    ],
+    "ItemName": ["❌ No está en mayúsculas", "❌ Contiene tildes"],
+    "LeadTime": [_MSG_NULL, "❌ Fuera de rango (1-20): {numero}", _MSG_NOT_NUMERIC],
+    "ToleranDay": [_MSG_NULL, "❌ Fuera de rango (0-24): {numero}", _MSG_NOT_NUMERIC],
+    "IWeight1": [_MSG_NULL, "❌ Fuera de rango (0-1000 inclusive): {numero}", _MSG_NOT_NUMERIC],
+    "PriceUnit": [
+        "❌ Error validando PriceUnit",
+        _MSG_NULL,
+        "❌ Para UgpEntry=1 debe ser 8, actual: {numero}",
+        "❌ Para UgpEntry=3 debe ser 2, actual: {numero}",
+        "❌ Para UgpEntry=11 debe ser 13, actual: {numero}",
+    ],
+    "DfltWH": ["❌ No contiene '_PROD'"],
+    "UgpEntry": [
+        _MSG_NOT_NUMERIC,
+        "❌ Debe ser 11 para {ItemCode}, actual: {entero}",
+        "❌ Debe ser 3 para LAMINA/MANGA, actual: {entero}",
+        "❌ Debe ser 1 para ENVASE/TAPA/BALDE/PREFORMA/FUNDA, actual: {entero}",
+    ],
+    "InvntItem": ["❌ Valor incorrecto: '{valor}' (debe ser 'Y')"],
+    "SellItem": ["❌ Valor incorrecto: '{valor}' (debe ser 'Y')"],
+    "PrchseItem": ["❌ Valor incorrecto: '{valor}' (debe ser 'Y')"],
+    "ItemClass": ["❌ Valor incorrecto: {valor} (debe ser 2)"],
+    "PlaningSys": ["❌ Valor incorrecto: '{valor}' (debe ser 'M')"],
+    "MngMethod": ["❌ Valor incorrecto: '{valor}' (debe ser 'A')"],
+    "U_EMPA_ESPESOR": [_MSG_EMPTY_EMPA, "❌ Fuera de rango (25-125): {numero}", _MSG_NOT_NUMERIC],
+    "U_EMPA_DESIDAD": [_MSG_EMPTY_EMPA, _MSG_NOT_NUMERIC],
+    "U_EMPA_ANCHO": [
+        _MSG_EMPTY_EMPA,
+        "❌ Fuera de rango PTLAMI (8.4-120): {numero}",
+        "❌ Fuera de rango PTMANG (5-58): {numero}",
+        _MSG_NOT_NUMERIC,
+    ],
+}
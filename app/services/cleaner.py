@@ -1,7 +1,9 @@
 import pandas as pd
-import os
 from app.config.settings import DATA_CLEANING_OUTPUT
 from app.services.business_rules import CLEANING_RULES
+from app.services.batch_context import BatchContext
+from app.services.schema import decode_categoricals
+from app.infrastructure.output_writer import get_output_writer
 
 def run_cleaning(df_raw: pd.DataFrame):
     """
@@ -11,19 +13,20 @@ def run_cleaning(df_raw: pd.DataFrame):
     print(f"\n--- Iniciando Proceso de Limpieza (DataCleaner) ---")
     
     # Trabajar sobre una copia para no mutar el original en memoria si se usa luego
-    df_clean = df_raw.copy()
+    # (las categóricas vuelven a texto: las reglas de limpieza escriben valores nuevos)
+    df_clean = decode_categoricals(df_raw.copy())
+    # Contexto propio: las reglas de limpieza mutan la copia y lo invalidan
+    ctx = BatchContext(df_clean)
     
     # Aplicar transformaciones
     for step_func in CLEANING_RULES:
         try:
             # Cada funcion recibe df y retorna df transformado
-            df_clean = step_func(df_clean)
+            df_clean = step_func(df_clean, ctx)
         except Exception as e:
             print(f"[Error Limpieza] Falló en {step_func.__name__}: {e}")
             
     # Guardar resultado
-    output_path = os.path.join(DATA_CLEANING_OUTPUT, 'cleaned_data.csv')
-    df_clean.to_csv(output_path, index=False)
-    print(f"[Generado] {output_path}")
+    get_output_writer().write(DATA_CLEANING_OUTPUT, 'cleaned_data', df_clean)
     
     return df_clean
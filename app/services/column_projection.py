@@ -0,0 +1,84 @@
+import ast
+import inspect
+import textwrap
+from collections import namedtuple
+
+from app.services.business_rules import PROFILING_RULES, QUALITY_RULES, CLEANING_RULES
+from app.services.batch_context import CONTEXT_COLUMNS
+from app.services.rule_engine import rule_set
+
+# Columnas que el reporte de incidencias necesita siempre
+REPORT_KEY_COLUMNS = ['ItemCode', 'ItemName']
+
+
+# Traza estática de una regla: literales de texto, fuentes y atributos/nombres usados
+RuleTrace = namedtuple('RuleTrace', ['names', 'sources', 'attributes'])
+
+
+def trace_rule(func):
+    """
+    Recorre (estáticamente) el código de una regla y de las funciones auxiliares
+    del mismo módulo que invoca. Retorna un RuleTrace con:
+    - names: literales de texto (y de constantes de módulo listas/tuplas de texto),
+    - sources: código fuente de cada función visitada, en orden de visita,
+    - attributes: nombres de atributos y funciones referenciados (p. ej. 'duplicated').
+    """
+    trace = RuleTrace(set(), [], set())
+    _walk(func, trace, set())
+    return trace
+
+
+def _walk(func, trace, seen):
+    if func in seen:
+        return
+    seen.add(func)
+
+    try:
+        source = textwrap.dedent(inspect.getsource(func))
+        tree = ast.parse(source)
+    except (OSError, TypeError, SyntaxError):
+        return
+    trace.sources.append(source)
+
+    namespace = getattr(func, '__globals__', {})
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            trace.names.add(node.value)
+        elif isinstance(node, ast.Attribute):
+            trace.attributes.add(node.attr)
+        elif isinstance(node, ast.Name) and node.id in namespace:
+            trace.attributes.add(node.id)
+            obj = namespace[node.id]
+            if inspect.isfunction(obj) and obj.__module__ == func.__module__:
+                _walk(obj, trace, seen)
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                trace.names.update(v for v in obj if isinstance(v, str))
+
+
+def traced_columns(func):
+    """
+    Nombres de columna que una regla puede leer: los literales de texto de su código,
+    de las funciones auxiliares del mismo módulo que invoca y de las constantes de
+    módulo (listas/tuplas de texto) que usa.
+    El resultado es un superconjunto: se intersecta luego con las columnas reales de la vista.
+    """
+    return trace_rule(func).names
+
+
+def required_columns(extra=None):
+    """
+    Columnas que el pipeline necesita leer de la vista: las que leen las reglas de
+    PROFILING_RULES, QUALITY_RULES y CLEANING_RULES (más sus nombres de regla), los
+    campos y columnas de las reglas de rules.yaml, los derivados compartidos del BatchContext y las del reporte.
+    """
+    columns = set(REPORT_KEY_COLUMNS) | set(CONTEXT_COLUMNS)
+    for registry in (PROFILING_RULES, QUALITY_RULES):
+        for rule_name, rule_func in registry.items():
+            columns.add(rule_name)
+            columns |= traced_columns(rule_func)
+    for step_func in CLEANING_RULES:
+        columns |= traced_columns(step_func)
+    rules = rule_set()
+    columns |= set(rules.fields) | rules.columns()
+    columns |= set(extra or [])
+    return columns
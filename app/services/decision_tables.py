@@ -0,0 +1,241 @@
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    PYARROW_INSTALLED = True
+except ImportError:
+    PYARROW_INSTALLED = False
+
+import numpy as np
+import pandas as pd
+
+# Tipos de columna de una tabla de decisión
+#   number:   comparación numérica (to_numeric; no numérico nunca coincide)
+#   text:     comparación como texto (astype(str))
+#   contains: la entrada contiene el patrón (regex, como str.contains); solo en entradas
+INPUT_KINDS = ('number', 'text', 'contains')
+OUTPUT_KINDS = ('number', 'text')
+
+_NO_MATCH = np.iinfo(np.int64).max
+
+
+def _number_keys(col):
+    return pd.to_numeric(col, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _text_lookup(col, index):
+    """Posición de cada valor (como texto) en `index` (-1 si no está); categóricas por categoría."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        positions = np.append(index.get_indexer(col.cat.categories.astype(str)), -1)
+        return positions[col.cat.codes.to_numpy()]  # código -1 (nulo) -> -1
+    if PYARROW_INSTALLED and isinstance(col.dtype, pd.StringDtype) and col.dtype.storage == 'pyarrow':
+        # Texto Arrow: búsqueda en el conjunto de la tabla sin pasar por objetos Python
+        positions = pc.index_in(pa.array(col.array), value_set=pa.array(list(index), type=pa.string()))
+        return positions.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int64)
+    return np.where(col.notna().to_numpy(), index.get_indexer(col.astype(str)), -1)
+
+
+def _contains(df, col, pattern, ctx=None):
+    """Máscara `col` contiene `pattern` (con contexto, compartida con las reglas vía BatchContext)."""
+    if ctx is not None:
+        return ctx.contains(col, pattern).to_numpy(dtype=bool)
+    return df[col].astype(str).str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool)
+
+
+def _values(cell):
+    """Valores de una celda: lista -> cualquiera de ellos; None/NaN -> comodín (None)."""
+    if isinstance(cell, (list, tuple, set)):
+        return list(cell)
+    if cell is None or (isinstance(cell, float) and np.isnan(cell)):
+        return None
+    return [cell]
+
+
+class DecisionTable:
+    """
+    Tabla de decisión (rules.yaml `tables:` u hoja del Excel): filas de condiciones sobre columnas
+    de entrada -> valores esperados de columnas de salida. Gana la primera fila que coincide.
+    - Una celda de entrada vacía es comodín; una lista coincide con cualquiera de sus valores.
+    - `lookup` resuelve la fila de cada artículo: las filas de igualdad (number/text) se agrupan
+      por columnas especificadas y cada grupo es un solo cruce por hash (un índice, sin importar
+      cuántas filas tenga la tabla); las filas con `contains` cuestan una pasada de regex cada una.
+    - `validate` (validación) y `fill` (limpieza) usan la misma búsqueda.
+    - `default` (por salida) es el valor que asigna `fill` a los artículos sin fila.
+    - `motivo`: plantilla de mensaje por salida (REASON_CATALOG), con `{esperado}` y `{condicion}`
+      de la fila; cada fila puede traer su propio `motivo`.
+    """
+
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.inputs = dict(spec['inputs'])
+        self.outputs = dict(spec['outputs'])
+        for col, kind in self.inputs.items():
+            if kind not in INPUT_KINDS:
+                raise ValueError(f"Tabla {self.name}: tipo de entrada desconocido {kind} ({col})")
+        for col, kind in self.outputs.items():
+            if kind not in OUTPUT_KINDS:
+                raise ValueError(f"Tabla {self.name}: tipo de salida desconocido {kind} ({col})")
+        self.rows = [dict(row) for row in spec.get('rows', [])]
+        self.default = dict(spec.get('default') or {})
+        self.motivo = dict(spec.get('motivo') or {})
+        self.columns = set(self.inputs) | set(self.outputs)
+        self._compile()
+
+    def _compile(self):
+        # Grupos de filas de igualdad por columnas especificadas -> índice hash (primera fila gana)
+        groups = {}
+        self._scans = []  # filas con `contains`: (fila, {col: valores}, {col: patrón})
+        for i, row in enumerate(self.rows):
+            equal = {c: _values(row.get(c)) for c, k in self.inputs.items() if k != 'contains'}
+            equal = {c: v for c, v in equal.items() if v is not None}
+            patterns = {c: row[c] for c, k in self.inputs.items() if k == 'contains' and _values(row.get(c))}
+            if patterns:
+                self._scans.append((i, equal, patterns))
+                continue
+            cols = tuple(sorted(equal))
+            keys = pd.MultiIndex.from_product([self._normalize(c, equal[c]) for c in cols]) if cols else None
+            groups.setdefault(cols, []).append((i, keys))
+        self._groups = []
+        for cols, entries in groups.items():
+            if not cols:  # Fila sin condiciones: coincide con todo
+                self._groups.append((cols, None, np.array([entries[0][0]])))
+                continue
+            keys = entries[0][1].append([k for _, k in entries[1:]]) if len(entries) > 1 else entries[0][1]
+            row_ids = np.concatenate([np.full(len(k), i) for i, k in entries])
+            first = ~keys.duplicated()
+            keys, row_ids = keys[first], row_ids[first]
+            index = keys.get_level_values(0) if len(cols) == 1 else keys
+            # Centinela al final: posición -1 (sin coincidencia) -> _NO_MATCH
+            self._groups.append((cols, pd.Index(index), np.append(row_ids, _NO_MATCH)))
+        # Salidas esperadas por fila (+ centinela al final para "sin fila"): float con NaN para
+        # números, objeto con None para texto; `_defined` marca dónde la fila define la salida
+        self._expected, self._defined, self._integral, self._text_codes = {}, {}, {}, {}
+        for col, kind in self.outputs.items():
+            cells = [row.get(col) for row in self.rows] + [None]
+            defined = np.array([v is not None for v in cells], dtype=bool)
+            if kind == 'number':
+                expected = np.array([float(v) if v is not None else np.nan for v in cells], dtype=np.float64)
+                known = list(expected[defined]) + ([float(self.default[col])] if col in self.default else [])
+                self._integral[col] = all(v.is_integer() for v in known)
+            else:
+                expected = np.array([_fmt(v) if v is not None else None for v in cells], dtype=object)
+                self._integral[col] = False
+                # Textos esperados como códigos de un índice: la validación compara enteros
+                texts = pd.Index(pd.unique(expected[defined]).astype(str), dtype=object)
+                codes = np.full(len(cells), -1, dtype=np.int64)
+                codes[defined] = texts.get_indexer(expected[defined].astype(str))
+                self._text_codes[col] = (texts, codes)
+            self._expected[col], self._defined[col] = expected, defined
+        # Mensajes por fila, armados una sola vez al compilar (los consume el reporte)
+        self._templates = {col: self._reason_templates(col) for col in self.outputs}
+
+    def _normalize(self, col, values, output=False):
+        kind = (self.outputs if output else self.inputs)[col]
+        if kind == 'number':
+            return [float(v) for v in values]
+        return [_fmt(v) for v in values]
+
+    # --- Búsqueda ---
+    def lookup(self, df, ctx=None):
+        """Fila de la tabla que aplica a cada artículo (-1 si ninguna)."""
+        if ctx is not None:
+            key = ('tabla', self.name, id(self))
+            return ctx._get(key, tuple(self.inputs), lambda: self._lookup(df, ctx))
+        return self._lookup(df)
+
+    def _lookup(self, df, ctx=None):
+        n = len(df)
+        best = np.full(n, _NO_MATCH, dtype=np.int64)
+        if not set(self.inputs) <= set(df.columns):
+            return np.full(n, -1, dtype=np.int64)
+        for cols, index, row_ids in self._groups:
+            if index is None:
+                best = np.minimum(best, row_ids[0])
+                continue
+            if len(cols) == 1:
+                col = cols[0]
+                if self.inputs[col] == 'number':
+                    pos = index.get_indexer(_number_keys(df[col]))
+                else:
+                    pos = _text_lookup(df[col], index)
+            else:
+                arrays = [_number_keys(df[c]) if self.inputs[c] == 'number' else df[c].astype(str).where(df[c].notna())
+                          for c in cols]
+                pos = index.get_indexer(pd.MultiIndex.from_arrays(arrays))
+            best = np.minimum(best, row_ids[pos])
+        for i, equal, patterns in self._scans:
+            mask = np.ones(n, dtype=bool)
+            for col, values in equal.items():
+                if self.inputs[col] == 'number':
+                    mask &= np.isin(_number_keys(df[col]), self._normalize(col, values))
+                else:
+                    mask &= _text_lookup(df[col], pd.Index(self._normalize(col, values))) >= 0
+            for col, pattern in patterns.items():
+                mask &= _contains(df, col, pattern, ctx)
+            best = np.minimum(best, np.where(mask, i, _NO_MATCH))
+        return np.where(best == _NO_MATCH, -1, best)
+
+    def expected(self, rows, output):
+        """(esperado, aplica) por artículo: valor esperado de `output` y si la fila lo define."""
+        return self._expected[output][rows], self._defined[output][rows]  # -1 -> centinela al final
+
+    # --- Validación y limpieza ---
+    def validate(self, df, output, ctx=None):
+        """
+        (válido, fila): válido donde no hay expectativa o el valor actual es el esperado;
+        `fila` es la fila de la tabla que aplicó (-1 si ninguna).
+        """
+        rows = self.lookup(df, ctx)
+        expected, applies = self.expected(rows, output)
+        if not applies.any():
+            return pd.Series(True, index=df.index), rows
+        if self.outputs[output] == 'number':
+            valid = ~applies | (_number_keys(df[output]) == expected)
+        else:
+            texts, codes = self._text_codes[output]
+            valid = ~applies | (_text_lookup(df[output], texts) == codes[rows])
+        return pd.Series(valid, index=df.index), rows
+
+    def fill(self, df, output, ctx=None):
+        """Columna `output` corregida: valor esperado donde aplica una fila; si no, `default` o el actual."""
+        rows = self.lookup(df, ctx)
+        expected, applies = self.expected(rows, output)
+        if self._integral[output]:
+            expected = np.where(applies, expected, 0).astype(np.int64)
+        if output in self.default:
+            return pd.Series(np.where(applies, expected, self.default[output]), index=df.index)
+        values = df[output].copy()
+        if applies.any():
+            values[applies] = expected[applies]
+        return values
+
+    # --- Mensajes ---
+    def condition_text(self, i):
+        """Descripción de las condiciones de la fila i, p. ej. 'UgpEntry=1' o 'LAMINA/MANGA'."""
+        parts = []
+        for col, kind in self.inputs.items():
+            values = _values(self.rows[i].get(col))
+            if values is None:
+                continue
+            text = '/'.join(_fmt(v) for v in values)
+            parts.append(text.replace('|', '/') if kind == 'contains' else f"{col}={text}")
+        return ', '.join(parts)
+
+    def reason_templates(self, output):
+        """Plantilla de mensaje por fila (el motivo de la fila i es el i-ésimo de la lista)."""
+        return self._templates[output]
+
+    def _reason_templates(self, output):
+        default = self.motivo.get(output, "❌ Para {condicion} debe ser {esperado}, actual: {valor}")
+        templates = []
+        for i, row in enumerate(self.rows):
+            template = row.get('motivo', default)
+            expected = row.get(output)
+            templates.append(template.replace('{esperado}', _fmt(expected) if expected is not None else '')
+                                     .replace('{condicion}', self.condition_text(i)))
+        return templates
+
+
+def _fmt(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import sqlite3
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from app.services.report_builder import REPORT_COLUMNS
+from app.services.uniqueness_index import ENTRY_COLUMNS
+from app.services.rule_engine import refresh_rules
+
+# Código de las reglas: si cambia, el estado guardado deja de ser válido
+_RULE_SOURCES = [
+    os.path.join(os.path.dirname(__file__), 'business_rules.py'),
+]
+
+
+def rules_fingerprint():
+    """
+    Huella (sha256) de las reglas vigentes: código de business_rules y huella del rule set
+    (rules.yaml más las filas de las tablas de decisión cargadas desde el Excel, `sheet:`).
+    """
+    digest = hashlib.sha256()
+    for path in _RULE_SOURCES:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    digest.update(refresh_rules().digest.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def item_keys(df):
+    """ItemCode como texto (nulo -> '') para usar como clave del estado."""
+    return df['ItemCode'].astype(object).where(df['ItemCode'].notna(), '').astype(str)
+
+
+def item_hashes(df):
+    """
+    Hash de contenido por ItemCode: suma (mod 2^64) de los hashes de sus filas,
+    independiente del orden de filas y de columnas.
+    """
+    row_hash = pd.util.hash_pandas_object(df[sorted(df.columns)], index=False)
+    per_item = pd.Series(row_hash.to_numpy(), index=item_keys(df).to_numpy()).groupby(level=0).sum()
+    return per_item.map(lambda h: format(int(h) & 0xFFFFFFFFFFFFFFFF, '016x'))
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    return value
+
+
+class IncrementalStore:
+    """
+    Estado persistido (SQLite) de las corridas incrementales:
+    - `items`: hash de contenido por ItemCode de la última corrida.
+    - `incidents`: filas del reporte de incidencias por ItemCode, para reutilizarlas
+      cuando el artículo no cambió.
+    - `unique_keys`: claves de unicidad (hash, valor, validez) por ItemCode, para sembrar el
+      índice global de unicidad con los artículos que no se revalidan (ver UniquenessIndex.add_seed).
+    - `meta`: huella de reglas y marca de agua (watermark) de la última corrida.
+
+    Con `watermark_column` se leen solo las filas con marca posterior a la última corrida;
+    sin ella se leen todas y se filtran por hash de contenido por ItemCode.
+    Si la huella de las reglas cambia, el estado se descarta y la corrida es completa.
+    """
+
+    def __init__(self, path, watermark_column=""):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.run_id = uuid.uuid4().hex
+        self.watermark_column = watermark_column
+        self.full_run = True
+        self._new_watermark = None
+        self.processed = set()  # ItemCodes revalidados en esta corrida
+        self.seen = set()       # ItemCodes vistos (modo hash), para purgar los eliminados
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS items (item_code TEXT PRIMARY KEY, row_hash TEXT, run_id TEXT);
+            CREATE TABLE IF NOT EXISTS incidents (item_code TEXT, run_id TEXT, seq INTEGER, payload TEXT);
+            CREATE INDEX IF NOT EXISTS ix_incidents_item ON incidents (item_code);
+            CREATE TABLE IF NOT EXISTS unique_keys (item_code TEXT, run_id TEXT, col TEXT, hash INTEGER,
+                                                    valid INTEGER, item_name TEXT, value TEXT);
+            CREATE INDEX IF NOT EXISTS ix_unique_keys_item ON unique_keys (item_code);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    # --- Meta ---
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def begin_run(self, fingerprint):
+        """Inicia la corrida; si las reglas cambiaron descarta el estado. Retorna True si es completa."""
+        if self._get_meta('rules_fingerprint') != fingerprint:
+            print("[Incremental] Reglas nuevas o sin estado previo: corrida completa.")
+            self.conn.executescript("DELETE FROM items; DELETE FROM incidents; DELETE FROM unique_keys; "
+                                    "DELETE FROM meta;")
+            self._set_meta('rules_fingerprint', fingerprint)
+            self.conn.commit()
+        else:
+            self.full_run = False
+        return self.full_run
+
+    @property
+    def watermark(self):
+        return self._get_meta('watermark')
+
+    def query_filter(self):
+        """Filtro (where, params) de la consulta para el modo marca de agua, o (None, None)."""
+        if self.watermark_column and not self.full_run and self.watermark is not None:
+            print(f"[Incremental] Leyendo cambios desde {self.watermark_column} > {self.watermark}")
+            return f'"{self.watermark_column}" > ?', [self.watermark]
+        return None, None
+
+    # --- Detección de cambios ---
+    def prepare_chunk(self, df_chunk):
+        """
+        Retorna (filas a revalidar, hashes por ItemCode o None).
+        Modo marca de agua: todo el chunk ya es delta; se registra la marca máxima.
+        Modo hash: solo las filas de ItemCodes nuevos o modificados.
+        """
+        if self.watermark_column:
+            col = df_chunk.get(self.watermark_column)
+            if col is not None and col.notna().any():
+                chunk_max = pd.Timestamp(col.max())
+                if self._new_watermark is None or chunk_max > self._new_watermark:
+                    self._new_watermark = chunk_max
+            return df_chunk, None
+        changed, hashes = self.select_changed(df_chunk)
+        return changed.reset_index(drop=True), hashes
+
+    def select_changed(self, df_chunk):
+        """
+        Modo hash: retorna las filas del chunk cuyo ItemCode es nuevo o cambió de contenido,
+        junto con los hashes por ItemCode del chunk.
+        """
+        hashes = item_hashes(df_chunk)
+        self.seen.update(hashes.index)
+        stored = {}
+        codes = list(hashes.index)
+        for start in range(0, len(codes), 500):
+            part = codes[start:start + 500]
+            marks = ",".join("?" * len(part))
+            stored.update(self.conn.execute(
+                f"SELECT item_code, row_hash FROM items WHERE item_code IN ({marks})", part).fetchall())
+        changed = {code for code, h in hashes.items() if stored.get(code) != h}
+        mask = item_keys(df_chunk).isin(changed).to_numpy()
+        return df_chunk[mask], hashes[hashes.index.isin(changed)]
+
+    # --- Persistencia de resultados ---
+    def save_results(self, df_chunk, incidences, hashes=None):
+        """
+        Reemplaza el estado de los ItemCodes revalidados del chunk: sus hashes
+        (si se conocen) y sus incidencias.
+        """
+        codes = list(pd.unique(item_keys(df_chunk)))
+        # Un ItemCode puede repetirse en varios chunks de la misma corrida: se acumula
+        self.conn.executemany("DELETE FROM incidents WHERE item_code = ? AND run_id != ?",
+                              [(c, self.run_id) for c in codes])
+        self.conn.executemany("DELETE FROM unique_keys WHERE item_code = ? AND run_id != ?",
+                              [(c, self.run_id) for c in codes])
+        self.conn.executemany("INSERT OR REPLACE INTO items (item_code, row_hash, run_id) VALUES (?, ?, ?)",
+                              [(c, None if hashes is None else hashes.get(c), self.run_id) for c in codes])
+        if incidences is not None and not incidences.empty:
+            inc_keys = incidences['ItemCode'].astype(object).where(incidences['ItemCode'].notna(), '').astype(str)
+            rows = incidences[REPORT_COLUMNS].to_numpy(dtype=object)
+            self.conn.executemany(
+                "INSERT INTO incidents (item_code, run_id, seq, payload) VALUES (?, ?, ?, ?)",
+                [(code, self.run_id, i, json.dumps([_json_value(v) for v in row], default=str))
+                 for i, (code, row) in enumerate(zip(inc_keys, rows))])
+        self.conn.commit()
+        self.processed.update(codes)
+
+    def save_unique_keys(self, col, entries):
+        """Guarda las claves de unicidad (entradas de UniquenessIndex) de los artículos revalidados."""
+        if entries.empty:
+            return
+        hashes = entries['hash'].to_numpy(dtype=np.uint64).view(np.int64)  # SQLite: enteros con signo
+        # ItemCode del índice es el texto de la regla ('nan'/'None' si es nulo); la clave del estado es ''
+        codes = entries['ItemCode'].astype(str).replace({'nan': '', 'None': ''})
+        self.conn.executemany(
+            "INSERT INTO unique_keys (item_code, run_id, col, hash, valid, item_name, value) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            zip(codes, [self.run_id] * len(entries), [col] * len(entries),
+                hashes.tolist(), entries['valid'].astype(int).tolist(), entries['ItemName'].astype(str),
+                entries['value'].astype(str)))
+        self.conn.commit()
+
+    def load_unchanged_keys(self, chunk_size=50000):
+        """Claves guardadas de los ItemCodes no revalidados: genera (columna, entradas) por bloques."""
+        cursor = self.conn.execute(
+            "SELECT col, item_code, hash, valid, item_name, value FROM unique_keys ORDER BY rowid")
+        row = 0
+        while True:
+            fetched = cursor.fetchmany(chunk_size)
+            if not fetched:
+                break
+            rows = [r for r in fetched if r[1] not in self.processed]
+            if not rows:
+                continue
+            block = pd.DataFrame(rows, columns=['col', 'ItemCode', 'hash', 'valid', 'ItemName', 'value'])
+            block['hash'] = block['hash'].to_numpy(dtype=np.int64).view(np.uint64)
+            block['valid'] = block['valid'].astype(bool)
+            block['batch'] = np.int32(0)
+            block['row'] = np.arange(row, row + len(block), dtype=np.int32)
+            row += len(block)
+            for col, entries in block.groupby('col', sort=False):
+                yield col, entries[ENTRY_COLUMNS].reset_index(drop=True)
+
+    def load_unchanged_incidents(self):
+        """Incidencias guardadas de los ItemCodes que no se revalidaron en esta corrida."""
+        payloads = [
+            payload for code, payload in self.conn.execute(
+                "SELECT item_code, payload FROM incidents ORDER BY rowid")
+            if code not in self.processed
+        ]
+        rows = [json.loads(p) for p in payloads]
+        return pd.DataFrame(rows, columns=REPORT_COLUMNS)
+
+    def finish_run(self):
+        """Cierra la corrida: guarda la marca de agua o (modo hash) purga artículos eliminados."""
+        if self._new_watermark is not None:
+            self._set_meta('watermark', str(self._new_watermark))
+        if not self.watermark_column:
+            stale = [(code,) for (code,) in self.conn.execute("SELECT item_code FROM items")
+                     if code not in self.seen]
+            self.conn.executemany("DELETE FROM items WHERE item_code = ?", stale)
+            self.conn.executemany("DELETE FROM incidents WHERE item_code = ?", stale)
+            self.conn.executemany("DELETE FROM unique_keys WHERE item_code = ?", stale)
+        self.conn.commit()
@@ -0,0 +1,218 @@
+import numpy as np
+import pandas as pd
+
+from app.services.batch_context import get_context
+from app.services.sketches import hash_values
+
+# Parámetros por defecto del detector (ver settings NEAR_DUPLICATE_*)
+MINHASH_PERMUTATIONS = 128  # funciones hash por firma
+LSH_BANDS = 16              # 16 bandas de 8 filas: ~99% de los pares con Jaccard 0.85 son candidatos
+                            # y casi ninguno con Jaccard < 0.4 (nombres con la misma plantilla)
+SIMILARITY_THRESHOLD = 0.85 # Jaccard mínimo entre conjuntos de tokens
+MAX_BUCKET = 50             # cubetas mayores se enlazan en estrella (evita pares cuadráticos)
+PAIR_CHUNK = 200_000        # pares verificados por bloque (memoria acotada)
+
+# Sinónimos de unidades: "84 GR" y "84 G" deben dar el mismo token
+UNIT_SYNONYMS = {
+    'GR': 'G', 'GRS': 'G', 'GRAMOS': 'G',
+    'L': 'LT', 'LTS': 'LT', 'LITRO': 'LT', 'LITROS': 'LT',
+    'MLS': 'ML', 'MMS': 'MM', 'CMS': 'CM', 'KGS': 'KG', 'MIC': 'MC',
+}
+
+# Salida: un registro por artículo dentro de un grupo de posibles duplicados
+CLUSTER_COLUMNS = ['grupo', 'ItemCode', 'ItemName', 'lote', 'fila', 'similitud', 'miembros']
+
+_U32 = np.uint64(32)
+
+
+def normalize_tokens(names: pd.Series) -> pd.DataFrame:
+    """
+    Conjunto de tokens normalizados por fila (filas sin tokens se omiten):
+    mayúsculas sin tildes, "32,7" -> "32.7", números separados de unidades ("84G" -> "84 G"),
+    sin signos y con sinónimos de unidades. Retorna DataFrame(row, token) sin repetidos.
+    """
+    s = names.astype(str).str.upper().str.normalize('NFKD').str.replace('[\u0300-\u036f]', '', regex=True)
+    s = s.str.replace(r'(\d),(\d)', r'\1.\2', regex=True)
+    s = s.str.replace(r'[^A-Z0-9. ]', ' ', regex=True)
+    s = s.str.replace(r'(\d)([A-Z])', r'\1 \2', regex=True).str.replace(r'([A-Z])(\d)', r'\1 \2', regex=True)
+    tokens = s.str.split().explode()
+    tokens = tokens[tokens.notna()].str.strip('.')
+    tokens = tokens[tokens != '']
+    tokens = tokens.replace(UNIT_SYNONYMS)
+    out = pd.DataFrame({'row': np.asarray(tokens.index, dtype=np.int64), 'token': tokens.to_numpy(dtype=object)})
+    return out.drop_duplicates().reset_index(drop=True)
+
+
+class NearDuplicateDetector:
+    """
+    Posibles duplicados de ItemName con pequeñas diferencias (espacios, "GR" vs "G", sufijo
+    de cliente), en tiempo casi lineal:
+    - `add_batch` calcula la firma MinHash del conjunto de tokens normalizados de cada fila y
+      guarda solo las claves de banda LSH y los hashes de sus tokens (no la firma completa).
+    - `finalize` agrupa por clave de banda (pares candidatos), confirma cada par con el Jaccard
+      exacto de tokens >= `threshold` y une los pares en grupos.
+    Los nombres idénticos no se consideran (los marca la regla de unicidad).
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, permutations=MINHASH_PERMUTATIONS, bands=LSH_BANDS,
+                 max_bucket=MAX_BUCKET, seed=7):
+        if permutations % bands:
+            raise ValueError(f"permutations ({permutations}) debe ser múltiplo de bands ({bands})")
+        self.threshold = threshold
+        self.permutations = permutations
+        self.bands = bands
+        self.rows_per_band = permutations // bands
+        self.max_bucket = max(2, max_bucket)
+        rng = np.random.default_rng(seed)
+        # h_i(x) = ((x ^ s_i) * m_i) >> 32 (multiplicadores impares: permutaciones de 64 bits)
+        self._seeds = rng.integers(0, 2**63, permutations, dtype=np.uint64)
+        self._mults = rng.integers(0, 2**63, permutations, dtype=np.uint64) | np.uint64(1)
+        self._band_mults = rng.integers(0, 2**63, self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+        self._band_keys, self._tokens, self._offsets, self._meta = [], [], [], []
+        self.items = 0
+
+    def _signatures(self, rows, hashes, n):
+        """Firma MinHash (n x permutations, uint32) por fila; `rows` ordenado."""
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        sig = np.empty((n, self.permutations), dtype=np.uint32)
+        with np.errstate(over='ignore'):
+            for i in range(self.permutations):
+                h = ((hashes ^ self._seeds[i]) * self._mults[i]) >> _U32
+                sig[:, i] = np.minimum.reduceat(h, starts)
+        return sig
+
+    def add_batch(self, batch_index, df, ctx=None):
+        """Registra los ItemName del lote (firma -> claves de banda; hashes de tokens para verificar)."""
+        if 'ItemName' not in df.columns:
+            return
+        ctx = get_context(df, ctx)
+        names = ctx.name_stripped
+        present = (names.notna() & (names != 'nan') & (names != '')).to_numpy(dtype=bool)
+        rows = np.flatnonzero(present)
+        if not len(rows):
+            return
+        tokens = normalize_tokens(names.iloc[rows].reset_index(drop=True))
+        if tokens.empty:
+            return
+        # Solo filas con al menos un token; `item` es la posición dentro del lote filtrado
+        item, local = np.unique(tokens['row'].to_numpy(), return_inverse=True)
+        order = np.argsort(local, kind='stable')
+        local = local[order]
+        hashes = hash_values(tokens['token'].to_numpy()[order])
+        sig = self._signatures(local, hashes, len(item))
+
+        keys = np.empty((len(item), self.bands), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for b in range(self.bands):
+                band = sig[:, b * self.rows_per_band:(b + 1) * self.rows_per_band].astype(np.uint64)
+                keys[:, b] = (band * self._band_mults).sum(axis=1) + np.uint64(b)
+        self._band_keys.append(keys)
+        self._tokens.append(hashes)
+        counts = np.bincount(local, minlength=len(item))
+        self._offsets.append(counts)
+        src = rows[item]
+        self._meta.append(pd.DataFrame({
+            'ItemCode': ctx.code.iloc[src].astype(str).to_numpy(),
+            'ItemName': names.iloc[src].astype(str).to_numpy(),
+            'lote': np.full(len(src), batch_index, dtype=np.int32),
+            'fila': src.astype(np.int32),
+        }))
+        self.items += len(item)
+
+    def _candidates(self, keys):
+        """Pares (i, j) que comparten alguna clave de banda."""
+        pairs = []
+        for b in range(keys.shape[1]):
+            order = np.argsort(keys[:, b], kind='stable')
+            k = keys[order, b]
+            starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+            sizes = np.diff(np.r_[starts, len(k)])
+            group = np.repeat(np.arange(len(starts)), sizes)
+            big = sizes[group] > self.max_bucket
+            # Cubetas grandes: cada miembro con el primero (estrella)
+            if big.any():
+                first = order[starts[group[big]]]
+                pairs.append(np.column_stack([first, order[big]]))
+            small = ~big
+            limit = min(int(sizes[sizes <= self.max_bucket].max(initial=1)), self.max_bucket)
+            for d in range(1, limit):
+                same = (group[:-d] == group[d:]) & small[:-d]
+                if not same.any():
+                    break
+                pairs.append(np.column_stack([order[:-d][same], order[d:][same]]))
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        pairs = np.sort(np.concatenate(pairs).astype(np.int64), axis=1)
+        n = len(keys)
+        flat = np.unique(pairs[:, 0] * n + pairs[:, 1])
+        pairs = np.column_stack([flat // n, flat % n])
+        return pairs[pairs[:, 0] != pairs[:, 1]]
+
+    @staticmethod
+    def _jaccard(pairs, tokens, starts, counts):
+        """Jaccard exacto entre los conjuntos de hashes de tokens de cada par."""
+        n = len(pairs)
+        pair_ids, members = [], []
+        for side in (0, 1):
+            idx = pairs[:, side]
+            pair_ids.append(np.repeat(np.arange(n), counts[idx]))
+            members.append(np.repeat(starts[idx] - np.r_[0, np.cumsum(counts[idx])[:-1]], counts[idx])
+                           + np.arange(counts[idx].sum()))
+        # (par, token) como una clave de 64 bits: tokens comunes quedan contiguos al ordenar
+        pair_ids = np.concatenate(pair_ids)
+        with np.errstate(over='ignore'):
+            both = tokens[np.concatenate(members)] + pair_ids.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        order = np.argsort(both)
+        shared = both[order][1:] == both[order][:-1]
+        inter = np.bincount(pair_ids[order][1:][shared], minlength=n)
+        union = counts[pairs[:, 0]] + counts[pairs[:, 1]] - inter
+        return inter / union
+
+    def finalize(self) -> pd.DataFrame:
+        """Grupos de posibles duplicados (ver CLUSTER_COLUMNS), ordenados por grupo, lote y fila."""
+        if not self.items:
+            return pd.DataFrame(columns=CLUSTER_COLUMNS)
+        keys = np.concatenate(self._band_keys)
+        tokens = np.concatenate(self._tokens)
+        counts = np.concatenate(self._offsets)
+        starts = np.r_[0, np.cumsum(counts)[:-1]]
+        meta = pd.concat(self._meta, ignore_index=True)
+
+        pairs = self._candidates(keys)
+        names = meta['ItemName'].to_numpy()
+        pairs = pairs[names[pairs[:, 0]] != names[pairs[:, 1]]]
+        # Cota por tamaño: Jaccard <= min/max de tokens de ambos
+        small, large = np.sort(counts[pairs], axis=1).T
+        pairs = pairs[small >= self.threshold * large]
+        if not len(pairs):
+            return pd.DataFrame(columns=CLUSTER_COLUMNS)
+        similarity = np.concatenate([self._jaccard(pairs[i:i + PAIR_CHUNK], tokens, starts, counts)
+                                     for i in range(0, len(pairs), PAIR_CHUNK)])
+        keep = similarity >= self.threshold
+        pairs, similarity = pairs[keep], similarity[keep]
+        if not len(pairs):
+            return pd.DataFrame(columns=CLUSTER_COLUMNS)
+
+        # Componentes conexas: propagación de la etiqueta mínima con salto de punteros
+        labels = np.arange(len(meta))
+        while True:
+            low = np.minimum(labels[pairs[:, 0]], labels[pairs[:, 1]])
+            new = labels.copy()
+            np.minimum.at(new, pairs[:, 0], low)
+            np.minimum.at(new, pairs[:, 1], low)
+            new = new[new]
+            if np.array_equal(new, labels):
+                break
+            labels = new
+
+        best = np.zeros(len(meta))
+        np.maximum.at(best, pairs[:, 0], similarity)
+        np.maximum.at(best, pairs[:, 1], similarity)
+        members = np.unique(pairs)
+        out = meta.iloc[members].copy()
+        out['similitud'] = best[members].round(3)
+        out.insert(0, 'grupo', labels[members])
+        out['miembros'] = out.groupby('grupo')['grupo'].transform('size')
+        out = out.sort_values(['grupo', 'lote', 'fila'], kind='stable')
+        out['grupo'] = pd.factorize(out['grupo'])[0] + 1
+        return out[CLUSTER_COLUMNS].reset_index(drop=True)
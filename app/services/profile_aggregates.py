@@ -0,0 +1,219 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.config.settings import DATA_PROFILING_OUTPUT, DATA_QUALITY_OUTPUT
+from app.services.sketches import ColumnSketch
+from app.infrastructure.output_writer import get_output_writer
+
+KEY_COLUMNS = ['ItemCode', 'TimeStamp']
+
+# Cuantiles reportados para columnas numéricas en modo sketch
+SKETCH_QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+# Clave única para los nulos (NaN != NaN no sirve como clave de diccionario)
+_NULL = object()
+
+
+def _is_null(value):
+    return value is _NULL or value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+
+class ValidityCounts:
+    """
+    Conteos acumulables por atributo: filas, válidos y (opcional) nulos de la columna fuente.
+    Se actualiza lote a lote y dos instancias se combinan con `merge`.
+    """
+
+    def __init__(self, with_nulls=False):
+        self.with_nulls = with_nulls
+        self.rows = {}
+        self.valid = {}
+        self.nulls = {}
+
+    def update(self, results: pd.DataFrame, source: pd.DataFrame = None):
+        """Suma los resultados booleanos de un lote (`source` aporta los nulos reales)."""
+        for col in results.columns:
+            if col in KEY_COLUMNS:
+                continue
+            self.rows[col] = self.rows.get(col, 0) + len(results)
+            self.valid[col] = self.valid.get(col, 0) + results[col].sum()
+            if self.with_nulls:
+                # Algunas reglas son compuestas: si la columna no existe en la fuente no hay nulos
+                null_count = source[col].isna().sum() if source is not None and col in source.columns else 0
+                self.nulls[col] = self.nulls.get(col, 0) + null_count
+        return self
+
+    def invalidate(self, counts):
+        """Resta válidos que una pasada posterior invalidó ({atributo: filas}, ej: unicidad global)."""
+        for col, n in counts.items():
+            if col in self.valid:
+                self.valid[col] -= n
+        return self
+
+    def merge(self, other: 'ValidityCounts'):
+        for col, rows in other.rows.items():
+            self.rows[col] = self.rows.get(col, 0) + rows
+            self.valid[col] = self.valid.get(col, 0) + other.valid[col]
+            if self.with_nulls:
+                self.nulls[col] = self.nulls.get(col, 0) + other.nulls.get(col, 0)
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        today = datetime.today().date()
+        summary_data = []
+        for col, total_rows in self.rows.items():
+            row = {
+                'Atributo': col,
+                'Valid_values': self.valid[col],
+                'NoValid_values': total_rows - self.valid[col],
+            }
+            if self.with_nulls:
+                row['NullValues'] = self.nulls[col]
+                row['NoNullValues'] = total_rows - self.nulls[col]
+            row['TimeStamp'] = today
+            summary_data.append(row)
+        return pd.DataFrame(summary_data)
+
+
+class ValueCounts:
+    """
+    Tablas de frecuencia acumulables por columna (incluye nulos).
+    Cada lote aporta su value_counts y se suma al acumulado por valor; al final se
+    ordena por conteo descendente (empates en orden de primera aparición).
+    Los valores se guardan tal cual llegan (sin reinferir tipos), para que '101' no
+    se convierta en '101.0' al combinar lotes con y sin nulos.
+
+    Modo sketch (`sketch_threshold`): cuando una columna supera ese número de valores
+    distintos (o el umbral propio en `column_thresholds`) pasa a un ColumnSketch de
+    memoria fija (distintos aproximados, top-K y cuantiles).
+    """
+
+    def __init__(self, sketch_threshold=None, column_thresholds=None, top_k=50):
+        self.sketch_threshold = sketch_threshold
+        self.column_thresholds = dict(column_thresholds or {})
+        self.top_k = top_k
+        self.counts = {}
+        self.sketches = {}
+
+    def _threshold(self, col):
+        return self.column_thresholds.get(col, self.sketch_threshold)
+
+    def _to_sketch(self, col):
+        sketch = ColumnSketch(self.top_k)
+        table = self.counts.pop(col, {})
+        sketch.nulls = table.pop(_NULL, 0)
+        sketch.rows = sketch.nulls
+        sketch.update(list(table.keys()), list(table.values()))
+        self.sketches[col] = sketch
+        return sketch
+
+    def _add(self, col, values, counts):
+        if col in self.sketches:
+            self._add_sketch(self.sketches[col], values, counts)
+            return
+        table = self.counts.setdefault(col, {})
+        for value, count in zip(values, counts):
+            key = _NULL if _is_null(value) else value
+            table[key] = table.get(key, 0) + count
+        threshold = self._threshold(col)
+        if threshold is not None and len(table) > threshold:
+            self._to_sketch(col)
+
+    def _add_sketch(self, sketch, values, counts):
+        pairs = [(v, n) for v, n in zip(values, counts) if not _is_null(v)]
+        nulls = sum(n for v, n in zip(values, counts) if _is_null(v))
+        sketch.nulls += nulls
+        sketch.rows += nulls
+        sketch.update([v for v, _ in pairs], [n for _, n in pairs])
+
+    def update(self, df: pd.DataFrame):
+        for col in df.columns:
+            if col in KEY_COLUMNS:
+                continue
+            v_counts = df[col].value_counts(dropna=False)
+            self._add(col, v_counts.index.tolist(), v_counts.values.tolist())
+        return self
+
+    def merge(self, other: 'ValueCounts'):
+        for col, table in other.counts.items():
+            self._add(col, list(table.keys()), list(table.values()))
+        for col, sketch in other.sketches.items():
+            mine = self.sketches.get(col) or self._to_sketch(col)
+            mine.merge(sketch)
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        """dataValues: conteos exactos o, en columnas con sketch, top-K estimado (y nulos exactos)."""
+        values_list = []
+        for col, table in self.counts.items():
+            items = sorted(((k, n) for k, n in table.items() if n > 0), key=lambda kv: -kv[1])
+            values_list.append(_values_frame(col, items))
+        for col, sketch in self.sketches.items():
+            items = sketch.top() + ([(_NULL, sketch.nulls)] if sketch.nulls else [])
+            values_list.append(_values_frame(col, sorted(items, key=lambda kv: -kv[1])))
+        if not values_list:
+            return pd.DataFrame(columns=['atributo', 'valor', 'conteo'])
+        return pd.concat(values_list, ignore_index=True)
+
+    def sketch_frame(self) -> pd.DataFrame:
+        """dataSketches: resumen aproximado de las columnas de alta cardinalidad."""
+        rows = []
+        for col, sketch in self.sketches.items():
+            rows.append({
+                'atributo': col,
+                'filas': sketch.rows,
+                'nulos': sketch.nulls,
+                'distintos_aprox': sketch.distinct(),
+                **{f'p{int(q * 100):02d}': sketch.digest.quantile(q) for q in SKETCH_QUANTILES},
+                'TimeStamp': datetime.today().date()
+            })
+        return pd.DataFrame(rows)
+
+
+def _values_frame(col, items):
+    values = np.empty(len(items), dtype=object)
+    values[:] = [np.nan if k is _NULL else k for k, _ in items]
+    return pd.DataFrame({
+        'atributo': col,
+        'valor': values,
+        'conteo': np.array([n for _, n in items], dtype=np.int64)
+    })
+
+
+class ProfileAggregates:
+    """
+    Agregados de perfilamiento y calidad de toda la corrida:
+    - `profiling` -> dataProfiling
+    - `values` -> dataValues
+    - `quality` -> validValues
+    - `values.sketches` -> dataSketches (solo en modo sketch)
+    run_profile/run_quality_check los actualizan por lote y `write()` genera las salidas
+    una sola vez al final, sin retener filas en memoria.
+    """
+
+    def __init__(self, sketch_threshold=None, column_thresholds=None, top_k=50):
+        self.profiling = ValidityCounts(with_nulls=True)
+        self.values = ValueCounts(sketch_threshold, column_thresholds, top_k)
+        self.quality = ValidityCounts()
+
+    def merge(self, other: 'ProfileAggregates'):
+        self.profiling.merge(other.profiling)
+        self.values.merge(other.values)
+        self.quality.merge(other.quality)
+        return self
+
+    def write(self):
+        """Genera las salidas agregadas de la corrida. Retorna (df_profiling, df_values, df_valid_values)."""
+        df_profiling = self.profiling.to_frame()
+        df_values = self.values.to_frame()
+        df_valid_values = self.quality.to_frame()
+        writer = get_output_writer()
+        writer.write(DATA_PROFILING_OUTPUT, 'dataProfiling', df_profiling, per_batch=False)
+        writer.write(DATA_PROFILING_OUTPUT, 'dataValues', df_values, per_batch=False)
+        writer.write(DATA_QUALITY_OUTPUT, 'validValues', df_valid_values, per_batch=False)
+        if self.values.sketches:
+            writer.write(DATA_PROFILING_OUTPUT, 'dataSketches', self.values.sketch_frame(), per_batch=False)
+            print(f"[Info] Perfil aproximado (sketch): {', '.join(self.values.sketches)}")
+        return df_profiling, df_values, df_valid_values
@@ -1,13 +1,18 @@
 import pandas as pd
-import os
 from datetime import datetime
-from app.config.settings import DATA_PROFILING_OUTPUT
-from app.services.business_rules import PROFILING_RULES
+from app.config.settings import DATA_PROFILING_OUTPUT, RULE_FAMILY_PARTITIONING
+from app.services.business_rules import PROFILING_RULES, evaluate_rule
+from app.services.batch_context import get_context
+from app.services.profile_aggregates import ValidityCounts, ValueCounts
+from app.infrastructure.output_writer import get_output_writer
 
-def run_profile(df: pd.DataFrame):
+def run_profile(df: pd.DataFrame, ctx=None, cache=None, aggregates=None):
     """
     Ejecuta el perfilamiento completo sobre el DataFrame dado.
-    Genera y guarda 3 CSVs: dataQuality, dataProfiling, dataValues.
+    Genera y guarda 3 salidas (ver output_writer): dataQuality, dataProfiling, dataValues.
+    `ctx` es el BatchContext del lote (se crea uno si no se recibe).
+    `cache` (RuleResultCache, opcional) evita reevaluar filas cuyo contenido ya se validó.
+    `aggregates` (ProfileAggregates, opcional) acumula las estadísticas de toda la corrida.
     """
     print(f"\n--- Iniciando Perfilamiento de Datos ({len(df)} filas) ---")
     
@@ -20,76 +25,45 @@ def run_profile(df: pd.DataFrame):
     # Creamos un DataFrame booleano donde cada columna es el resultado de una regla
     quality_results = pd.DataFrame(index=df_clean.index)
     quality_results['ItemCode'] = df_clean['ItemCode'] # Key obligatoria
+    ctx = get_context(df_clean, ctx)
+    rule_reasons = {} # Códigos de motivo emitidos por las reglas (ver REASON_CATALOG)
     
     for rule_name, rule_func in PROFILING_RULES.items():
         if rule_name in df_clean.columns or rule_name in ["U_beas_prccode"]: # Check existencia base o logica compuesta
             # Se wrap con try-except para que una regla mala no mate todo el proceso
             try:
                 # La funcion debe devolver una Serie booleana alineada con df
-                result_series = rule_func(df_clean)
+                # Reglas con familia declarada (RULE_FAMILIES) se evalúan solo sobre sus filas
+                result_series, reasons = evaluate_rule('profiling', rule_name, rule_func, df_clean, ctx, cache,
+                                                       RULE_FAMILY_PARTITIONING)
                 quality_results[rule_name] = result_series
+                if reasons is not None:
+                    rule_reasons[rule_name] = reasons
             except Exception as e:
                 print(f"[Advertencia] Falló regla {rule_name}: {e}")
                 # Asumimos False (no valido) en caso de error tecnico, o NaN
                 quality_results[rule_name] = False
+                rule_reasons.pop(rule_name, None)
+    ctx.reasons['profiling'] = rule_reasons
 
     # 2. Generar 'dataQuality.csv' (Detalle fila por fila)
     quality_results['TimeStamp'] = datetime.today().date()
-    quality_path = os.path.join(DATA_PROFILING_OUTPUT, 'dataQuality.csv')
-    quality_results.to_csv(quality_path, index=False)
-    print(f"[Generado] {quality_path}")
+    writer = get_output_writer()
+    writer.write(DATA_PROFILING_OUTPUT, 'dataQuality', quality_results)
 
-    # 3. Generar 'dataProfiling.csv' (Estadísticas Agregadas)
-    # Contamos True como Valid
-    # Excluimos ItemCode y TimeStamp del conteo
-    cols_rules = [c for c in quality_results.columns if c not in ['ItemCode', 'TimeStamp']]
-    
-    summary_data = []
-    total_rows = len(df_clean)
-    
-    for col in cols_rules:
-        valid_count = quality_results[col].sum() # Suma de Trues
-        # Check original nulls for this column in source data
-        # Nota: algunas reglas son compuestas, asi que mapeamos lo mejor posible
-        # Si la columna existe en el DF original, contamos nulos reales
-        null_count = df_clean[col].isna().sum() if col in df_clean.columns else 0
-        
-        summary_data.append({
-            'Atributo': col,
-            'Valid_values': valid_count,
-            'NoValid_values': total_rows - valid_count,
-            'NullValues': null_count,
-            'NoNullValues': total_rows - null_count,
-            'TimeStamp': datetime.today().date()
-        })
-        
-    df_profiling = pd.DataFrame(summary_data)
-    profiling_path = os.path.join(DATA_PROFILING_OUTPUT, 'dataProfiling.csv')
-    df_profiling.to_csv(profiling_path, index=False)
-    print(f"[Generado] {profiling_path}")
+    # 3. Estadísticas agregadas ('dataProfiling.csv') y distribución de valores ('dataValues.csv')
+    # Se cuentan con agregados acumulables: si se recibe `aggregates` (ProfileAggregates de
+    # toda la corrida) se suman ahí y los CSVs se generan una sola vez al final (main).
+    batch_counts = ValidityCounts(with_nulls=True).update(quality_results, df_clean)
+    batch_values = ValueCounts().update(df_clean)
+    df_profiling = batch_counts.to_frame()
+    df_values = batch_values.to_frame()
 
-    # 4. Generar 'dataValues.csv' (Distribución de valores)
-    # Itera sobre todas las columnas del DF limpio (no solo las reglas)
-    values_list = []
-    col_exclude = ['ItemCode', 'TimeStamp']
-    
-    for col in df_clean.columns:
-        if col in col_exclude: 
-            continue
-            
-        # Value counts
-        v_counts = df_clean[col].value_counts(dropna=False)
-        temp_df = pd.DataFrame({
-            'atributo': col,
-            'valor': v_counts.index,
-            'conteo': v_counts.values
-        })
-        values_list.append(temp_df)
-        
-    if values_list:
-        df_values = pd.concat(values_list, ignore_index=True)
-        values_path = os.path.join(DATA_PROFILING_OUTPUT, 'dataValues.csv')
-        df_values.to_csv(values_path, index=False)
-        print(f"[Generado] {values_path}")
+    if aggregates is not None:
+        aggregates.profiling.merge(batch_counts)
+        aggregates.values.merge(batch_values)
+    else:
+        writer.write(DATA_PROFILING_OUTPUT, 'dataProfiling', df_profiling)
+        writer.write(DATA_PROFILING_OUTPUT, 'dataValues', df_values)
     
     return quality_results, df_profiling, df_values
@@ -1,13 +1,19 @@
 import pandas as pd
-import os
 from datetime import datetime
-from app.config.settings import DATA_QUALITY_OUTPUT
-from app.services.business_rules import QUALITY_RULES, PROFILING_DEPENDENCY_MAP
+from app.config.settings import DATA_QUALITY_OUTPUT, RULE_FAMILY_PARTITIONING
+from app.services.business_rules import QUALITY_RULES, PROFILING_DEPENDENCY_MAP, evaluate_rule
+from app.services.batch_context import get_context
+from app.services.profile_aggregates import ValidityCounts
+from app.infrastructure.output_writer import get_output_writer
 
-def run_quality_check(df_raw: pd.DataFrame, df_profiling_results: pd.DataFrame):
+def run_quality_check(df_raw: pd.DataFrame, df_profiling_results: pd.DataFrame, ctx=None, cache=None,
+                      aggregates=None):
     """
     Ejecuta el chequeo de calidad avanzado.
     Combina reglas simples (heredadas del perfilamiento) y reglas complejas (definidas en quality_rules).
+    `ctx` es el BatchContext del lote (se crea uno si no se recibe).
+    `cache` (RuleResultCache, opcional) evita reevaluar filas cuyo contenido ya se validó.
+    `aggregates` (ProfileAggregates, opcional) acumula validValues de toda la corrida.
     """
     print(f"\n--- Iniciando Chequeo de Calidad ---")
     
@@ -22,16 +28,25 @@ def run_quality_check(df_raw: pd.DataFrame, df_profiling_results: pd.DataFrame):
     # 1. Resultados de Calidad
     quality_results = pd.DataFrame(index=df_clean.index)
     quality_results['ItemCode'] = df_clean['ItemCode']
+    ctx = get_context(df_clean, ctx)
+    rule_reasons = {} # Códigos de motivo emitidos por las reglas (ver REASON_CATALOG)
     
     # A. Reglas Complejas (Calculadas aqui)
     for rule_name, rule_func in QUALITY_RULES.items():
         if rule_name in df_clean.columns or rule_name == "U_Codigo_Secundario": # Check column existence
             try:
                 # Retorna Serie Booleana (True=Valid)
-                quality_results[rule_name] = rule_func(df_clean)
+                # Reglas con familia declarada (RULE_FAMILIES) se evalúan solo sobre sus filas
+                valid, reasons = evaluate_rule('quality', rule_name, rule_func, df_clean, ctx, cache,
+                                               RULE_FAMILY_PARTITIONING)
+                quality_results[rule_name] = valid
+                if reasons is not None:
+                    rule_reasons[rule_name] = reasons
             except Exception as e:
                 print(f"[Advertencia Calidad] Falló regla {rule_name}: {e}")
                 quality_results[rule_name] = False
+                rule_reasons.pop(rule_name, None)
+    ctx.reasons['quality'] = rule_reasons
 
     # B. Reglas Heredadas de Profiling (Dependencias)
     # Si pasó el profiling -> Es valido en calidad (Logica user: takeValid/takeNovalid es filtro)
@@ -55,24 +70,12 @@ def run_quality_check(df_raw: pd.DataFrame, df_profiling_results: pd.DataFrame):
 
     # 2. Generar 'validValues.csv' (Conteo estadistico)
     # Estructura: Atributo, Valid_values, NoValid_values
-    stats_rows = []
-    cols_check = [c for c in quality_results.columns if c != 'ItemCode']
-    
-    for col in cols_check:
-        valid_count = quality_results[col].sum()
-        invalid_count = len(quality_results) - valid_count
-        
-        stats_rows.append({
-            'Atributo': col,
-            'Valid_values': valid_count,
-            'NoValid_values': invalid_count,
-            'TimeStamp': datetime.today().date()
-        })
-        
-    df_valid_values = pd.DataFrame(stats_rows)
-    valid_path = os.path.join(DATA_QUALITY_OUTPUT, 'validValues.csv')
-    df_valid_values.to_csv(valid_path, index=False)
-    print(f"[Generado] {valid_path}")
+    # Con `aggregates` se acumula y se escribe una sola vez al final de la corrida
+    batch_counts = ValidityCounts().update(quality_results)
+    if aggregates is not None:
+        aggregates.quality.merge(batch_counts)
+    else:
+        get_output_writer().write(DATA_QUALITY_OUTPUT, 'validValues', batch_counts.to_frame())
     
     # 3. Generar 'dataQuality.csv' (Detalle - Sobrescribe o version nueva?)
     # El usuario lo llama 'informe' y lo guarda como 'dataQuality.csv'. 
@@ -80,8 +83,6 @@ def run_quality_check(df_raw: pd.DataFrame, df_profiling_results: pd.DataFrame):
     # Pero aqui es el reporte "final" de calidad.
     quality_results['TimeStamp'] = datetime.today().date()
     # Usaremos prefijo para distinguir si estan en la misma carpeta
-    report_path = os.path.join(DATA_QUALITY_OUTPUT, 'finalDataQuality.csv') 
-    quality_results.to_csv(report_path, index=False)
-    print(f"[Generado] {report_path}")
+    get_output_writer().write(DATA_QUALITY_OUTPUT, 'finalDataQuality', quality_results)
     
     return quality_results
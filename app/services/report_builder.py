@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+from string import Formatter
+from app.services.business_rules import RULE_DESCRIPTIONS, REASON_CATALOG, table_reasons
+from app.services.value_meanings import map_value_meanings
+from app.services.field_mappings import map_field_names
+
+# Columnas del reporte de incidencias (mismo orden que consume EmailService)
+REPORT_COLUMNS = [
+    "ItemCode",
+    "ItemName",
+    "Nombre del campo evaluado",
+    "Valor actual",
+    "Valor sugerido",
+    "Detalle del error",
+    "Regla no cumplida",
+]
+
+# Columnas de los resultados que no son reglas
+NON_RULE_COLUMNS = ['ItemCode', 'TimeStamp']
+
+
+# ==========================================
+# --- Detalle del error (vectorizado) ---
+# ==========================================
+
+def _text(values):
+    """Equivalente vectorizado de str(valor) / f'{valor}'."""
+    return pd.Series(values, dtype=object).map(str)
+
+
+def _append(details, mask, msg):
+    """Agrega `msg` (texto o Serie) a las filas de `mask`, separando con ' | '."""
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        return details
+    if not isinstance(msg, pd.Series):
+        msg = pd.Series(msg, index=details.index, dtype=object)
+    joined = details.where(details == '', details + ' | ') + msg
+    return details.where(~mask, joined)
+
+
+class _Fields:
+    """Valores de los marcadores del catálogo de motivos, calculados solo si se usan."""
+
+    def __init__(self, current, item_code):
+        self.current = current
+        self.item_code = item_code
+        self._cache = {}
+
+    def get(self, name):
+        if name not in self._cache:
+            self._cache[name] = self._build(name)
+        return self._cache[name]
+
+    def _build(self, name):
+        if name == 'valor':
+            return _text(self.current)
+        if name == 'longitud':
+            return _text(self.current).str.len().astype(str)
+        if name == 'ItemCode':
+            return _text(self.item_code)
+        num = pd.to_numeric(pd.Series(self.current, dtype=object), errors='coerce').astype(float)
+        if name == 'numero':
+            return num.map(str)
+        if name == 'entero':
+            # int(valor): trunca decimales; nulo o no finito -> None
+            finite = np.isfinite(num)
+            return num.where(finite, 0).map(lambda v: str(int(v))).where(finite, 'None')
+        raise KeyError(f"Marcador desconocido en REASON_CATALOG: {name}")
+
+
+def _render(template, fields):
+    """Formatea una plantilla del catálogo de forma vectorizada."""
+    text = None
+    for literal, field_name, _, _ in Formatter().parse(template):
+        part = literal
+        if field_name is not None:
+            part = literal + fields.get(field_name) if literal else fields.get(field_name)
+        text = part if text is None else text + part
+    return text
+
+
+def describe_errors(col_name, current, item_code, reasons=None):
+    """
+    Arma el 'Detalle del error' de los valores fallidos de una misma regla.
+    Los mensajes salen de REASON_CATALOG según los códigos de motivo que emitió la regla;
+    sin motivo específico se usa el mensaje genérico.
+    Todos los argumentos son arreglos alineados; retorna un arreglo de textos.
+    """
+    n = len(current)
+    details = pd.Series('', index=pd.RangeIndex(n), dtype=object)
+    templates = REASON_CATALOG.get(col_name, [])
+    table = table_reasons(col_name)
+    if table is not None:
+        # Regla por tabla de decisión: motivos fijos en bits y la fila de la tabla por encima
+        fixed, row_templates = table
+        templates = templates[:fixed]
+    if reasons is not None and (templates or table is not None):
+        reasons = np.asarray(reasons, dtype=np.int64)
+        fields = _Fields(current, item_code)
+        for bit, template in enumerate(templates):
+            mask = (reasons & (1 << bit)) != 0
+            if mask.any():
+                details = _append(details, mask, _render(template, fields))
+        if table is not None:
+            rows = reasons >> fixed
+            for row in np.unique(rows[rows > 0]):
+                details = _append(details, rows == row, _render(row_templates[row - 1], fields))
+
+    # Si no se identificó error específico, usar genérico
+    s = pd.Series(current, dtype=object)
+    empty = (s.isna() | (s == '')).to_numpy()
+    missing = (details == '').to_numpy()
+    generic = pd.Series("❌ Valor '", index=s.index, dtype=object) + _text(current) + "' no cumple la regla"
+    details = details.where(~(missing & empty), "❌ Campo vacío o nulo")
+    details = details.where(~(missing & ~empty), generic)
+    return details.to_numpy(dtype=object)
+
+
+# ==========================================
+# --- Construcción del reporte ---
+# ==========================================
+
+def _column_values(df, col, rows, default):
+    if col in df.columns:
+        values = df[col].to_numpy(dtype=object)[rows]
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype) and dtype.categories.dtype == object:
+            # Categórica de apply_schema sobre objetos: el nulo vuelve a ser None, como antes del esquema
+            # (con categorías str el nulo ya es NaN, igual que la columna original)
+            values[pd.isna(values)] = None
+        return values
+    return np.full(len(rows), default, dtype=object)
+
+
+def build_incident_report(df_raw: pd.DataFrame, df_cleaned: pd.DataFrame, results: pd.DataFrame, reasons=None):
+    """
+    Construye el reporte de incidencias de un lote de forma columnar.
+    `results` es la matriz booleana de reglas (True=Valido) alineada posicionalmente
+    con `df_raw` y `df_cleaned`. Cada par (fila, regla) fallido genera una incidencia,
+    en el mismo orden que el recorrido fila por fila.
+    `reasons` es un dict {regla: codigos de motivo por fila} emitido por las reglas.
+    """
+    reasons = reasons or {}
+    rule_cols = [c for c in results.columns if c not in NON_RULE_COLUMNS]
+    if not rule_cols or results.empty:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+
+    failed = ~results[rule_cols].to_numpy(dtype=bool)
+    rows, cols = np.nonzero(failed)  # Orden fila-mayor: fila y luego regla
+    n = len(rows)
+    if n == 0:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+
+    item_code = _column_values(df_raw, 'ItemCode', rows, None)
+    item_name = _column_values(df_raw, 'ItemName', rows, None)
+
+    current = np.empty(n, dtype=object)
+    suggested = np.empty(n, dtype=object)
+    details = np.empty(n, dtype=object)
+
+    # Un paso vectorizado por regla (no por celda)
+    for j in np.unique(cols):
+        col = rule_cols[j]
+        pos = np.flatnonzero(cols == j)
+        r = rows[pos]
+        cur = _column_values(df_raw, col, r, "N/A")
+        sug = _column_values(df_cleaned, col, r, "Revisar")
+        rule_reasons = reasons.get(col)
+        if rule_reasons is not None:
+            rule_reasons = np.asarray(rule_reasons)[r]
+        details[pos] = describe_errors(col, cur, item_code[pos], rule_reasons)
+        current[pos] = map_value_meanings(col, pd.Series(cur, dtype=object)).to_numpy(dtype=object)
+        suggested[pos] = map_value_meanings(col, pd.Series(sug, dtype=object)).to_numpy(dtype=object)
+
+    col_names = pd.Series(np.asarray(rule_cols, dtype=object)[cols], dtype=object)
+    rule_texts = {c: RULE_DESCRIPTIONS.get(c, "Regla no cumplida") for c in rule_cols}
+
+    return pd.DataFrame({
+        "ItemCode": item_code,
+        "ItemName": item_name,
+        "Nombre del campo evaluado": map_field_names(col_names).to_numpy(dtype=object),
+        "Valor actual": current,
+        "Valor sugerido": suggested,
+        "Detalle del error": details,
+        "Regla no cumplida": col_names.map(rule_texts).to_numpy(dtype=object),
+    }, columns=REPORT_COLUMNS)
+
+
+def build_duplicate_incidents(duplicates: pd.DataFrame):
+    """
+    Incidencias de la pasada global de unicidad (ver UniquenessIndex.finalize): una por
+    aparición de un valor que se repite en otro lote.
+    """
+    if duplicates.empty:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    col_names = duplicates['Atributo'].astype(object).reset_index(drop=True)
+    first = duplicates['primer_ItemCode'].astype(object).where(duplicates['primer_ItemCode'].notna(), 'N/A')
+    details = ("❌ Valor duplicado en otro lote (primera aparición: " + first.map(str)
+               + ", lote " + duplicates['primer_lote'].map(str) + ")")
+    current = pd.Series(duplicates['valor'].to_numpy(dtype=object), dtype=object)
+    for col in col_names.unique():
+        mask = (col_names == col).to_numpy()
+        current[mask] = map_value_meanings(col, current[mask]).to_numpy(dtype=object)
+    return pd.DataFrame({
+        "ItemCode": duplicates['ItemCode'].to_numpy(dtype=object),
+        "ItemName": duplicates['ItemName'].to_numpy(dtype=object),
+        "Nombre del campo evaluado": map_field_names(col_names).to_numpy(dtype=object),
+        "Valor actual": current.to_numpy(dtype=object),
+        "Valor sugerido": "Revisar",
+        "Detalle del error": details.to_numpy(dtype=object),
+        "Regla no cumplida": col_names.map(lambda c: RULE_DESCRIPTIONS.get(c, "Regla no cumplida")).to_numpy(dtype=object),
+    }, columns=REPORT_COLUMNS)
+
+
+NEAR_DUPLICATE_RULE = "No debe existir otro artículo con un nombre casi idéntico."
+
+def build_near_duplicate_incidents(clusters: pd.DataFrame, max_listed=5):
+    """
+    Incidencias de posibles duplicados de ItemName (ver NearDuplicateDetector.finalize): una
+    por artículo del grupo, con los ItemCode de los demás miembros (hasta `max_listed`).
+    """
+    if clusters.empty:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    codes = clusters['ItemCode'].astype(object)
+    listed = codes.groupby(clusters['grupo']).agg(list)
+    others = [
+        [c for c in listed[g] if c != code]
+        for g, code in zip(clusters['grupo'], codes)
+    ]
+    details = [
+        f"⚠️ Posible duplicado de: {', '.join(o[:max_listed])}{' ...' if len(o) > max_listed else ''} "
+        f"(similitud {sim:.0%})"
+        for o, sim in zip(others, clusters['similitud'])
+    ]
+    return pd.DataFrame({
+        "ItemCode": codes.to_numpy(dtype=object),
+        "ItemName": clusters['ItemName'].to_numpy(dtype=object),
+        "Nombre del campo evaluado": map_field_names(pd.Series(['ItemName'] * len(clusters))).to_numpy(dtype=object),
+        "Valor actual": clusters['ItemName'].to_numpy(dtype=object),
+        "Valor sugerido": "Revisar",
+        "Detalle del error": details,
+        "Regla no cumplida": NEAR_DUPLICATE_RULE,
+    }, columns=REPORT_COLUMNS)
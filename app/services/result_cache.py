@@ -0,0 +1,220 @@
+import hashlib
+import inspect
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.services import batch_context
+from app.services.batch_context import BatchContext, CONTEXT_COLUMNS
+from app.services.business_rules import split_rule_result
+from app.services.column_projection import trace_rule
+from app.services.rule_engine import rule_set, ENGINE_ENTRY_POINTS
+
+# Operaciones que hacen que el resultado de una fila dependa de otras filas del lote:
+# esas reglas no se pueden cachear por contenido de fila.
+CROSS_ROW_OPERATIONS = {'duplicated', 'drop_duplicates', 'groupby', 'value_counts', 'nunique',
+                        'shift', 'rolling', 'expanding', 'rank', 'transform'}
+
+# Si la proporción de filas sin caché supera este umbral, se evalúa el lote completo
+FULL_EVAL_RATIO = 0.5
+
+_MIX = np.uint64(0x100000001B3)
+
+
+class RuleInfo:
+    """Metadatos de caché de una regla: columnas que lee, huella y si es cacheable."""
+
+    def __init__(self, func):
+        trace = trace_rule(func)
+        self.columns = trace.names
+        self.cacheable = not (trace.attributes & CROSS_ROW_OPERATIONS)
+        digest = hashlib.sha256()
+        for source in trace.sources:
+            digest.update(source.encode('utf-8'))
+        if 'get_context' in trace.attributes or 'BatchContext' in trace.attributes:
+            digest.update(inspect.getsource(batch_context).encode('utf-8'))
+        if trace.attributes & ENGINE_ENTRY_POINTS:
+            # Reglas de rules.yaml: sus columnas (p. ej. las de un `expr`) también son parte de la fila
+            rules = rule_set()
+            self.columns = self.columns | rules.columns()
+            digest.update(rules.digest.encode('utf-8'))
+        self.fingerprint = digest.hexdigest()
+
+
+class RuleResultCache:
+    """
+    Caché persistente de resultados de reglas.
+    - Clave de fila: hash del contenido de las columnas que la regla lee (más las del BatchContext).
+    - Clave de regla: huella del código de la regla y sus auxiliares (y de rules.yaml si lo usa);
+      si cambia, la entrada anterior se descarta sola.
+    - Valores: booleanos empaquetados (np.packbits) y códigos de motivo, en un .npz por regla.
+    - Desalojo por tamaño: si el directorio supera `max_bytes`, se borran los archivos
+      usados hace más tiempo.
+    Las reglas que comparan filas entre sí (duplicados) se evalúan siempre.
+    """
+
+    def __init__(self, cache_dir, max_bytes=None):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._info = {}
+        self._tables = {}
+        self._pending = {}
+        self._hash_df = None
+        self._col_hashes = {}
+
+    # --- Claves ---
+    def _rule_info(self, func):
+        if func not in self._info:
+            self._info[func] = RuleInfo(func)
+        return self._info[func]
+
+    def _column_hash(self, df, col):
+        if self._hash_df is not df:
+            self._hash_df = df
+            self._col_hashes = {}
+        if col not in self._col_hashes:
+            self._col_hashes[col] = pd.util.hash_pandas_object(df[col], index=False).to_numpy()
+        return self._col_hashes[col]
+
+    def row_keys(self, df, columns):
+        """Hash por fila del contenido de `columns` (en orden alfabético)."""
+        keys = np.full(len(df), len(columns), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for col in sorted(columns):
+                keys = (keys * _MIX) ^ self._column_hash(df, col)
+        return keys
+
+    def _path(self, stage, rule_name, fingerprint):
+        return os.path.join(self.cache_dir, f"{stage}__{rule_name}__{fingerprint[:16]}.npz")
+
+    # --- Tablas ---
+    def _table(self, stage, rule_name, fingerprint):
+        key = (stage, rule_name, fingerprint)
+        if key not in self._tables:
+            table = None
+            path = self._path(stage, rule_name, fingerprint)
+            if os.path.exists(path):
+                try:
+                    with np.load(path) as data:
+                        n = int(data['n'])
+                        table = {
+                            'keys': data['keys'],
+                            'valid': np.unpackbits(data['valid'], count=n).astype(bool),
+                            'reasons': data['reasons'].astype(np.int64) if 'reasons' in data else None,
+                        }
+                    os.utime(path)
+                except Exception as e:
+                    print(f"[Cache] Descartando {path}: {e}")
+            self._tables[key] = table
+        return self._tables[key]
+
+    def _lookup(self, table, keys):
+        if table is None or len(table['keys']) == 0:
+            return np.zeros(len(keys), dtype=bool), None
+        pos = np.searchsorted(table['keys'], keys)
+        pos = np.minimum(pos, len(table['keys']) - 1)
+        hit = table['keys'][pos] == keys
+        return hit, pos
+
+    # --- Evaluación ---
+    def evaluate(self, stage, rule_name, rule_func, df, ctx=None):
+        """
+        Retorna (mascara, motivos) de la regla, evaluando solo las filas sin caché.
+        Equivale a split_rule_result(rule_func(df, ctx)).
+        """
+        info = self._rule_info(rule_func)
+        if not info.cacheable or len(df) == 0:
+            return split_rule_result(rule_func(df, ctx))
+
+        columns = (info.columns | set(CONTEXT_COLUMNS)) & set(df.columns)
+        keys = self.row_keys(df, columns)
+        table = self._table(stage, rule_name, info.fingerprint)
+        hit, pos = self._lookup(table, keys)
+        miss = ~hit
+        n_miss = int(miss.sum())
+        self.hits += len(df) - n_miss
+        self.misses += n_miss
+
+        valid = np.zeros(len(df), dtype=bool)
+        reasons = None
+        if hit.any():
+            valid[hit] = table['valid'][pos[hit]]
+            if table['reasons'] is not None:
+                reasons = np.zeros(len(df), dtype=np.int64)
+                reasons[hit] = table['reasons'][pos[hit]]
+
+        if n_miss:
+            if n_miss > FULL_EVAL_RATIO * len(df):
+                # Mayoría sin caché: evaluar el lote completo (comparte el contexto del lote)
+                sub_valid, sub_reasons = split_rule_result(rule_func(df, ctx))
+                sub_valid = np.asarray(sub_valid).astype(bool)[miss]
+                sub_reasons = None if sub_reasons is None else np.asarray(sub_reasons, dtype=np.int64)[miss]
+            else:
+                sub = df[miss]
+                sub_valid, sub_reasons = split_rule_result(rule_func(sub, BatchContext(sub)))
+                sub_valid = np.asarray(sub_valid).astype(bool)
+                sub_reasons = None if sub_reasons is None else np.asarray(sub_reasons, dtype=np.int64)
+            valid[miss] = sub_valid
+            if sub_reasons is not None:
+                if reasons is None:
+                    reasons = np.zeros(len(df), dtype=np.int64)
+                reasons[miss] = sub_reasons
+            self._pending.setdefault((stage, rule_name, info.fingerprint), []).append(
+                (keys[miss], sub_valid, sub_reasons))
+
+        return pd.Series(valid, index=df.index), reasons
+
+    # --- Persistencia ---
+    def flush(self):
+        """Escribe las entradas nuevas, borra huellas obsoletas y aplica el desalojo por tamaño."""
+        for (stage, rule_name, fingerprint), parts in self._pending.items():
+            table = self._table(stage, rule_name, fingerprint)
+            keys = [p[0] for p in parts]
+            valid = [p[1] for p in parts]
+            with_reasons = all(p[2] is not None for p in parts) and (table is None or table['reasons'] is not None)
+            reasons = [p[2] for p in parts] if with_reasons else None
+            if table is not None:
+                keys.insert(0, table['keys'])
+                valid.insert(0, table['valid'])
+                if reasons is not None:
+                    reasons.insert(0, table['reasons'])
+            all_keys = np.concatenate(keys)
+            uniq, first = np.unique(all_keys, return_index=True)
+            all_valid = np.concatenate(valid)[first]
+            data = {'keys': uniq, 'valid': np.packbits(all_valid), 'n': np.int64(len(uniq))}
+            if reasons is not None:
+                all_reasons = np.concatenate(reasons)[first]
+                max_code = int(all_reasons.max()) if len(all_reasons) else 0
+                data['reasons'] = all_reasons.astype(np.min_scalar_type(max_code))
+
+            path = self._path(stage, rule_name, fingerprint)
+            np.savez(path, **data)
+            self._tables[(stage, rule_name, fingerprint)] = {
+                'keys': uniq, 'valid': all_valid,
+                'reasons': None if reasons is None else np.concatenate(reasons)[first]}
+            self._remove_stale(stage, rule_name, path)
+        self._pending = {}
+        self._evict()
+
+    def _remove_stale(self, stage, rule_name, current_path):
+        prefix = f"{stage}__{rule_name}__"
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(prefix) and name.endswith('.npz') and path != current_path:
+                os.remove(path)
+
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        files = [os.path.join(self.cache_dir, n) for n in os.listdir(self.cache_dir) if n.endswith('.npz')]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        while files and total > self.max_bytes:
+            oldest = files.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+            print(f"[Cache] Desalojado {os.path.basename(oldest)}")
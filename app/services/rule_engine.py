@@ -1,83 +1,398 @@
+try:
+    import numexpr
+    NUMEXPR_INSTALLED = True
+except ImportError:
+    NUMEXPR_INSTALLED = False
+
+import ast
+import hashlib
+import re
 import yaml
 import pandas as pd
 import numpy as np
 import os
+from app.config.settings import RULE_EXPR_NUMEXPR, EXCEL_FILE_PATH
+from app.services.decision_tables import DecisionTable
 
 # Ruta relativa a este archivo: ../config/rules.yaml
 RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'rules.yaml')
 
-from functools import lru_cache
+# Funciones del motor que, usadas por una regla de business_rules, la hacen depender de rules.yaml
+# (proyección de columnas y huella del caché de resultados)
+ENGINE_ENTRY_POINTS = {'load_rules', 'apply_rule', 'evaluate_field', 'rule_set', 'decision_table'}
+
+def _as_text_isin(col, texts):
+    """
+    Equivale a `col.astype(str).isin(texts) & col.notna()` sin convertir cada fila: las
+    categóricas comparan sus categorías y los textos se comparan directo.
+    """
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        hits = np.append(col.cat.categories.astype(str).isin(texts), False)
+        return pd.Series(hits[col.cat.codes.to_numpy()], index=col.index)  # código -1 (nulo) -> False
+    if pd.api.types.is_string_dtype(col.dtype) and col.dtype != object:
+        return col.isin(texts) & col.notna()
+    return col.astype(str).isin(texts) & col.notna()
+
+# ==========================================
+# --- Tipos de regla ---
+# Cada compilador recibe la regla (dict del YAML) y retorna una función df -> máscara booleana
+# sobre la columna `field` (ya validados y precalculados los parámetros).
+
+def _compile_range(rule):
+    min_v = rule.get('min', -float('inf'))
+    max_v = rule.get('max', float('inf'))
+    # between devuelve False para NaN.
+    return lambda col: pd.to_numeric(col, errors='coerce').between(min_v, max_v)
+
+def _compile_value(rule):
+    target = rule['equal_to']
+    if isinstance(target, (int, float)):
+        # Comparación numérica
+        return lambda col: pd.to_numeric(col, errors='coerce') == target
+    # Comparar como string (un valor nulo nunca es igual al texto)
+    texts = [str(target)]
+    return lambda col: _as_text_isin(col, texts)
+
+def _compile_in_set(rule):
+    values = list(rule['values'])
+    if values and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return lambda col: pd.to_numeric(col, errors='coerce').isin(values)
+    texts = [str(v) for v in values]
+    return lambda col: _as_text_isin(col, texts)
+
+def _compile_regex(rule):
+    # Búsqueda (como str.contains); anclar con ^...$ para exigir el valor completo
+    pattern = re.compile(rule['pattern'], re.IGNORECASE if rule.get('ignore_case') else 0)
+    return lambda col: col.astype(str).str.contains(pattern, na=False) & col.notna()
+
+def _compile_not_null(rule):
+    # `allow_empty: false` también rechaza textos vacíos
+    if rule.get('allow_empty', True):
+        return lambda col: col.notna()
+    return lambda col: col.notna() & (col.astype(str) != '')
+
+def _compile_length(rule):
+    min_v = rule.get('min', 0)
+    max_v = rule.get('max', float('inf'))
+    return lambda col: col.astype(str).str.len().between(min_v, max_v) & col.notna()
+
+RULE_TYPES = {
+    'range': _compile_range,
+    'value': _compile_value,
+    'in_set': _compile_in_set,
+    'regex': _compile_regex,
+    'not_null': _compile_not_null,
+    'length': _compile_length,
+}
+
+
+_CMP_OPS = {ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>='}
+_BIN_OPS = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/', ast.Mod: '%', ast.Pow: '**'}
+
+
+class CompiledExpr:
+    """
+    Expresión entre columnas de rules.yaml, analizada una sola vez al compilar las reglas.
+    - Comparaciones con texto (`IndirctTax == 'Y'`, `x in ['A', 'B']`) e isnull/notnull(col)
+      se resuelven como términos booleanos por columna.
+    - El resto (aritmética, comparaciones numéricas, and/or/not, abs) queda como una sola
+      expresión sobre arreglos: con numexpr se evalúa en una pasada fusionada (sin temporales
+      de largo completo); sin numexpr, con numpy sobre el código ya compilado.
+    - Las columnas numéricas pasan por to_numeric (no numérico -> NaN: la comparación falla).
+    `when`: la expresión solo se exige donde `when` es verdadera.
+    """
+
+    def __init__(self, expr, when=None):
+        self.source = f"not ({when}) or ({expr})" if when else expr
+        self._numeric = {}   # columna -> variable
+        self._terms = []     # (variable, tipo, columna, valor)
+        self.code = self._node(ast.parse(self.source, mode='eval').body)
+        self._compiled = compile(self.code, '<rules.yaml>', 'eval')
+        self.columns = set(self._numeric) | {term[2] for term in self._terms}
+
+    # --- Compilación ---
+    def _variable(self, column):
+        if column not in self._numeric:
+            self._numeric[column] = f"c{len(self._numeric)}"
+        return self._numeric[column]
+
+    def _term(self, kind, column, value=None):
+        name = f"t{len(self._terms)}"
+        self._terms.append((name, kind, column, value))
+        return name
+
+    def _node(self, node):
+        if isinstance(node, ast.BoolOp):
+            op = ' & ' if isinstance(node.op, ast.And) else ' | '
+            return '(' + op.join(self._node(v) for v in node.values) + ')'
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, ast.Not):
+                return f"(~{self._node(node.operand)})"
+            if isinstance(node.op, ast.USub):
+                return f"(-{self._node(node.operand)})"
+            if isinstance(node.op, ast.UAdd):
+                return self._node(node.operand)
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            return f"({self._node(node.left)} {_BIN_OPS[type(node.op)]} {self._node(node.right)})"
+        if isinstance(node, ast.Compare):
+            parts, left = [], node.left
+            for op, right in zip(node.ops, node.comparators):
+                parts.append(self._compare(left, op, right))
+                left = right
+            return '(' + ' & '.join(parts) + ')'
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and len(node.args) == 1
+                and not node.keywords):
+            func, arg = node.func.id, node.args[0]
+            if func == 'abs':
+                return f"abs({self._node(arg)})"
+            if func in ('isnull', 'notnull') and isinstance(arg, ast.Name):
+                return self._term(func, arg.id)
+        if isinstance(node, ast.Name):
+            return self._variable(node.id)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float)):
+            return repr(node.value)
+        raise ValueError(f"Expresión no soportada: {ast.unparse(node)}")
+
+    def _compare(self, left, op, right):
+        # Columna contra texto o lista de valores: término booleano precalculado
+        if isinstance(right, ast.Name) and isinstance(left, ast.Constant) and isinstance(left.value, str):
+            left, right = right, left
+        if isinstance(left, ast.Name) and isinstance(op, (ast.Eq, ast.NotEq)) and \
+                isinstance(right, ast.Constant) and isinstance(right.value, str):
+            term = self._term('eq', left.id, right.value)
+            return term if isinstance(op, ast.Eq) else f"(~{term})"
+        if isinstance(left, ast.Name) and isinstance(op, (ast.In, ast.NotIn)) and \
+                isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+            values = [ast.literal_eval(v) for v in right.elts]
+            term = self._term('in', left.id, values)
+            return term if isinstance(op, ast.In) else f"(~{term})"
+        if type(op) not in _CMP_OPS:
+            raise ValueError(f"Comparación no soportada: {ast.unparse(op)}")
+        return f"({self._node(left)} {_CMP_OPS[type(op)]} {self._node(right)})"
+
+    # --- Evaluación ---
+    def _term_values(self, kind, col, value):
+        if kind == 'isnull':
+            return col.isna()
+        if kind == 'notnull':
+            return col.notna()
+        if kind == 'eq':
+            return _as_text_isin(col, [value])
+        # 'in': numérico si todos los valores lo son, si no como texto
+        if value and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value):
+            return pd.to_numeric(col, errors='coerce').isin(value)
+        return _as_text_isin(col, [str(v) for v in value])
+
+    def __call__(self, df):
+        arrays = {var: pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                  for col, var in self._numeric.items()}
+        for name, kind, col, value in self._terms:
+            arrays[name] = np.asarray(self._term_values(kind, df[col], value), dtype=bool)
+        if NUMEXPR_INSTALLED and RULE_EXPR_NUMEXPR:
+            result = numexpr.evaluate(self.code, local_dict=arrays)
+        else:
+            result = eval(self._compiled, {'__builtins__': {}, 'abs': np.abs}, arrays)
+        result = np.asarray(result, dtype=bool)
+        if result.ndim == 0:  # Expresión sin columnas
+            result = np.full(len(df), bool(result))
+        return pd.Series(result, index=df.index)
+
+
+class CompiledRule:
+    """
+    Regla de rules.yaml lista para evaluar: `columns` son las columnas que lee y `__call__`
+    retorna la máscara booleana (True=Válido) alineada con df.
+    - Tipos de una columna (RULE_TYPES): si el campo no existe en df, la regla no falla.
+    - `expr`: expresión entre columnas (ver CompiledExpr), p. ej. "ToleranDay + LeadTime == 20";
+      con `when`, solo se exige en las filas donde `when` es verdadero.
+    - `allow_null: true` hace válidos los nulos del campo (tipos de una columna).
+    """
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.field = rule['field']
+        self.type = rule['type']
+        if self.type == 'expr':
+            self._check = CompiledExpr(rule['expr'], rule.get('when'))
+            self.columns = self._check.columns
+        elif self.type in RULE_TYPES:
+            self.columns = {self.field}
+            self._check = RULE_TYPES[self.type](rule)
+        else:
+            # Tipo desconocido: se omite la regla (no falla) sin invalidar el resto de rules.yaml
+            print(f"[RuleEngine] Advertencia: tipo de regla desconocido '{self.type}' ({self.field}); se omite.")
+            self.columns = set()
+            self._check = None
+        self.allow_null = bool(rule.get('allow_null', False))
+
+    def __call__(self, df):
+        if self._check is None:
+            return pd.Series(True, index=df.index)
+        if self.type == 'expr':
+            if not self.columns <= set(df.columns):
+                return pd.Series(True, index=df.index)
+            return self._check(df)
+        if self.field not in df.columns:
+            # Si el campo no existe en el DF, por seguridad asumimos True (no falla la regla).
+            return pd.Series(True, index=df.index)
+        col_data = df[self.field]
+        result = self._check(col_data)
+        if self.allow_null:
+            result = result | col_data.isna()
+        return result
+
+
+class RuleSet:
+    """
+    rules.yaml compilado: reglas por campo (índice), tablas de decisión por nombre y huella del
+    contenido. Las tablas con `sheet` toman sus filas de esa hoja del Diccionario (Excel); sus
+    filas entran en la huella y el Excel se vigila para la recarga (`sources`).
+    """
+
+    def __init__(self, rules=(), digest='', tables=()):
+        self.rules = list(rules)
+        self.by_field = {}
+        for rule in self.rules:
+            try:
+                compiled = CompiledRule(rule)
+            except Exception as e:
+                # Una regla mal escrita se omite; las demás siguen vigentes
+                print(f"[RuleEngine] Error compilando regla {rule!r}: {e}")
+                continue
+            self.by_field.setdefault(compiled.field, []).append(compiled)
+        self.tables = {}
+        self.sources = []
+        hasher = hashlib.sha256(digest.encode())
+        for spec in tables:
+            if spec.get('sheet'):
+                from app.infrastructure.excel import load_decision_table_rows
+                spec = dict(spec, rows=load_decision_table_rows(spec['sheet']))
+                hasher.update(repr(spec['rows']).encode())
+                if EXCEL_FILE_PATH not in self.sources:
+                    self.sources.append(EXCEL_FILE_PATH)
+            self.tables[spec['name']] = DecisionTable(spec)
+        self.yaml_digest = digest
+        self.digest = hasher.hexdigest() if self.sources else digest
+
+    def table(self, name):
+        """Tabla de decisión `name` o None si rules.yaml no la define."""
+        return self.tables.get(name)
+
+    @property
+    def fields(self):
+        return list(self.by_field)
+
+    def columns(self, field=None):
+        """Columnas que leen las reglas de `field` (o de todas)."""
+        compiled = self.by_field.get(field, []) if field else [c for cs in self.by_field.values() for c in cs]
+        columns = set().union(*(c.columns for c in compiled)) if compiled else set()
+        if not field:
+            columns |= set().union(*(t.columns for t in self.tables.values())) if self.tables else set()
+        return columns
+
+    def evaluate(self, df, field, types=None):
+        """
+        Máscara (AND de las reglas del campo) o None si rules.yaml no define el campo.
+        Con `types` solo se combinan las reglas de esos tipos (p. ej. ('expr',)).
+        """
+        compiled = self.by_field.get(field, [])
+        if types is not None:
+            compiled = [rule for rule in compiled if rule.type in types]
+        if not compiled:
+            return None
+        result = compiled[0](df)
+        for rule in compiled[1:]:
+            result = result & rule(df)
+        return result
+
+
+class RuleEngine:
+    """
+    Carga y compila rules.yaml. Se recompila solo si cambia el archivo (o el Excel de alguna
+    tabla de decisión): `get()` compara (mtime, tamaño) y, si difiere, el sha256; `current()`
+    retorna las reglas ya cargadas sin tocar el disco (la comprobación se hace una vez por lote).
+    Si una recarga falla, se conservan las reglas compiladas vigentes.
+    """
+
+    def __init__(self, path=RULES_PATH):
+        self.path = path
+        self._stat = None
+        self._rule_set = None
+
+    def get(self) -> RuleSet:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            if self._stat != 'missing':
+                print(f"[RuleEngine] Advertencia: No se encontró {self.path}.")
+                self._stat, self._rule_set = 'missing', RuleSet()
+            return self._rule_set
+        key = self._key(stat)
+        if key == self._stat:
+            return self._rule_set
+        try:
+            with open(self.path, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            if self._rule_set is None or digest != self._rule_set.yaml_digest or self._rule_set.sources:
+                config = yaml.safe_load(content) or {}
+                self._rule_set = RuleSet(config.get('rules', []), digest, config.get('tables') or [])
+                # print(f"[RuleEngine] Compiladas {len(self._rule_set.rules)} reglas dinámicas.") # Verbose off
+        except Exception as e:
+            print(f"[RuleEngine] Error cargando reglas: {e}")
+            if self._rule_set is None:
+                self._rule_set = RuleSet()
+        self._stat = self._key(stat)  # Con las fuentes (Excel) del rule set recién compilado
+        return self._rule_set
+
+    def current(self) -> RuleSet:
+        """Reglas compiladas vigentes, sin comprobar el archivo (carga la primera vez)."""
+        if self._rule_set is None:
+            return self.get()
+        return self._rule_set
+
+    def _key(self, stat):
+        key = (stat.st_mtime_ns, stat.st_size)
+        for source in (self._rule_set.sources if isinstance(self._rule_set, RuleSet) else []):
+            try:
+                source_stat = os.stat(source)
+                key += (source_stat.st_mtime_ns, source_stat.st_size)
+            except OSError:
+                key += (None,)
+        return key
+
+
+_ENGINE = RuleEngine()
+
+def rule_set() -> RuleSet:
+    """Reglas vigentes de rules.yaml (compiladas; ver refresh_rules para la recarga)."""
+    return _ENGINE.current()
+
+def refresh_rules() -> RuleSet:
+    """Recarga rules.yaml si cambió. Se llama una vez por lote, no en cada evaluación de regla."""
+    return _ENGINE.get()
 
-@lru_cache(maxsize=1)
 def load_rules():
-    """Carga las reglas desde el archivo YAML. (Cacheada)"""
-    if not os.path.exists(RULES_PATH):
-        print(f"[RuleEngine] Advertencia: No se encontró {RULES_PATH}.")
-        return []
-    try:
-        with open(RULES_PATH, 'r') as f:
-            config = yaml.safe_load(f)
-        rules = config.get('rules', [])
-        # print(f"[RuleEngine] Cargadas {len(rules)} reglas dinámicas.") # Verbose off
-        return rules
-    except Exception as e:
-        print(f"[RuleEngine] Error cargando reglas: {e}")
-        return []
+    """Carga las reglas desde el archivo YAML (lista de dicts, recargada si el archivo cambió)."""
+    return rule_set().rules
+
+def evaluate_field(df, field, types=None):
+    """Máscara de las reglas de rules.yaml para `field` (solo `types` si se indica), o None si no hay."""
+    return rule_set().evaluate(df, field, types)
+
+def decision_table(name):
+    """Tabla de decisión vigente `name` (rules.yaml `tables:`) o None si no está definida."""
+    return rule_set().table(name)
 
 def apply_rule(df, rule):
     """Aplica una regla individual a un DataFrame y retorna una Series booleana."""
-    field = rule['field']
-    rule_type = rule['type']
-    
-    if field not in df.columns:
-        # Si el campo no existe en el DF, decidimos si retorna True o False.
-        # Por seguridad asumimos True (no falla la regla), pero se podría loguear.
-        return pd.Series(True, index=df.index)
-
-    # Preparar datos
-    col_data = df[field]
-    
-    if rule_type == 'range':
-        # Conversión a numérico forzada para rangos
-        val = pd.to_numeric(col_data, errors='coerce')
-        min_v = rule.get('min', -float('inf'))
-        max_v = rule.get('max', float('inf'))
-        
-        # Validar (NaN falla en rangos usualmente, o se maneja aparte?)
-        # between devuelve False para NaN.
-        return val.between(min_v, max_v)
-    
-    elif rule_type == 'value':
-        target = rule['equal_to']
-        # Comparación directa
-        if isinstance(target, (int, float)):
-            # Intentar comparar numéricamente
-            val_num = pd.to_numeric(col_data, errors='coerce')
-            return val_num == target
-        else:
-            # Comparar como string
-            return col_data.astype(str) == str(target)
-            
-    # Otros tipos de reglas se pueden agregar aquí
-    
-    return pd.Series(True, index=df.index)
+    return CompiledRule(rule)(df)
 
 def evaluate_dynamic_rules(df):
     """
     Evalúa todas las reglas dinámicas sobre el DataFrame.
     Retorna un DataFrame con booleans (True=Pass, False=Fail) por columna evaluada.
+    Si hay varias reglas para una columna, se combinan con AND.
     """
-    rules = load_rules()
-    results = {}
-    
-    for rule in rules:
-        col_name = rule['field']
-        res = apply_rule(df, rule)
-        
-        # Si ya hay resultados para esta columna (múltiples reglas), hacemos AND
-        if col_name in results:
-            results[col_name] = results[col_name] & res
-        else:
-            results[col_name] = res
-            
-    return pd.DataFrame(results, index=df.index)
+    rules = rule_set()
+    return pd.DataFrame({field: rules.evaluate(df, field) for field in rules.fields}, index=df.index)
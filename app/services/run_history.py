@@ -0,0 +1,121 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+
+class RunHistoryStore:
+    """
+    Historial de corridas (SQLite) para consultas de tendencia y regresiones:
+    - `runs`: una fila por corrida (filas procesadas, lotes, incidencias, estado, huella de reglas).
+      Estado 'ok': corrida completa; 'incremental': solo revalidó artículos nuevos o modificados
+      (sus métricas son del delta, no del catálogo) y no entra en tendencias ni regresiones.
+    - `rule_metrics`: válidos/no válidos/nulos por corrida, etapa (profiling/quality) y regla.
+    - `stage_timings`: segundos por corrida y etapa (lectura, perfilamiento, calidad, ...).
+    main() agrega una corrida al terminar; las consultas no reprocesan datos.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY, started_at TEXT, finished_at TEXT, rows_processed INTEGER,
+                batches INTEGER, incidents INTEGER, status TEXT, rules_fingerprint TEXT);
+            CREATE INDEX IF NOT EXISTS ix_runs_started ON runs (started_at);
+            CREATE TABLE IF NOT EXISTS rule_metrics (
+                run_id TEXT, stage TEXT, rule TEXT, rows INTEGER, valid INTEGER, invalid INTEGER,
+                nulls INTEGER, PRIMARY KEY (run_id, stage, rule));
+            CREATE INDEX IF NOT EXISTS ix_rule_metrics_rule ON rule_metrics (stage, rule, run_id);
+            CREATE TABLE IF NOT EXISTS stage_timings (
+                run_id TEXT, stage TEXT, seconds REAL, PRIMARY KEY (run_id, stage));
+        """)
+
+    def record_run(self, run_id, started_at, finished_at=None, rows_processed=0, batches=0, incidents=0,
+                   aggregates=None, timings=None, status='ok', rules_fingerprint=None):
+        """
+        Guarda una corrida. `aggregates` es el ProfileAggregates de la corrida (conteos por regla)
+        y `timings` un dict {etapa: segundos}.
+        """
+        finished_at = finished_at or datetime.now()
+        metrics = []
+        if aggregates is not None:
+            for stage, counts in (('profiling', aggregates.profiling), ('quality', aggregates.quality)):
+                for rule, rows in counts.rows.items():
+                    valid = int(counts.valid[rule])
+                    nulls = int(counts.nulls[rule]) if counts.with_nulls else None
+                    metrics.append((run_id, stage, rule, int(rows), valid, int(rows) - valid, nulls))
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                              (run_id, _iso(started_at), _iso(finished_at), int(rows_processed), int(batches),
+                               int(incidents), status, rules_fingerprint))
+            self.conn.execute("DELETE FROM rule_metrics WHERE run_id = ?", (run_id,))
+            self.conn.executemany("INSERT INTO rule_metrics VALUES (?, ?, ?, ?, ?, ?, ?)", metrics)
+            self.conn.execute("DELETE FROM stage_timings WHERE run_id = ?", (run_id,))
+            self.conn.executemany("INSERT INTO stage_timings VALUES (?, ?, ?)",
+                                  [(run_id, stage, float(sec)) for stage, sec in (timings or {}).items()])
+
+    # --- Consultas ---
+    def recent_runs(self, limit=20) -> pd.DataFrame:
+        """Últimas corridas (más reciente primero)."""
+        return pd.read_sql("SELECT * FROM runs ORDER BY started_at DESC LIMIT ?", self.conn, params=(limit,))
+
+    def pass_rate_trend(self, rule=None, stage='quality', days=90) -> pd.DataFrame:
+        """
+        Tasa de cumplimiento por corrida en los últimos `days` días (de una regla o de todas).
+        Columnas: run_id, started_at, rule, valid, invalid, pass_rate.
+        """
+        since = _iso(datetime.now() - timedelta(days=days))
+        query = """
+            SELECT r.run_id, r.started_at, m.rule, m.valid, m.invalid,
+                   CAST(m.valid AS REAL) / NULLIF(m.rows, 0) AS pass_rate
+            FROM rule_metrics m JOIN runs r ON r.run_id = m.run_id
+            WHERE m.stage = ? AND r.started_at >= ? AND r.status = 'ok'
+        """
+        params = [stage, since]
+        if rule is not None:
+            query += " AND m.rule = ?"
+            params.append(rule)
+        query += " ORDER BY m.rule, r.started_at"
+        return pd.read_sql(query, self.conn, params=params)
+
+    def stage_timing_trend(self, days=90) -> pd.DataFrame:
+        """Segundos por etapa y corrida en los últimos `days` días."""
+        since = _iso(datetime.now() - timedelta(days=days))
+        return pd.read_sql("""
+            SELECT r.run_id, r.started_at, t.stage, t.seconds
+            FROM stage_timings t JOIN runs r ON r.run_id = t.run_id
+            WHERE r.started_at >= ? ORDER BY r.started_at, t.stage
+        """, self.conn, params=(since,))
+
+    def regressions(self, stage='quality', threshold=0.05, baseline_runs=5) -> pd.DataFrame:
+        """
+        Reglas cuya tasa de cumplimiento en la última corrida cayó más de `threshold`
+        respecto del promedio de las `baseline_runs` corridas anteriores.
+        Columnas: rule, baseline_rate, last_rate, drop (ordenado de mayor a menor caída).
+        """
+        runs = pd.read_sql("SELECT run_id FROM runs WHERE status = 'ok' ORDER BY started_at DESC LIMIT ?",
+                           self.conn, params=(baseline_runs + 1,))['run_id'].tolist()
+        empty = pd.DataFrame(columns=['rule', 'baseline_rate', 'last_rate', 'drop'])
+        if len(runs) < 2:
+            return empty
+        marks = ",".join("?" * len(runs))
+        rates = pd.read_sql(f"""
+            SELECT run_id, rule, CAST(valid AS REAL) / NULLIF(rows, 0) AS pass_rate
+            FROM rule_metrics WHERE stage = ? AND run_id IN ({marks})
+        """, self.conn, params=[stage, *runs])
+        last = rates[rates['run_id'] == runs[0]].set_index('rule')['pass_rate']
+        baseline = rates[rates['run_id'] != runs[0]].groupby('rule')['pass_rate'].mean()
+        result = pd.DataFrame({'baseline_rate': baseline, 'last_rate': last}).dropna()
+        result['drop'] = result['baseline_rate'] - result['last_rate']
+        result = result[result['drop'] > threshold].sort_values('drop', ascending=False)
+        return result.rename_axis('rule').reset_index() if not result.empty else empty
+
+    def close(self):
+        self.conn.close()
+
+
+def _iso(value):
+    return value.isoformat(timespec='seconds') if isinstance(value, datetime) else value
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+CATEGORICAL = 'category'
+NUMERIC = 'numeric'
+
+# Esquema de la vista SB1_VIEW_PRODUCTO_TERMINADO_GD:
+# - category: texto con dominio pequeño (banderas Y/N, códigos de método, almacén...)
+# - numeric: códigos y medidas; se tipan una sola vez al leer el chunk
+VIEW_SCHEMA = {
+    "ItemType": CATEGORICAL,
+    "InvntItem": CATEGORICAL,
+    "SellItem": CATEGORICAL,
+    "PrchseItem": CATEGORICAL,
+    "WTLiable": CATEGORICAL,
+    "IndirctTax": CATEGORICAL,
+    "MngMethod": CATEGORICAL,
+    "TaxCodeAR": CATEGORICAL,
+    "GLMethod": CATEGORICAL,
+    "EvalSystem": CATEGORICAL,
+    "InvntryUom": CATEGORICAL,
+    "DfltWH": CATEGORICAL,
+    "PlaningSys": CATEGORICAL,
+    "QryGroup1": CATEGORICAL,
+    "QryGroup2": CATEGORICAL,
+    "U_beas_gruppe": CATEGORICAL,
+    "U_beas_prccode": CATEGORICAL,
+    "U_beas_prodrelease": CATEGORICAL,
+    "U_beas_batchroh": CATEGORICAL,
+    "U_beas_dispo": CATEGORICAL,
+    "U_EMPA_CARACTERISTICA_TIPO": CATEGORICAL,
+    "U_EMPA_CARACTERISTICA_MP": CATEGORICAL,
+
+    "ItmsGrpCod": NUMERIC,
+    "UgpEntry": NUMERIC,
+    "PriceUnit": NUMERIC,
+    "ItemClass": NUMERIC,
+    "PricingPrc": NUMERIC,
+    "IWeight1": NUMERIC,
+    "LeadTime": NUMERIC,
+    "ToleranDay": NUMERIC,
+    "U_EMPA_ESPESOR": NUMERIC,
+    "U_EMPA_DESIDAD": NUMERIC,
+    "U_EMPA_ANCHO": NUMERIC,
+    "U_PLG_CICLE": NUMERIC,
+}
+
+# Enteros exactos en float32 (mantisa de 24 bits)
+_FLOAT32_EXACT_LIMIT = 2 ** 24
+_INT32_LIMIT = 2 ** 31 - 1
+
+
+def compact_numeric(col: pd.Series) -> pd.Series:
+    """
+    Reduce una columna numérica al dtype más chico que la representa exactamente:
+    - enteros sin nulos -> int32,
+    - enteros con nulos (NaN) -> float32,
+    - decimales -> float64.
+    Las columnas que no llegan como numéricas (texto, mezclas con valores sucios) se dejan
+    tal cual, para que las reglas sigan reportando el valor original.
+    """
+    if not pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col):
+        return col
+    values = col.to_numpy(dtype=np.float64, na_value=np.nan)
+    finite = values[~np.isnan(values)]
+    magnitude = np.abs(finite).max() if len(finite) else 0
+    if col.dtype.kind in 'iu':
+        return col.astype(np.int32) if magnitude <= _INT32_LIMIT else col
+    integral = bool(np.all(finite == np.floor(finite)))
+    if integral and magnitude < _FLOAT32_EXACT_LIMIT:
+        return col.astype(np.float32)
+    return col
+
+
+def _category_dtype(col: pd.Series):
+    """
+    Tipo categórico para `col`. Si es de objetos, las categorías también lo son (pandas 3
+    inferiría str): así el nulo original (None) se puede recuperar al reportar y al decodificar.
+    """
+    if col.dtype != object:
+        return 'category'
+    categories = pd.Index(col.dropna().unique(), dtype=object)
+    try:
+        categories = categories.sort_values()
+    except TypeError:
+        pass  # Tipos mezclados: orden de aparición
+    return pd.CategoricalDtype(categories)
+
+
+def apply_schema(df: pd.DataFrame, schema=None) -> pd.DataFrame:
+    """
+    Aplica el esquema de la vista a un chunk recién leído (una sola vez por chunk):
+    categóricas para texto de dominio pequeño y numéricos compactos para códigos y medidas.
+    Las columnas ausentes en el chunk se ignoran.
+    """
+    schema = VIEW_SCHEMA if schema is None else schema
+    typed = {}
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind == CATEGORICAL:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                typed[col] = df[col].astype(_category_dtype(df[col]))
+        elif kind == NUMERIC:
+            typed[col] = compact_numeric(df[col])
+    if not typed:
+        return df
+    return df.assign(**typed)
+
+
+def decode_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte las columnas categóricas a su tipo base (para reglas que escriben valores nuevos).
+    Con categorías de objetos los nulos vuelven como None, como antes de apply_schema.
+    """
+    decoded = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            values = df[col].astype(df[col].cat.categories.dtype)
+            if values.dtype == object:
+                values = values.where(values.notna(), None)
+            decoded[col] = values
+    return df.assign(**decoded) if decoded else df
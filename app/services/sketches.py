@@ -0,0 +1,224 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Parámetros por defecto de los sketches (memoria fija por columna)
+HLL_PRECISION = 12          # 4096 registros de 1 byte (~1.6% de error en distintos)
+CMS_DEPTH = 4               # filas de Count-Min
+CMS_WIDTH = 4096            # contadores por fila (int64)
+TDIGEST_COMPRESSION = 100   # centroides ~ O(compresión)
+
+_U64 = np.uint64
+
+
+def hash_values(values) -> np.ndarray:
+    """Hash estable de 64 bits por valor (misma función para todos los sketches)."""
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = list(values)
+    return pd.util.hash_array(arr, categorize=False)
+
+
+def _leading_zeros(x: np.ndarray) -> np.ndarray:
+    """Ceros a la izquierda de cada uint64 (vectorizado, búsqueda binaria de 6 pasos)."""
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        small = x < (_U64(1) << _U64(64 - shift))
+        n[small] += shift
+        x[small] <<= _U64(shift)
+    n += ((x >> _U64(63)) == 0).astype(np.uint8)
+    return n
+
+
+class HyperLogLog:
+    """Conteo aproximado de valores distintos. Registros combinables con máximo."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        idx = (hashes >> _U64(64 - self.p)).astype(np.int64)
+        rest = (hashes << _U64(self.p)) | (_U64(1) << _U64(self.p - 1))
+        rank = _leading_zeros(rest) + 1
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: 'HyperLogLog'):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            return self.m * math.log(self.m / zeros)  # Corrección de rango pequeño
+        return float(raw)
+
+
+class CountMinSketch:
+    """Frecuencias aproximadas (sobreestima, nunca subestima). Combinable sumando tablas."""
+
+    def __init__(self, depth=CMS_DEPTH, width=CMS_WIDTH):
+        self.depth = depth
+        self.width = width
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, hashes):
+        h1 = hashes & _U64(0xFFFFFFFF)
+        h2 = hashes >> _U64(32)
+        with np.errstate(over='ignore'):
+            return [((h1 + _U64(i) * h2) % _U64(self.width)).astype(np.int64) for i in range(self.depth)]
+
+    def add_hashes(self, hashes: np.ndarray, counts: np.ndarray):
+        for row, cols in enumerate(self._columns(hashes)):
+            np.add.at(self.table[row], cols, counts)
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        if len(hashes) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.min([self.table[row][cols] for row, cols in enumerate(self._columns(hashes))], axis=0)
+
+    def merge(self, other: 'CountMinSketch'):
+        self.table += other.table
+        return self
+
+
+class TDigest:
+    """
+    Cuantiles aproximados de una columna numérica (t-digest con función de escala k1).
+    Los centroides se combinan y comprimen; la memoria queda en O(compresión).
+    """
+
+    def __init__(self, compression=TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+
+    @property
+    def total(self):
+        return float(self.weights.sum())
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inv(self, k):
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def update(self, values, weights=None):
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=np.float64)
+        keep = ~np.isnan(values)
+        if keep.any():
+            self.means = np.concatenate([self.means, values[keep]])
+            self.weights = np.concatenate([self.weights, weights[keep]])
+            self._compress()
+        return self
+
+    def merge(self, other: 'TDigest'):
+        return self.update(other.means, other.weights)
+
+    def _compress(self):
+        order = np.argsort(self.means, kind='stable')
+        means, weights = self.means[order], self.weights[order]
+        total = weights.sum()
+        out_m, out_w = [], []
+        cur_m, cur_w, done = means[0], weights[0], 0.0
+        q_limit = self._k_inv(min(self._k(0.0) + 1, self.compression / 4))
+        for m, w in zip(means[1:], weights[1:]):
+            if (done + cur_w + w) / total <= q_limit:
+                cur_m += (m - cur_m) * w / (cur_w + w)
+                cur_w += w
+            else:
+                out_m.append(cur_m)
+                out_w.append(cur_w)
+                done += cur_w
+                q_limit = self._k_inv(min(self._k(done / total) + 1, self.compression / 4))
+                cur_m, cur_w = m, w
+        out_m.append(cur_m)
+        out_w.append(cur_w)
+        self.means = np.asarray(out_m, dtype=np.float64)
+        self.weights = np.asarray(out_w, dtype=np.float64)
+
+    def quantile(self, q):
+        if len(self.means) == 0:
+            return np.nan
+        if len(self.means) == 1:
+            return float(self.means[0])
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.total, centers, self.means))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+
+class ColumnSketch:
+    """
+    Resumen aproximado de una columna de alta cardinalidad:
+    distintos (HyperLogLog), top-K por frecuencia (Count-Min + candidatos acotados),
+    cuantiles si es numérica (t-digest) y conteo exacto de filas y nulos.
+    """
+
+    def __init__(self, top_k=50):
+        self.top_k = top_k
+        self.capacity = 4 * top_k
+        self.rows = 0
+        self.nulls = 0
+        self.hll = HyperLogLog()
+        self.cms = CountMinSketch()
+        self.digest = TDigest()
+        self.candidates = {}  # hash -> valor original (a lo sumo `capacity`)
+
+    def update(self, values, counts):
+        """Agrega una tabla de frecuencias (valores no nulos distintos y sus conteos)."""
+        values = list(values)
+        if not values:
+            return self
+        counts = np.asarray(counts, dtype=np.int64)
+        hashes = hash_values(values)
+        self.rows += int(counts.sum())
+        self.hll.add_hashes(hashes)
+        self.cms.add_hashes(hashes, counts)
+        numeric = np.fromiter((_is_number(v) for v in values), dtype=bool, count=len(values))
+        if numeric.any():
+            self.digest.update([v for v, n in zip(values, numeric) if n], counts[numeric])
+        # Candidatos a top-K: los más frecuentes del lote más los ya vigentes
+        top = np.argsort(-counts, kind='stable')[:self.capacity]
+        for i in top:
+            self.candidates.setdefault(hashes[i], values[i])
+        self._prune()
+        return self
+
+    def _prune(self):
+        if len(self.candidates) <= self.capacity:
+            return
+        keys = np.fromiter(self.candidates.keys(), dtype=np.uint64, count=len(self.candidates))
+        estimates = self.cms.estimate_hashes(keys)
+        keep = keys[np.argsort(-estimates, kind='stable')[:self.capacity]]
+        self.candidates = {k: self.candidates[k] for k in keep}
+
+    def merge(self, other: 'ColumnSketch'):
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.hll.merge(other.hll)
+        self.cms.merge(other.cms)
+        self.digest.merge(other.digest)
+        for key, value in other.candidates.items():
+            self.candidates.setdefault(key, value)
+        self._prune()
+        return self
+
+    def top(self):
+        """Lista [(valor, conteo estimado)] de los K más frecuentes."""
+        keys = np.fromiter(self.candidates.keys(), dtype=np.uint64, count=len(self.candidates))
+        estimates = self.cms.estimate_hashes(keys)
+        order = np.argsort(-estimates, kind='stable')[:self.top_k]
+        return [(self.candidates[keys[i]], int(estimates[i])) for i in order]
+
+    def distinct(self):
+        return int(round(self.hll.estimate()))
@@ -0,0 +1,317 @@
+import numpy as np
+import pandas as pd
+
+from app.services.batch_context import SPECIAL_FUND_CODES
+
+# Generador sintético de la vista SB1_VIEW_PRODUCTO_TERMINADO_GD (benchmarks y pruebas de escala).
+# Cada fila nace válida según su familia (prefijo de ItemCode) y luego se le inyecta una mezcla de
+# errores (ERROR_MIX) y nulos. Misma semilla -> mismos datos; por chunks, cada chunk usa (semilla,
+# fila inicial) y los ItemCode siguen una secuencia global (únicos entre chunks).
+
+VIEW_COLUMNS = [
+    'ItemCode', 'ItemName', 'FrgnName', 'U_Codigo_Secundario', 'ItemType', 'ItemType_Significado',
+    'ItmsGrpCod', 'UgpEntry', 'InvntItem', 'SellItem', 'PrchseItem', 'PriceUnit', 'WTLiable',
+    'IndirctTax', 'ItemClass', 'MngMethod', 'TaxCodeAR', 'TaxCodeAR_NombreImpuesto', 'GLMethod',
+    'EvalSystem', 'IWeight1', 'InvntryUom', 'DfltWH', 'PlaningSys', 'PricingPrc', 'LeadTime',
+    'ToleranDay', 'QryGroup1', 'QryGroup2', 'U_beas_gruppe', 'U_beas_prccode', 'U_beas_prodrelease',
+    'U_beas_batchroh', 'PicturName', 'U_beas_dispo', 'U_EMPA_ESPESOR', 'U_EMPA_DESIDAD',
+    'U_EMPA_ANCHO', 'U_PLG_CICLE', 'U_EMPA_CARACTERISTICA_TIPO', 'U_EMPA_CARACTERISTICA_MP',
+]
+
+# Familias: prefijo de ItemCode -> (peso, tipo de nombre, UgpEntry, InvntryUom)
+FAMILIES = {
+    'PTEPET': (0.24, 'ENVASE', 1, 'UN'),
+    'PTEPAD': (0.04, 'ENVASE', 1, 'UN'),
+    'PTPR': (0.07, 'PREFORMA', 1, 'UN'),
+    'PTTAPA': (0.15, 'TAPA', 1, 'UN'),
+    'PTBALD': (0.05, 'BALDE', 1, 'UN'),
+    'PTMANI': (0.03, 'MANIJA', 1, 'UN'),
+    'PTREPO': (0.02, 'REPOSTERO', 1, 'UN'),
+    'PTLAMI': (0.15, 'LAMINA', 3, 'KG'),
+    'PTMANG': (0.10, 'MANGA', 3, 'KG'),
+    'PTFUND': (0.15, 'FUNDA', 1, 'UN'),
+}
+# ItmsGrpCod y dígitos del correlativo según ITEM_CODE_GROUP_PATTERNS: PTPR -> 103 (6 dígitos),
+# importados (IMP) -> 114 (4 dígitos), resto -> 102 (4 dígitos). Pasado el ancho, el correlativo
+# crece (ItemCode sigue único, pero sin la estructura del grupo). PTMANI/PTREPO no están en
+# ITEM_CODE_LIST_102: fallan la estructura de ItemCode, como en la vista
+PREFORM_PREFIX = 'PTPR'
+PRICE_UNIT_BY_UGP = {1: 8, 3: 2, 11: 13}
+
+MATERIALS = {
+    'ENVASE': ['PET', 'PEAD', 'PP'], 'PREFORMA': ['PET'], 'TAPA': ['PP', 'PEAD'], 'BALDE': ['PP', 'PEAD'],
+    'MANIJA': ['PP'], 'REPOSTERO': ['PP', 'PET'], 'LAMINA': ['PEBD', 'BOPP', 'CAST', 'MIX'],
+    'MANGA': ['PEBD', 'POLIOLEFINA'], 'FUNDA': ['PEBD', 'PEAD'],
+}
+COLORS = ['CRISTAL', 'AZUL', 'BLANCA', 'BLANCO', 'NEGRO', 'VERDE', 'AMBAR', 'ROJO', 'DORADA', 'TRANSPARENTE']
+CLIENTS = ['', '', '', 'DANEC', 'TERRAFERTIL', 'VOLCANIC', 'ORIENTAL', 'PRONACA', 'TESALIA', 'ACEITE LA FAVORITA']
+_VOLUMES = ['0.25', '0.5', '1', '1.5', '2', '3', '4', '5', '6', '10', '20']
+_NECKS = ['28', '38', '48', '53', '63', '1881']
+_USES = ['REPOSTERO', 'ROSCA', 'PRESION', 'ABREFACIL', 'DISPENSADORA']
+
+# Tipos de error por columna (se elige uno al azar por fila afectada)
+ERROR_MIX = {
+    'ItemCode': ['minusculas', 'corto', 'simbolo', 'sin_pt'],
+    'ItemName': ['minusculas', 'tilde', 'estructura', 'duplicado'],
+    'FrgnName': ['igual_nombre'],
+    'U_Codigo_Secundario': ['duplicado'],
+    'ItemType': ['valor'],
+    'UgpEntry': ['valor'],
+    'PriceUnit': ['valor'],
+    'InvntryUom': ['valor'],
+    'InvntItem': ['valor'],
+    'SellItem': ['valor'],
+    'PrchseItem': ['valor'],
+    'ItemClass': ['valor'],
+    'MngMethod': ['valor'],
+    'GLMethod': ['valor'],
+    'PlaningSys': ['valor'],
+    'PricingPrc': ['valor'],
+    'DfltWH': ['valor'],
+    'IWeight1': ['rango'],
+    'LeadTime': ['rango'],
+    'ToleranDay': ['rango'],
+    'U_beas_prccode': ['valor'],
+    'U_beas_prodrelease': ['valor'],
+    'U_beas_dispo': ['valor'],
+    'U_EMPA_ESPESOR': ['rango'],
+    'U_EMPA_ANCHO': ['rango'],
+    'U_PLG_CICLE': ['rango'],
+}
+# Valores incorrectos (tipo 'valor') y fuera de rango (tipo 'rango')
+_WRONG_VALUES = {
+    'ItemType': ['L', 'S'], 'UgpEntry': [2, 5], 'PriceUnit': [1, 5], 'InvntryUom': ['PKG', 'LB'],
+    'InvntItem': ['N'], 'SellItem': ['N'], 'PrchseItem': ['X'], 'ItemClass': [1], 'MngMethod': ['R'],
+    'GLMethod': ['L', 'W'], 'PlaningSys': ['N'], 'PricingPrc': [1], 'DfltWH': ['GYE', 'UIO_BODEGA'],
+    'U_beas_prccode': ['OTRO'], 'U_beas_prodrelease': ['N'], 'U_beas_dispo': ['K', 'C'],
+}
+_OUT_OF_RANGE = {
+    'IWeight1': [0, 1500, 2000], 'LeadTime': [0, 25, 40], 'ToleranDay': [30, -1],
+    'U_EMPA_ESPESOR': [10, 130], 'U_EMPA_ANCHO': [2, 150], 'U_PLG_CICLE': [0.5, 200],
+}
+
+# Tasa de nulos base de columnas opcionales (se suma a `null_rate` del resto)
+OPTIONAL_NULL_RATES = {'FrgnName': 0.4, 'U_Codigo_Secundario': 0.3, 'PicturName': 0.7}
+NOT_NULL_COLUMNS = {'ItemCode', 'ItemName'}
+
+_FRGN_TYPES = {
+    'ENVASE': 'BOTTLE', 'PREFORMA': 'PREFORM', 'TAPA': 'CAP', 'BALDE': 'BUCKET', 'MANIJA': 'HANDLE',
+    'REPOSTERO': 'CONTAINER', 'LAMINA': 'FILM', 'MANGA': 'SLEEVE', 'FUNDA': 'BAG',
+}
+
+
+def _pick(rng, pool, n):
+    return np.asarray(pool, dtype=object)[rng.integers(len(pool), size=n)]
+
+
+def _measure(rng, low, high, n, decimals=1):
+    """Medidas como texto (peso, ancho, micras...): continuas para que los nombres no se repitan."""
+    values = np.round(rng.uniform(low, high, size=n), decimals)
+    return (values.astype(np.int64) if decimals == 0 else values).astype(str).astype(object)
+
+
+def _join(*parts):
+    """Concatena arreglos/escalares de texto elemento a elemento (espacios ya incluidos)."""
+    result = np.asarray(parts[0], dtype=object)
+    for part in parts[1:]:
+        result = result + np.asarray(part, dtype=object)
+    return result
+
+
+def _names(kind, rng, n):
+    """ItemName con el formato de la familia (ver ITEM_NAME_STRICT_PATTERNS) y su material."""
+    mat = _pick(rng, MATERIALS[kind], n)
+    color = _pick(rng, COLORS, n)
+    client = _pick(rng, CLIENTS, n)
+    client = np.where(client == '', '', ' ' + client.astype(str)).astype(object)
+    if kind == 'ENVASE':
+        unit = _pick(rng, ['LT', 'ML', 'GL'], n)
+        mix = np.where(rng.random(n) < 0.3, ' R', '').astype(object)
+        neck = np.where(rng.random(n) < 0.4, _join(' ', _pick(rng, _NECKS, n), ' mm'), '').astype(object)
+        name = _join('ENVASE ', mat, ' ', _pick(rng, _VOLUMES, n), ' ', unit, ' ', color, client, ' ',
+                     _measure(rng, 8, 150, n), ' G', mix, neck)
+    elif kind == 'PREFORMA':
+        name = _join('PREFORMA ', mat, ' ', _measure(rng, 8, 90, n), ' GR ', color, client, ' R ',
+                     _pick(rng, _NECKS, n))
+    elif kind == 'TAPA':
+        name = _join('TAPA ', mat, ' ', _pick(rng, _USES, n), ' ', color, ' ', _measure(rng, 100, 999, n, 0),
+                     ' - ', _measure(rng, 1000, 4000, n, 0), ' GR', client)
+    elif kind == 'LAMINA':
+        name = _join('LAMINA ', mat, ' ', _measure(rng, 8, 120, n), ' CM X ', _measure(rng, 20, 150, n, 0), ' MC ',
+                     color, client)
+    elif kind == 'MANGA':
+        name = _join('MANGA ', mat, ' ', _measure(rng, 5, 58, n), ' "" X ', _measure(rng, 20, 150, n, 0), ' MC ', color)
+    elif kind == 'FUNDA':
+        name = _join('FUNDA ', mat, ' ', _measure(rng, 6, 48, n), '"" X ', _measure(rng, 6, 60, n), '"" X ',
+                     _measure(rng, 20, 150, n, 0), ' MC ', color)
+    else:  # BALDE, MANIJA, REPOSTERO: patrón general por prefijo ([Tipo] [Material] ...)
+        name = _join(kind, ' ', mat, ' ', _measure(rng, 0.5, 30, n), ' LT ', color, client)
+    return name, mat
+
+
+def generate_items(n, seed=0, start=0, error_rate=0.05, null_rate=0.01, import_rate=0.03):
+    """
+    DataFrame de `n` artículos sintéticos de la vista (columnas VIEW_COLUMNS, tipos como llegan
+    de HANA: texto y números como float, sin esquema aplicado).
+    - `start`: posición del primer artículo en la secuencia global (ItemCode únicos entre chunks).
+    - `error_rate`: probabilidad por fila y columna de ERROR_MIX de recibir un error.
+    - `null_rate`: probabilidad de nulo en columnas que no son ItemCode/ItemName.
+    - `import_rate`: proporción de artículos importados (ItemCode con IMP, PrchseItem='Y').
+    """
+    rng = np.random.default_rng([seed, start])
+    prefixes = list(FAMILIES)
+    weights = np.array([FAMILIES[p][0] for p in prefixes])
+    family = rng.choice(len(prefixes), size=n, p=weights / weights.sum())
+    seq = start + np.arange(n)
+    # Los correlativos de los códigos especiales (PTFUND0212/0216) no se repiten en PTFUND
+    reserved = np.isin(seq, [int(c[len('PTFUND'):]) for c in SPECIAL_FUND_CODES])
+    family[reserved & (family == prefixes.index('PTFUND'))] = prefixes.index('PTEPET')
+
+    prefix = np.asarray(prefixes, dtype=object)[family]
+    preform = prefix == PREFORM_PREFIX
+    imported = (rng.random(n) < import_rate) & ~preform
+    number = pd.Series(seq)
+    digits = np.where(preform, number.map('{:06d}'.format), number.map('{:04d}'.format)).astype(object)
+    code = _join(prefix, np.where(imported, 'IMP', ''), digits)
+    group = np.where(preform, 103.0, np.where(imported, 114.0, 102.0))
+
+    name = np.empty(n, dtype=object)
+    material = np.empty(n, dtype=object)
+    frgn = np.empty(n, dtype=object)
+    ugp = np.empty(n, dtype=np.float64)
+    uom = np.empty(n, dtype=object)
+    for i, p in enumerate(prefixes):
+        rows = np.flatnonzero(family == i)
+        if not len(rows):
+            continue
+        _, kind, fam_ugp, fam_uom = FAMILIES[p]
+        name[rows], material[rows] = _names(kind, rng, len(rows))
+        frgn[rows] = _join(_FRGN_TYPES[kind], ' ', material[rows])
+        ugp[rows], uom[rows] = fam_ugp, fam_uom
+
+    # Casos especiales PTFUND0212/PTFUND0216 (UgpEntry=11) al inicio de la secuencia
+    for offset, special in enumerate(SPECIAL_FUND_CODES):
+        if start <= offset < start + n:
+            row = offset - start
+            code[row], ugp[row], uom[row], group[row] = special, 11, 'PKG', 102
+            name[row], material[row], prefix[row] = 'FUNDA PEBD 12"" X 18"" X 50 MC TRANSPARENTE', 'PEBD', 'PTFUND'
+
+    lami = np.isin(prefix, ['PTLAMI'])
+    mang = np.isin(prefix, ['PTMANG'])
+    lami_mang = lami | mang
+    fund = np.isin(prefix, ['PTFUND'])
+    lead = rng.integers(1, 21, size=n).astype(np.float64)
+
+    text = lambda value: np.full(n, value, dtype=object)
+    data = {
+        'ItemCode': code,
+        'ItemName': name,
+        'FrgnName': frgn,
+        'U_Codigo_Secundario': _join('SC', pd.Series(seq).map('{:08X}'.format).to_numpy(dtype=object)),
+        'ItemType': text('I'),
+        'ItemType_Significado': text('Artículo de inventario'),
+        'ItmsGrpCod': group,
+        'UgpEntry': ugp,
+        'InvntItem': text('Y'),
+        'SellItem': text('Y'),
+        'PrchseItem': np.where(imported, 'Y', 'N').astype(object),
+        'PriceUnit': pd.Series(ugp).map(PRICE_UNIT_BY_UGP).to_numpy(dtype=np.float64),
+        'WTLiable': text('N'),
+        'IndirctTax': text('Y'),
+        'ItemClass': np.full(n, 2.0),
+        'MngMethod': text('A'),
+        'TaxCodeAR': text('IVAV15'),
+        'TaxCodeAR_NombreImpuesto': text('IVA VENTAS 15%'),
+        'GLMethod': text('C'),
+        'EvalSystem': text('A'),
+        'IWeight1': np.round(rng.uniform(0.01, 900, size=n), 2),
+        'InvntryUom': uom,
+        'DfltWH': _pick(rng, ['UIO_PROD', 'GYE_PROD'], n),
+        'PlaningSys': text('M'),
+        'PricingPrc': np.zeros(n),
+        'LeadTime': lead,
+        'ToleranDay': 20 - lead,
+        'QryGroup1': _pick(rng, ['Y', 'N'], n),
+        'QryGroup2': _pick(rng, ['Y', 'N'], n),
+        'U_beas_gruppe': material,
+        'U_beas_prccode': material,
+        'U_beas_prodrelease': text('Y'),
+        'U_beas_batchroh': text('Y'),
+        'PicturName': _join(code, '.jpg'),
+        'U_beas_dispo': _pick(rng, ['A', 'B'], n),
+        'U_EMPA_ESPESOR': np.where(lami_mang, rng.integers(25, 126, size=n), np.nan),
+        'U_EMPA_DESIDAD': np.where(lami_mang, 0.92, np.nan),
+        'U_EMPA_ANCHO': np.where(lami, np.round(rng.uniform(8.4, 120, size=n), 1),
+                                 np.where(mang, np.round(rng.uniform(5, 58, size=n), 1), np.nan)),
+        'U_PLG_CICLE': np.where(lami_mang | fund, np.nan, np.round(rng.uniform(1, 160, size=n), 2)),
+        'U_EMPA_CARACTERISTICA_TIPO': _pick(rng, ['ESPECIFICO', 'GENERICO'], n),
+        'U_EMPA_CARACTERISTICA_MP': material,
+    }
+
+    # Errores y nulos sobre los arreglos; el DataFrame se arma una sola vez
+    _inject_errors(data, rng, error_rate)
+    _inject_nulls(data, rng, null_rate)
+    return pd.DataFrame({col: data[col] for col in VIEW_COLUMNS})
+
+
+def iter_item_chunks(total, chunk_size=50000, seed=0, **kwargs):
+    """Genera `total` artículos en chunks de `chunk_size` (como fetch_data_in_chunks)."""
+    for start in range(0, total, chunk_size):
+        yield generate_items(min(chunk_size, total - start), seed=seed, start=start, **kwargs)
+
+
+def _inject_errors(data, rng, rate):
+    n = len(data['ItemCode'])
+    if not n or rate <= 0:
+        return
+    for col, kinds in ERROR_MIX.items():
+        rows = np.flatnonzero(rng.random(n) < rate)
+        if not len(rows):
+            continue
+        kind = np.asarray(kinds, dtype=object)[rng.integers(len(kinds), size=len(rows))]
+        values = data[col].copy()
+        for k in kinds:
+            target = rows[kind == k]
+            if len(target):
+                values[target] = _error_values(data, col, k, target, rng)
+        data[col] = values
+
+
+def _error_values(data, col, kind, rows, rng):
+    n = len(rows)
+    if kind == 'valor':
+        return _pick(rng, _WRONG_VALUES[col], n)
+    if kind == 'rango':
+        return _pick(rng, _OUT_OF_RANGE[col], n)
+    if kind == 'duplicado':
+        return data[col][rng.integers(len(data[col]), size=n)]
+    if kind == 'igual_nombre':
+        return data['ItemName'][rows]
+    text = pd.Series(data[col][rows], dtype=object).astype(str)
+    if kind == 'minusculas':
+        text = text.str.lower()
+    elif kind == 'corto':  # Sin la familia: PTEPET0002 -> PT0002 (sigue siendo único)
+        text = text.str.slice(0, 2) + text.str.slice(6)
+    elif kind == 'simbolo':
+        text = text.str.slice(0, 6) + '-' + text.str.slice(6)
+    elif kind == 'sin_pt':
+        text = 'XX' + text.str.slice(2)
+    elif kind == 'tilde':
+        text = text.str.replace('A', 'Á', n=1)
+    elif kind == 'estructura':
+        text = text.str.replace(r'^(\S+) (\S+)', r'\1 XYZ', regex=True)
+    else:
+        raise ValueError(f"Tipo de error desconocido: {kind}")
+    return text.to_numpy(dtype=object)
+
+
+def _inject_nulls(data, rng, rate):
+    for col, values in data.items():
+        if col in NOT_NULL_COLUMNS:
+            continue
+        p = rate + OPTIONAL_NULL_RATES.get(col, 0.0)
+        rows = np.flatnonzero(rng.random(len(values)) < p) if p > 0 else []
+        if len(rows):
+            values = values.copy()
+            values[rows] = np.nan if values.dtype.kind == 'f' else None
+            data[col] = values
@@ -0,0 +1,158 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from app.services.batch_context import get_context
+
+# Columnas con regla de unicidad (quality) y cómo se obtiene la clave de cada fila:
+# el mismo texto que compara `duplicated()` en la regla; las filas sin clave no se indexan
+# (los nulos/vacíos ya son inválidos por la propia regla).
+UNIQUE_KEYS = {
+    'ItemCode': lambda df, ctx: ctx.code,
+    'ItemName': lambda df, ctx: ctx.name_stripped,
+    'U_Codigo_Secundario': lambda df, ctx: df['U_Codigo_Secundario'].astype(str).where(
+        df['U_Codigo_Secundario'].notna()),
+}
+
+# Columnas de cada entrada del índice
+ENTRY_COLUMNS = ['hash', 'batch', 'row', 'valid', 'ItemCode', 'ItemName', 'value']
+
+# Salida de la pasada final: todas las apariciones de claves repetidas en la corrida
+DUPLICATE_COLUMNS = ['Atributo', 'valor', 'ItemCode', 'ItemName', 'lote', 'fila', 'valido_en_lote',
+                     'apariciones', 'primer_ItemCode', 'primer_lote']
+
+
+class UniquenessIndex:
+    """
+    Índice global de unicidad (ItemCode, ItemName, U_Codigo_Secundario) de toda la corrida.
+    - `add_batch` registra, por columna, la clave de cada fila (hash de 64 bits), su lote,
+      su posición y si la regla la dio por válida dentro del lote.
+    - Las entradas se reparten en `partitions` particiones por hash; si lo acumulado en memoria
+      supera `memory_mb`, las particiones se vuelcan a disco (un archivo por volcado).
+    - `finalize` recorre una partición a la vez (memoria acotada) y retorna todas las
+      apariciones de claves repetidas en cualquier lote, con la primera aparición de cada una.
+    Los duplicados dentro de un lote los sigue marcando la regla; el índice agrega los que
+    quedan repartidos entre lotes.
+    En modo incremental, `add_seed` agrega las claves guardadas de los artículos sin cambios
+    (lote 0), para que la unicidad siga siendo sobre todo el catálogo.
+    """
+
+    def __init__(self, spill_dir, memory_mb=64, partitions=16, columns=None):
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = tempfile.mkdtemp(prefix="unicidad_", dir=spill_dir)
+        self.memory_bytes = memory_mb * 1024 * 1024
+        self.partitions = max(1, partitions)
+        self.columns = list(columns or UNIQUE_KEYS)
+        self.spills = 0
+        self._memory = {col: [[] for _ in range(self.partitions)] for col in self.columns}
+        self._files = {col: [[] for _ in range(self.partitions)] for col in self.columns}
+        self._bytes = 0
+
+    def add_batch(self, batch_index, df, results, ctx=None):
+        """Registra las claves del lote. `results` es la matriz de calidad del lote (True=Válido)."""
+        ctx = get_context(df, ctx)
+        for col in self.columns:
+            if col not in df.columns or col not in results.columns:
+                continue
+            keys = UNIQUE_KEYS[col](df, ctx)
+            present = (keys.notna() & (keys != 'nan') & (keys != '')).to_numpy(dtype=bool)
+            rows = np.flatnonzero(present)
+            if not len(rows):
+                continue
+            values = keys.iloc[rows].astype(str)
+            # Textos como `str` (Arrow si está disponible): memoria compacta y fácil de medir
+            entries = pd.DataFrame({
+                'hash': pd.util.hash_pandas_object(values, index=False).to_numpy(),
+                'batch': np.full(len(rows), batch_index, dtype=np.int32),
+                'row': rows.astype(np.int32),
+                'valid': np.asarray(results[col], dtype=bool)[rows],
+                'ItemCode': ctx.code.iloc[rows].astype(str).to_numpy(),
+                'ItemName': ctx.name.iloc[rows].astype(str).to_numpy(),
+                'value': values.to_numpy(),
+            }, columns=ENTRY_COLUMNS)
+            part = entries['hash'].to_numpy() % np.uint64(self.partitions)
+            for p in np.unique(part):
+                chunk = entries[part == p]
+                self._memory[col][p].append(chunk)
+                self._bytes += int(chunk.memory_usage(deep=True).sum())
+        if self._bytes > self.memory_bytes:
+            self._spill()
+
+    def add_seed(self, col, entries):
+        """Agrega entradas ya calculadas (ENTRY_COLUMNS) de artículos de corridas anteriores, como lote 0."""
+        if col not in self.columns or entries.empty:
+            return
+        entries = entries.assign(batch=np.int32(0))[ENTRY_COLUMNS]
+        part = entries['hash'].to_numpy(dtype=np.uint64) % np.uint64(self.partitions)
+        for p in np.unique(part):
+            chunk = entries[part == p]
+            self._memory[col][p].append(chunk)
+            self._bytes += int(chunk.memory_usage(deep=True).sum())
+        if self._bytes > self.memory_bytes:
+            self._spill()
+
+    def _spill(self):
+        """Vuelca a disco todas las particiones en memoria."""
+        for col, parts in self._memory.items():
+            for p, chunks in enumerate(parts):
+                if not chunks:
+                    continue
+                path = os.path.join(self.spill_dir, f"{col}__{p:03d}__{len(self._files[col][p]):05d}.pkl")
+                pd.concat(chunks, ignore_index=True).to_pickle(path)
+                self._files[col][p].append(path)
+                parts[p] = []
+        self._bytes = 0
+        self.spills += 1
+
+    def _partition(self, col, p):
+        chunks = [pd.read_pickle(path) for path in self._files[col][p]] + self._memory[col][p]
+        if not chunks:
+            return pd.DataFrame(columns=ENTRY_COLUMNS)
+        return pd.concat(chunks, ignore_index=True)
+
+    def finalize(self, on_partition=None) -> pd.DataFrame:
+        """
+        Pasada final: todas las apariciones de claves repetidas en la corrida (ver
+        DUPLICATE_COLUMNS), ordenadas por atributo, lote y fila.
+        `on_partition(columna, entradas)`, si se indica, recibe las entradas de los lotes de esta
+        corrida partición por partición (p. ej. para guardarlas en el estado incremental).
+        """
+        found = []
+        for col in self.columns:
+            parts = []
+            for p in range(self.partitions):
+                entries = self._partition(col, p)
+                if on_partition is not None:
+                    on_partition(col, entries[entries['batch'] > 0])
+                dup = entries[entries['hash'].duplicated(keep=False)]
+                if dup.empty:
+                    continue
+                dup = dup.sort_values(['batch', 'row'], kind='stable')
+                first = dup.drop_duplicates('hash').set_index('hash')
+                parts.append(pd.DataFrame({
+                    'Atributo': col,
+                    'valor': dup['value'],
+                    'ItemCode': dup['ItemCode'],
+                    'ItemName': dup['ItemName'],
+                    'lote': dup['batch'],
+                    'fila': dup['row'],
+                    'valido_en_lote': dup['valid'],
+                    'apariciones': dup.groupby('hash', sort=False)['hash'].transform('size'),
+                    'primer_ItemCode': dup['hash'].map(first['ItemCode']),
+                    'primer_lote': dup['hash'].map(first['batch']),
+                }, columns=DUPLICATE_COLUMNS))
+            if parts:
+                found.append(pd.concat(parts).sort_values(['lote', 'fila'], kind='stable'))
+        if not found:
+            return pd.DataFrame(columns=DUPLICATE_COLUMNS)
+        return pd.concat(found, ignore_index=True)
+
+    def close(self):
+        """Borra los volcados temporales del índice."""
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+        self._memory = {col: [[] for _ in range(self.partitions)] for col in self.columns}
+        self._files = {col: [[] for _ in range(self.partitions)] for col in self.columns}
+        self._bytes = 0
@@ -1,3 +1,75 @@
+import pandas as pd
+from types import MappingProxyType
+
+# Significado de los valores por campo (Diccionario de Datos)
+_MEANINGS = {
+    "UgpEntry": {
+        "1": "UN",
+        "3": "KG",
+        "11": "UNDPKG",
+        "-1": "Manual"
+    },
+    "ItemType": {
+        "I": "Artículos",
+        "L": "Trabajo", 
+        "T": "Viaje"
+    },
+    "InvntItem": {"Y": "Articulo de inventario", "N": "No"},
+    "SellItem": {"Y": "Articulo de venta", "N": "No"},
+    "PrchseItem": {"Y": "Articulo de compra", "N": "No"},
+    "WTLiable": {"Y": "Sujeto a retencion de impuesto", "N": "No"},
+    "IndirctTax": {"Y": "Impuesto indirecto", "N": "No"},
+    "QryGroup1": {"Y": "Si", "N": "No"},
+    "QryGroup2": {"Y": "Si", "N": "No"},
+    "U_beas_prodrelease": {"Y": "Sí - Liberación de Producción Permitida", "N": "No"},
+    "U_beas_batchroh": {
+        "N": "Determinación automática de lote",
+        "J": "Lote como material", 
+        "M": "Introducir lotes manualmente"
+    },
+    "MngMethod": {
+        "A": "En todas las transacciones",
+        "R": "Solo en release"
+    },
+    "GLMethod": {
+        "C": "Por Grupo de Artículos",
+        "L": "Por Nivel de Artículo",
+        "W": "Por Almacén" 
+    },
+    "EvalSystem": {
+        "A": "Promedio Ponderado",
+        "S": "Estándar",
+        "F": "FIFO"
+    },
+    "PlaningSys": {
+        "M": "PNM",
+        "N": "Ninguno"
+    },
+    "ItemClass": {
+        "0": "Ninguno",
+        "1": "Numeros de serie",
+        "2": "Lotes"
+    },
+    "U_beas_dispo": {
+        "B": "Orientado a Stock",
+        "A": "Por Orden",
+        "S": "Artículo Fantasma",
+        "K": "No hay resolución"
+    }
+}
+
+# Tablas congeladas a nivel de módulo: se construyen una sola vez al importar.
+VALUE_MEANINGS = MappingProxyType({
+    col: MappingProxyType(values) for col, values in _MEANINGS.items()
+})
+
+# Texto ya formateado "Valor - Significado" por campo, listo para Series.map
+_DECORATED_MEANINGS = MappingProxyType({
+    col: MappingProxyType({val: f"{val} - {meaning}" for val, meaning in values.items()})
+    for col, values in _MEANINGS.items()
+})
+
+
 def get_value_meaning(col_name, value):
     """
     Retorna el significado del valor para campos específicos.
@@ -6,67 +78,24 @@ def get_value_meaning(col_name, value):
     if str(value) == 'nan' or value is None or str(value).strip() == '':
         return value
 
-    val_str = str(value).strip()
-    
-    mappings = {
-        "UgpEntry": {
-            "1": "UN",
-            "3": "KG",
-            "11": "UNDPKG",
-            "-1": "Manual"
-        },
-        "ItemType": {
-            "I": "Artículos",
-            "L": "Trabajo", 
-            "T": "Viaje"
-        },
-        "InvntItem": {"Y": "Articulo de inventario", "N": "No"},
-        "SellItem": {"Y": "Articulo de venta", "N": "No"},
-        "PrchseItem": {"Y": "Articulo de compra", "N": "No"},
-        "WTLiable": {"Y": "Sujeto a retencion de impuesto", "N": "No"},
-        "IndirctTax": {"Y": "Impuesto indirecto", "N": "No"},
-        "QryGroup1": {"Y": "Si", "N": "No"},
-        "QryGroup2": {"Y": "Si", "N": "No"},
-        "U_beas_prodrelease": {"Y": "Sí - Liberación de Producción Permitida", "N": "No"},
-        "U_beas_batchroh": {
-            "N": "Determinación automática de lote",
-            "J": "Lote como material", 
-            "M": "Introducir lotes manualmente"
-        },
-        "MngMethod": {
-            "A": "En todas las transacciones",
-            "R": "Solo en release"
-        },
-        "GLMethod": {
-            "C": "Por Grupo de Artículos",
-            "L": "Por Nivel de Artículo",
-            "W": "Por Almacén" 
-        },
-        "EvalSystem": {
-            "A": "Promedio Ponderado",
-            "S": "Estándar",
-            "F": "FIFO"
-        },
-        "PlaningSys": {
-            "M": "PNM",
-            "N": "Ninguno"
-        },
-        "ItemClass": {
-            "0": "Ninguno",
-            "1": "Numeros de serie",
-            "2": "Lotes"
-        },
-        "U_beas_dispo": {
-            "B": "Orientado a Stock",
-            "A": "Por Orden",
-            "S": "Artículo Fantasma",
-            "K": "No hay resolución"
-        }
-    }
-
-    if col_name in mappings:
-        meaning = mappings[col_name].get(val_str)
-        if meaning:
-            return f"{val_str} - {meaning}"
+    table = _DECORATED_MEANINGS.get(col_name)
+    if table is not None:
+        decorated = table.get(str(value).strip())
+        if decorated:
+            return decorated
     
     return value
+
+
+def map_value_meanings(col_name, series):
+    """
+    Versión vectorizada de get_value_meaning para una columna completa.
+    Los valores sin significado conocido se conservan tal cual.
+    """
+    series = series if isinstance(series, pd.Series) else pd.Series(series, dtype=object)
+    table = _DECORATED_MEANINGS.get(col_name)
+    if table is None or series.empty:
+        return series.astype(object)
+    text = series.astype(str).str.strip()
+    decorated = text.map(dict(table))
+    return series.astype(object).where(decorated.isna(), decorated)
@@ -0,0 +1,432 @@
+"""
+Benchmarks del pipeline sobre datos sintéticos (app/services/synthetic_data.py).
+
+Mide cada regla de PROFILING_RULES, QUALITY_RULES y CLEANING_RULES y cada etapa de
+main.process_batch (más unicidad y casi duplicados) para cada cantidad de filas pedida:
+segundos (mejor de --repeats), filas por segundo y memoria pico (tracemalloc, en una pasada
+aparte para no afectar los tiempos). Los resultados se guardan en JSON y se comparan contra
+una línea base: cualquier medición más lenta (o con más memoria) que la base más --tolerance
+es una regresión y el script termina con código 1 (para correrlo antes de la corrida nocturna).
+
+Uso:
+    python benchmarks/run_benchmarks.py --rows 10k,100k
+    python benchmarks/run_benchmarks.py --rows 1M,5M --repeats 1 --output outputs/bench.json
+    python benchmarks/run_benchmarks.py --rows 10k,100k --update-baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+# Campos de `meta` que deben coincidir para que la comparación con la base tenga sentido
+ENVIRONMENT_KEYS = ('machine', 'processor', 'cpu_count', 'python', 'pandas', 'numpy', 'pyarrow')
+
+
+def parse_rows(text):
+    """'10k,100k,1M' -> [10000, 100000, 1000000]."""
+    sizes = []
+    for item in text.split(','):
+        match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kKmM]?)\s*', item)
+        if not match:
+            raise argparse.ArgumentTypeError(f"Cantidad de filas inválida: {item}")
+        factor = {'': 1, 'k': 1000, 'm': 1000000}[match.group(2).lower()]
+        sizes.append(int(float(match.group(1)) * factor))
+    return sizes
+
+
+def _best_of(func, repeats):
+    """(mejor tiempo en segundos, resultado de la última llamada)."""
+    best, result = None, None
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _peak_mb(func):
+    """Memoria pico (MB) asignada durante `func` (tracemalloc: NumPy/pandas; no Arrow)."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+class _Totals:
+    """Acumula segundos (suma de chunks) y memoria pico (máximo de chunks) por medición."""
+
+    def __init__(self):
+        self.seconds, self.peak_mb = {}, {}
+
+    def add(self, key, seconds=None, peak_mb=None):
+        if seconds is not None:
+            self.seconds[key] = self.seconds.get(key, 0.0) + seconds
+        if peak_mb is not None:
+            self.peak_mb[key] = max(self.peak_mb.get(key, 0.0), peak_mb)
+
+    def results(self, rows):
+        return {
+            key: {
+                'seconds': round(seconds, 6),
+                'rows_per_s': round(rows / seconds, 1) if seconds > 0 else None,
+                'peak_mb': round(self.peak_mb[key], 2) if key in self.peak_mb else None,
+            }
+            for key, seconds in sorted(self.seconds.items())
+        }
+
+
+def _prepare(df, schema, projection):
+    """Chunk como lo recibe process_batch: proyección y esquema de la lectura (ver main)."""
+    from app.config.settings import FETCH_EXTRA_COLUMNS
+    from app.services.column_projection import required_columns
+    from app.services.schema import apply_schema
+    if projection:
+        keep = set(required_columns(FETCH_EXTRA_COLUMNS))
+        df = df[[c for c in df.columns if c in keep]]
+    return apply_schema(df) if schema else df
+
+
+def _rule_benchmarks(df):
+    """(clave, función sin argumentos) por regla de perfilamiento y calidad, como las evalúa cada etapa."""
+    from app.config.settings import RULE_FAMILY_PARTITIONING
+    from app.services.batch_context import BatchContext
+    from app.services.business_rules import PROFILING_RULES, QUALITY_RULES, evaluate_rule
+    # Igual que run_profile: sin columnas auxiliares de join
+    df = df.drop(columns=[c for c in df.columns if '_Nombre' in c or '_Significado' in c])
+    stages = (('perfilamiento', 'profiling', PROFILING_RULES), ('calidad', 'quality', QUALITY_RULES))
+    for label, stage, registry in stages:
+        for name, func in registry.items():
+            if stage == 'profiling' and name not in df.columns and name != 'U_beas_prccode':
+                continue
+            # Contexto nuevo en cada llamada: la regla paga los derivados que usa
+            yield f"{label}/{name}", (lambda stage=stage, name=name, func=func: evaluate_rule(
+                stage, name, func, df, BatchContext(df), None, RULE_FAMILY_PARTITIONING))
+
+
+def _run_cleaning_steps(df, totals=None, memory=False):
+    """Pasos de CLEANING_RULES en secuencia (como run_cleaning); tiempos o memoria por paso."""
+    from app.services.batch_context import BatchContext
+    from app.services.business_rules import CLEANING_RULES
+    from app.services.schema import decode_categoricals
+    df_clean = decode_categoricals(df.copy())
+    ctx = BatchContext(df_clean)
+    seconds = {}
+    for step in CLEANING_RULES:
+        if memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            df_clean = step(df_clean, ctx)
+        except Exception as e:
+            print(f"[Benchmark] Falló {step.__name__}: {e}")
+        seconds[f"limpieza/{step.__name__}"] = time.perf_counter() - start
+        if memory and totals is not None:
+            totals.add(f"limpieza/{step.__name__}", peak_mb=tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+    return seconds
+
+
+def bench_rules(chunks, repeats=3, pattern=None, memory=True):
+    """Tiempos y memoria por regla, sumados sobre los chunks."""
+    from app.services.business_rules import CLEANING_RULES
+    totals = _Totals()
+    selected = re.compile(pattern) if pattern else None
+    for df in chunks:
+        for key, func in _rule_benchmarks(df):
+            if selected and not selected.search(key):
+                continue
+            seconds, _ = _best_of(func, repeats)
+            totals.add(key, seconds, _peak_mb(func) if memory else None)
+        if selected and not any(selected.search(f"limpieza/{step.__name__}") for step in CLEANING_RULES):
+            continue
+        best = {}
+        for _ in range(max(1, repeats)):
+            for key, seconds in _run_cleaning_steps(df).items():
+                best[key] = min(best.get(key, seconds), seconds)
+        if memory:
+            tracemalloc.start()
+            try:
+                _run_cleaning_steps(df, totals, memory=True)
+            finally:
+                tracemalloc.stop()
+        for key, seconds in best.items():
+            if not selected or selected.search(key):
+                totals.add(key, seconds)
+    return totals
+
+
+def _run_pipeline(chunks, timings):
+    """
+    Pipeline por lotes como main(): process_batch + pasada global de unicidad y casi duplicados.
+    `total` es la suma de las etapas (sin la generación de los chunks).
+    """
+    from app.config.settings import (UNIQUENESS_INDEX_ENABLE, UNIQUENESS_MEMORY_MB, UNIQUENESS_PARTITIONS,
+                                     NEAR_DUPLICATE_ENABLE, NEAR_DUPLICATE_THRESHOLD,
+                                     NEAR_DUPLICATE_PERMUTATIONS, NEAR_DUPLICATE_BANDS,
+                                     NEAR_DUPLICATE_MAX_BUCKET)
+    from app.services.near_duplicates import NearDuplicateDetector
+    from app.services.profile_aggregates import ProfileAggregates
+    from app.services.uniqueness_index import UniquenessIndex
+    from main import process_batch, _add_timing
+
+    with tempfile.TemporaryDirectory(prefix="bench_") as spill_dir:
+        aggregates = ProfileAggregates()
+        uniqueness = (UniquenessIndex(spill_dir, UNIQUENESS_MEMORY_MB, UNIQUENESS_PARTITIONS)
+                      if UNIQUENESS_INDEX_ENABLE else None)
+        near_duplicates = (NearDuplicateDetector(NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_PERMUTATIONS,
+                                                 NEAR_DUPLICATE_BANDS, NEAR_DUPLICATE_MAX_BUCKET)
+                           if NEAR_DUPLICATE_ENABLE else None)
+        for batch_index, df in enumerate(chunks, start=1):
+            process_batch(df, batch_index, None, aggregates, timings, uniqueness, near_duplicates)
+        if uniqueness is not None:
+            start = time.perf_counter()
+            uniqueness.finalize()
+            uniqueness.close()
+            _add_timing(timings, 'unicidad', start)
+        if near_duplicates is not None:
+            start = time.perf_counter()
+            near_duplicates.finalize()
+            _add_timing(timings, 'casi_duplicados', start)
+    timings['total'] = sum(timings.values())
+
+
+def bench_stages(make_chunks, repeats=3, memory=True):
+    """
+    Tiempos por etapa del pipeline (mejor corrida completa de `repeats`) y memoria pico total.
+    `make_chunks()` entrega un iterador nuevo de chunks en cada corrida.
+    """
+    totals = _Totals()
+    best = {}
+    runs = max(1, repeats)
+    for _ in range(runs):
+        timings = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            _run_pipeline(make_chunks(), timings)
+        for stage, seconds in timings.items():
+            best[stage] = min(best.get(stage, seconds), seconds)
+    for stage, seconds in best.items():
+        totals.add(f"etapa/{stage}", seconds)
+    if memory:
+        with contextlib.redirect_stdout(io.StringIO()):
+            totals.add("etapa/total", peak_mb=_peak_mb(lambda: _run_pipeline(make_chunks(), {})))
+    return totals
+
+
+def run_benchmarks(rows_list, chunk_size=50000, repeats=3, seed=0, schema=True, projection=True,
+                   pattern=None, memory=True, stages=True, calibrations=None):
+    """
+    Resultados {filas: {'etapa/regla': {seconds, rows_per_s, peak_mb}}} (ver módulo).
+    `calibrations` (lista opcional) recibe muestras de `calibrate` a lo largo de la corrida.
+    """
+    calibrations = [] if calibrations is None else calibrations
+    from app.services.synthetic_data import generate_items, iter_item_chunks
+    # Calentamiento: rules.yaml compilado, patrones, trazas de columnas
+    warm = _prepare(generate_items(1000, seed=seed), schema, projection)
+    bench_rules([warm], repeats=1, pattern=pattern, memory=False)
+
+    results = {}
+    for rows in rows_list:
+        print(f"[Benchmark] {rows} filas (chunks de {chunk_size})...")
+        # Chunks generados bajo demanda (5M filas no caben juntas en memoria)
+        make_chunks = lambda rows=rows: (_prepare(df, schema, projection)
+                                         for df in iter_item_chunks(rows, chunk_size, seed=seed))
+        start = time.perf_counter()
+        for _ in make_chunks():
+            pass
+        generated = time.perf_counter() - start
+        calibrations.append(calibrate())
+        totals = bench_rules(make_chunks(), repeats, pattern, memory)
+        calibrations.append(calibrate())
+        if stages and not pattern:
+            stage_totals = bench_stages(make_chunks, repeats, memory)
+            totals.seconds.update(stage_totals.seconds)
+            totals.peak_mb.update(stage_totals.peak_mb)
+        totals.add("datos/generacion", generated)
+        results[str(rows)] = totals.results(rows)
+    calibrations.append(calibrate())
+    return results
+
+
+def calibrate(repeats=5):
+    """
+    Segundos (mejor de `repeats`) de una carga fija de NumPy y texto de pandas: mide la velocidad
+    de la máquina para escalar la línea base (ver compare_results). Se toman varias muestras a lo
+    largo de la corrida y se guarda la mediana: una sola muestra es muy sensible a la carga del momento.
+    """
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    values = rng.random(500000)
+    text = pd.Series(rng.integers(0, 100000, size=100000).astype(str))
+
+    def work():
+        np.sort(values)
+        text.str.upper().str.contains('1[0-9]5', regex=True)
+        pd.factorize(text)
+    return _best_of(work, repeats)[0]
+
+
+def environment():
+    import numpy as np
+    import pandas as pd
+    try:
+        import pyarrow
+        arrow = pyarrow.__version__
+    except ImportError:
+        arrow = None
+    return {
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.machine(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'pyarrow': arrow,
+    }
+
+
+def max_rss_mb():
+    """Memoria residente máxima del proceso (MB; None donde no hay `resource`, p. ej. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def compare_results(current, baseline, tolerance=0.25, min_seconds=0.025, min_mb=1.0, speed=1.0):
+    """
+    Regresiones de `current` frente a `baseline` (mismo formato que `results`): mediciones con
+    más segundos o más memoria pico que la base * (1 + tolerance). Se ignoran las mediciones
+    por debajo de `min_seconds`/`min_mb` (ruido) y las que no están en la base (nuevas).
+    `speed` (calibración actual / de la base) escala los segundos de la base: una máquina
+    cargada o más lenta no cuenta como regresión.
+    """
+    regressions = []
+    for rows, measurements in current.items():
+        base_rows = baseline.get(rows, {})
+        for key, now in measurements.items():
+            base = base_rows.get(key)
+            if base is None:
+                continue
+            for metric, floor in (('seconds', min_seconds), ('peak_mb', min_mb)):
+                before, after = base.get(metric), now.get(metric)
+                if before is None or after is None or after < floor:
+                    continue
+                if metric == 'seconds':
+                    before = round(before * speed, 6)
+                if after > max(before, 0.0) * (1 + tolerance):
+                    regressions.append({'rows': rows, 'benchmark': key, 'metric': metric, 'baseline': before,
+                                        'current': after, 'ratio': round(after / before, 2) if before else None})
+    return regressions
+
+
+def _print_summary(results, top=10):
+    for rows, measurements in results.items():
+        stages = {k: v for k, v in measurements.items() if k.startswith(('etapa/', 'datos/'))}
+        rules = {k: v for k, v in measurements.items() if k not in stages}
+        slowest = sorted(rules.items(), key=lambda item: item[1]['seconds'], reverse=True)[:top]
+        print(f"\n[Benchmark] {rows} filas")
+        for key, m in list(stages.items()) + slowest:
+            rate = f"{m['rows_per_s']:>14,.0f} filas/s" if m['rows_per_s'] else ' ' * 21
+            peak = f"{m['peak_mb']:8.1f} MB" if m['peak_mb'] is not None else ''
+            print(f"  {key:<50} {m['seconds']:10.4f}s {rate} {peak}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de reglas y etapas sobre datos sintéticos.")
+    parser.add_argument('--rows', type=parse_rows, default=parse_rows('10k,100k'),
+                        help="Filas por corrida, separadas por coma (admite k/M; p. ej. 10k,1M,5M)")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--repeats', type=int, default=3, help="Repeticiones por medición (se toma la mejor)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rule', default=None, help="Regex sobre 'etapa/regla' (solo reglas; sin etapas)")
+    parser.add_argument('--no-schema', action='store_true', help="Sin apply_schema (tipos tal como se generan)")
+    parser.add_argument('--no-projection', action='store_true', help="Todas las columnas de la vista")
+    parser.add_argument('--no-memory', action='store_true', help="Sin pasada de memoria pico (más rápido)")
+    parser.add_argument('--no-stages', action='store_true', help="Solo reglas, sin el pipeline por etapas")
+    parser.add_argument('--output', default=None, help="JSON de resultados (además de la comparación)")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Escribe los resultados en la base (reemplaza las cantidades de filas medidas)")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Regresión: > base * (1 + tolerancia)")
+    parser.add_argument('--min-seconds', type=float, default=0.025, help="Ignorar mediciones más rápidas que esto")
+    args = parser.parse_args(argv)
+
+    # Sin salidas a disco ni caché: se mide el cómputo (antes de importar la configuración)
+    os.environ['OUTPUT_FORMAT'] = 'none'
+    os.environ['OUTPUT_ASYNC'] = 'false'
+    os.environ['RULE_CACHE_ENABLE'] = 'false'
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    started = time.perf_counter()
+    calibrations = []
+    results = run_benchmarks(args.rows, args.chunk_size, args.repeats, args.seed, not args.no_schema,
+                             not args.no_projection, args.rule, not args.no_memory, not args.no_stages,
+                             calibrations)
+    report = {
+        'meta': dict(environment(), seed=args.seed, chunk_size=args.chunk_size, repeats=args.repeats,
+                     schema=not args.no_schema, projection=not args.no_projection,
+                     calibration_s=round(statistics.median(calibrations), 6), max_rss_mb=max_rss_mb(),
+                     seconds=round(time.perf_counter() - started, 1)),
+        'results': results,
+    }
+    _print_summary(results)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"[Generado] {args.output}")
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        merged = dict(baseline['results']) if baseline else {}
+        merged.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': report['meta'], 'results': merged}, f, indent=2)
+        print(f"[Generado] {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"[Aviso] No hay línea base en {args.baseline} (usar --update-baseline para crearla).")
+        return 0
+
+    changed = [k for k in ENVIRONMENT_KEYS if baseline['meta'].get(k) != report['meta'].get(k)]
+    if changed:
+        print(f"[Aviso] La línea base se midió en otro entorno ({', '.join(changed)}); "
+              "los tiempos pueden no ser comparables.")
+    speed = 1.0
+    if baseline['meta'].get('calibration_s'):
+        speed = report['meta']['calibration_s'] / baseline['meta']['calibration_s']
+        print(f"[Benchmark] Velocidad relativa de la máquina frente a la base: x{speed:.2f}")
+    regressions = compare_results(results, baseline['results'], args.tolerance, args.min_seconds, speed=speed)
+    for r in regressions:
+        print(f"[Regresión] {r['rows']} filas {r['benchmark']} {r['metric']}: "
+              f"{r['baseline']} -> {r['current']} (x{r['ratio']})")
+    if regressions:
+        print(f"[Benchmark] {len(regressions)} regresiones sobre la tolerancia de {args.tolerance:.0%}.")
+        return 1
+    print("[Benchmark] Sin regresiones frente a la línea base.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,213 +1,97 @@
 import pandas as pd
 from app.infrastructure.excel import load_excel_data, get_profiling_rules
 from app.infrastructure.database import fetch_data_in_chunks
+from app.services.column_projection import required_columns
+from app.services.schema import apply_schema
+from app.services.profile_aggregates import ProfileAggregates
+from app.infrastructure.output_writer import get_output_writer, close_output_writer
+from app.config.settings import (FETCH_PROJECTION, FETCH_EXTRA_COLUMNS, APPLY_SCHEMA, INCREMENTAL_MODE,
+                                 INCREMENTAL_WATERMARK_COLUMN, INCREMENTAL_STATE_PATH,
+                                 RULE_CACHE_ENABLE, RULE_CACHE_DIR, RULE_CACHE_MAX_MB,
+                                 PROFILE_SKETCH_MODE, PROFILE_SKETCH_THRESHOLD,
+                                 PROFILE_SKETCH_COLUMN_THRESHOLDS, PROFILE_SKETCH_TOP_K,
+                                 RUN_HISTORY_ENABLE, RUN_HISTORY_PATH, UNIQUENESS_INDEX_ENABLE,
+                                 UNIQUENESS_MEMORY_MB, UNIQUENESS_PARTITIONS, UNIQUENESS_SPILL_DIR,
+                                 NEAR_DUPLICATE_ENABLE, NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_PERMUTATIONS,
+                                 NEAR_DUPLICATE_BANDS, NEAR_DUPLICATE_MAX_BUCKET, DATA_QUALITY_OUTPUT)
 import sys
+import time
+from datetime import datetime
 
-# Función auxiliar para identificar errores (refactorizada fuera de main para claridad)
-def identify_error_row(col_name, current_value, expected_value, item_code, item_name, ugp_entry=None):
-    """Identifica el error específico en el valor"""
-    error_details = []
-    
-    # Convertir a string para análisis
-    current_str = str(current_value) if pd.notna(current_value) else "VACÍO"
-    
-    # Análisis específico por tipo de campo
-    if col_name == 'ItemCode':
-        if not str(current_value).startswith('PT'):
-            error_details.append("❌ No empieza con 'PT'")
-        if len(str(current_value)) <= 10:
-            error_details.append(f"❌ Longitud insuficiente ({len(str(current_value))} caracteres, requiere >10)")
-        if not str(current_value).isupper():
-            error_details.append("❌ No está en mayúsculas")
-        if not str(current_value).isalnum():
-            error_details.append("❌ Contiene caracteres no alfanuméricos")
-    
-    elif col_name == 'ItemName':
-        if not str(current_value).isupper():
-            error_details.append("❌ No está en mayúsculas")
-        if any(char in str(current_value) for char in 'ÁÉÍÓÚáéíóú'):
-            error_details.append("❌ Contiene tildes")
-    
-    elif col_name in ['LeadTime', 'ToleranDay', 'IWeight1']:
-        try:
-            val = float(current_value) if pd.notna(current_value) else None
-            if val is None:
-                error_details.append("❌ Valor nulo o vacío")
-            elif col_name == 'LeadTime' and (val < 1 or val > 20):
-                error_details.append(f"❌ Fuera de rango (1-20): {val}")
-            elif col_name == 'ToleranDay' and (val < 0 or val > 24):
-                error_details.append(f"❌ Fuera de rango (0-24): {val}")
-            elif col_name == 'IWeight1' and (val < 0 or val > 1000):
-                error_details.append(f"❌ Fuera de rango (0-1000 inclusive): {val}")
-        except:
-            error_details.append("❌ No es un valor numérico válido")
-    
-    elif col_name == 'PriceUnit':
-        try:
-            val = float(current_value) if pd.notna(current_value) else None
-            ugp = float(ugp_entry) if pd.notna(ugp_entry) else 0
-            if val is None:
-                error_details.append("❌ Valor nulo o vacío")
-            elif ugp == 1 and val != 8:
-                error_details.append(f"❌ Para UgpEntry=1 debe ser 8, actual: {val}")
-            elif ugp == 3 and val != 2:
-                error_details.append(f"❌ Para UgpEntry=3 debe ser 2, actual: {val}")
-            elif ugp == 11 and val != 13:
-                error_details.append(f"❌ Para UgpEntry=11 debe ser 13, actual: {val}")
-        except:
-            error_details.append("❌ Error validando PriceUnit")
-    
-    
-    elif col_name == 'DfltWH':
-        if '_PROD' not in str(current_value):
-            error_details.append("❌ No contiene '_PROD'")
-    
-    elif col_name == 'UgpEntry':
-        try:
-            val = int(current_value) if pd.notna(current_value) else None
-            item_name_str = str(item_name)
-            item_code_str = str(item_code)
-            
-            # Verificar casos específicos
-            if item_code_str in ['PTFUND0212', 'PTFUND0216']:
-                if val != 11:
-                    error_details.append(f"❌ Debe ser 11 para {item_code_str}, actual: {val}")
-            elif 'LAMINA' in item_name_str or 'MANGA' in item_name_str:
-                if val != 3:
-                    error_details.append(f"❌ Debe ser 3 para LAMINA/MANGA, actual: {val}")
-            elif any(word in item_name_str for word in ['ENVASE', 'TAPA', 'BALDE', 'PREFORMA', 'FUNDA']):
-                if val != 1:
-                    error_details.append(f"❌ Debe ser 1 para ENVASE/TAPA/BALDE/PREFORMA/FUNDA, actual: {val}")
-        except:
-            error_details.append("❌ No es un valor numérico válido")
+def _add_timing(timings, stage, start):
+    """Acumula en `timings` los segundos transcurridos desde `start` para la etapa."""
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - start)
+    return time.perf_counter()
 
-    
-    elif col_name in ['InvntItem', 'SellItem', 'PrchseItem']:
-        if current_value != 'Y':
-            error_details.append(f"❌ Valor incorrecto: '{current_value}' (debe ser 'Y')")
-    
-    elif col_name == 'ItemClass':
-        if current_value != 2:
-            error_details.append(f"❌ Valor incorrecto: {current_value} (debe ser 2)")
-    
-    elif col_name == 'PlaningSys':
-        if current_value != 'M':
-            error_details.append(f"❌ Valor incorrecto: '{current_value}' (debe ser 'M')")
-    
-    elif col_name == 'MngMethod':
-        if current_value != 'A':
-            error_details.append(f"❌ Valor incorrecto: '{current_value}' (debe ser 'A')")
-    
-    elif col_name in ['U_EMPA_ESPESOR', 'U_EMPA_ANCHO', 'U_EMPA_DESIDAD']:
-        # Simplificación: Usar contains genérico en el nombre si aplica, o lógica previa
-        pass # Mantener paso a genérico si no implementamos detalle aquí para brevedad, pero estaba implementado detallado
-            # Reimplementando lógica detallada para estos campos
-        if pd.isna(current_value) or current_value == '':
-            # Nota: Esto puede ser falso positivo si el campo NO es requerido para este ItemCode.
-            # Pero identify_error solo se llama si la regla FALLÓ.
-            # Si la regla de negocio dice que NO es requerido, entonces NO falló, y no llegamos aquí.
-            # Si llegamos aquí es porque falló la regla (que presumiblemente chequea requerimiento).
-            error_details.append("❌ Campo vacío o valor inválido")
-        else:
-            try:
-                val = float(current_value)
-                if 'ESPESOR' in col_name and (val < 25 or val > 125):
-                    error_details.append(f"❌ Fuera de rango (25-125): {val}")
-                elif 'ANCHO' in col_name:
-                    if 'PTLAMI' in str(item_code) and (val < 8.4 or val > 120):
-                        error_details.append(f"❌ Fuera de rango PTLAMI (8.4-120): {val}")
-                    elif 'PTMANG' in str(item_code) and (val < 5 or val > 58):
-                        error_details.append(f"❌ Fuera de rango PTMANG (5-58): {val}")
-            except:
-                error_details.append("❌ No es un valor numérico válido")
-    
-    # Si no se identificó error específico, usar genérico
-    if not error_details:
-        if pd.isna(current_value) or current_value == '':
-            error_details.append("❌ Campo vacío o nulo")
-        else:
-            error_details.append(f"❌ Valor '{current_str}' no cumple la regla")
-    
-    return " | ".join(error_details)
-
-
-def process_batch(df_chunk, batch_index):
-    """Procesa un lote de datos: Perfilamiento -> Calidad -> Limpieza -> Reporte"""
+def process_batch(df_chunk, batch_index, cache=None, aggregates=None, timings=None, uniqueness=None,
+                  near_duplicates=None):
+    """
+    Procesa un lote de datos: Perfilamiento -> Calidad -> Limpieza -> Reporte.
+    Retorna un DataFrame con las incidencias del lote.
+    `cache` es el RuleResultCache opcional de resultados de reglas.
+    `aggregates` (ProfileAggregates opcional) acumula los perfiles de toda la corrida.
+    `timings` (dict opcional) acumula segundos por etapa para el historial de corridas.
+    `uniqueness` (UniquenessIndex opcional) registra las claves únicas del lote para la
+    pasada global de unicidad al final de la corrida.
+    `near_duplicates` (NearDuplicateDetector opcional) registra las firmas MinHash de ItemName.
+    """
     from app.services.profiler import run_profile
     from app.services.quality_inspector import run_quality_check
-    from app.services.business_rules import RULE_DESCRIPTIONS
     from app.services.cleaner import run_cleaning
-    from app.services.value_meanings import get_value_meaning
-    from app.services.field_mappings import get_field_common_name
+    from app.services.report_builder import build_incident_report
+    from app.services.batch_context import BatchContext
+    from app.infrastructure.output_writer import get_output_writer
+    from app.services.rule_engine import refresh_rules
     
+    # Las salidas de detalle se asocian a este lote (partición batch=N en Parquet)
+    get_output_writer().begin_batch(batch_index)
+    # rules.yaml (y el Excel de las tablas) se comprueba una vez por lote
+    refresh_rules()
     print(f"[Core] Procesando Lote #{batch_index} ({len(df_chunk)} registros)...")
     
+    # Derivados compartidos por todas las reglas del lote (ItemCode como texto, prefijos, etc.)
+    ctx = BatchContext(df_chunk)
+    start = time.perf_counter()
+    
     # 1. Perfilamiento
-    quality_results_df, _, _ = run_profile(df_chunk)
+    quality_results_df, _, _ = run_profile(df_chunk, ctx, cache, aggregates)
+    start = _add_timing(timings, 'perfilamiento', start)
     
     # 2. Calidad Avanzada
     final_quality_results = None
     if quality_results_df is not None:
-        final_quality_results = run_quality_check(df_chunk, quality_results_df)
+        final_quality_results = run_quality_check(df_chunk, quality_results_df, ctx, cache, aggregates)
+        if uniqueness is not None:
+            uniqueness.add_batch(batch_index, df_chunk, final_quality_results, ctx)
+        if near_duplicates is not None:
+            near_duplicates.add_batch(batch_index, df_chunk, ctx)
+    start = _add_timing(timings, 'calidad', start)
 
     # 3. Limpieza (Sugerencias)
     df_cleaned = run_cleaning(df_chunk)
+    start = _add_timing(timings, 'limpieza', start)
     
-    # 4. Generación de Reporte de Incidencias
-    batch_report_rows = []
+    # 4. Generación de Reporte de Incidencias (columnar: un paso por regla, no por celda)
+    if quality_results_df is None:
+        report = build_incident_report(df_chunk, df_cleaned, pd.DataFrame())
+        _add_timing(timings, 'reporte', start)
+        return report
     
-    if quality_results_df is not None:
-        # Combinar resultados
-        combined_results = quality_results_df.copy()
-        if final_quality_results is not None:
-            for col in final_quality_results.columns:
-                if col not in combined_results.columns and col not in ['ItemCode', 'TimeStamp']:
-                    combined_results[col] = final_quality_results[col]
-        
-        # Identificar fallos
-        rule_cols = [c for c in combined_results.columns if c not in ['ItemCode', 'TimeStamp']]
-        failed_mask = ~combined_results[rule_cols].all(axis=1) # Filas que fallan alguna regla
-        
-        if failed_mask.any():
-            # Iterar solo sobre filas fallidas
-            idxs = failed_mask.index[failed_mask] # Obtener índices originales del chunk
-            
-            # Subconjuntos para iterar rápido
-            chunk_failures = combined_results.loc[failed_mask, rule_cols]
-            chunk_raw = df_chunk.loc[failed_mask]
-            chunk_clean = df_cleaned.loc[failed_mask]
-            
-            for idx in idxs:
-                row_raw = chunk_raw.loc[idx]
-                row_clean = chunk_clean.loc[idx]
-                row_res = chunk_failures.loc[idx]
-                
-                failed_rules = row_res.index[~row_res] # Reglas False
-                
-                for col in failed_rules:
-                    current_val = row_raw.get(col, "N/A")
-                    suggested_val = row_clean.get(col, "Revisar")
-                    
-                    error_msg = identify_error_row(
-                        col, 
-                        current_val, 
-                        suggested_val,
-                        row_raw.get('ItemCode'),
-                        row_raw.get('ItemName'),
-                        row_raw.get('UgpEntry')
-                    )
-                    
-                    batch_report_rows.append({
-                        "ItemCode": row_raw.get('ItemCode'),
-                        "ItemName": row_raw.get('ItemName'),
-                        "Nombre del campo evaluado": get_field_common_name(col),
-                        "Valor actual": get_value_meaning(col, current_val),
-                        "Valor sugerido": get_value_meaning(col, suggested_val),
-                        "Detalle del error": error_msg,
-                        "Regla no cumplida": RULE_DESCRIPTIONS.get(col, "Regla no cumplida")
-                    })
+    # Combinar resultados (y los códigos de motivo de la regla que aporta cada columna)
+    combined_results = quality_results_df.copy()
+    combined_reasons = dict(ctx.reasons.get('profiling', {}))
+    quality_reasons = ctx.reasons.get('quality', {})
+    if final_quality_results is not None:
+        for col in final_quality_results.columns:
+            if col not in combined_results.columns and col not in ['ItemCode', 'TimeStamp']:
+                combined_results[col] = final_quality_results[col]
+                if col in quality_reasons:
+                    combined_reasons[col] = quality_reasons[col]
     
-    return batch_report_rows
+    report = build_incident_report(df_chunk, df_cleaned, combined_results, combined_reasons)
+    _add_timing(timings, 'reporte', start)
+    return report
 
 
 def main():
@@ -224,25 +108,171 @@ def main():
     HANA_VIEW_NAME = "EMPAQPLAST_PROD.SB1_VIEW_PRODUCTO_TERMINADO_GD"
     CHUNK_SIZE = 50000 
     
-    all_incidences = []
+    all_incidences = [] # DataFrames de incidencias por lote
     total_processed = 0
     batch_count = 0
+    started_at = datetime.now()
+    run_start = time.perf_counter()
+    timings = {} # Segundos por etapa (historial de corridas)
+    
+    # Perfiles de toda la corrida (dataProfiling/dataValues/validValues), acumulados por lote
+    # (en modo sketch, las columnas de alta cardinalidad se resumen con memoria fija)
+    if PROFILE_SKETCH_MODE:
+        aggregates = ProfileAggregates(PROFILE_SKETCH_THRESHOLD, PROFILE_SKETCH_COLUMN_THRESHOLDS,
+                                       PROFILE_SKETCH_TOP_K)
+    else:
+        aggregates = ProfileAggregates()
+    
+    # Modo incremental: estado persistido de la corrida anterior
+    store = None
+    
+    # Caché de resultados de reglas por contenido de fila
+    cache = None
+    if RULE_CACHE_ENABLE:
+        from app.services.result_cache import RuleResultCache
+        cache = RuleResultCache(RULE_CACHE_DIR, max_bytes=RULE_CACHE_MAX_MB * 1024 * 1024)
+    
+    # Índice global de unicidad: duplicados repartidos entre lotes
+    uniqueness = None
+    if UNIQUENESS_INDEX_ENABLE:
+        from app.services.uniqueness_index import UniquenessIndex
+        uniqueness = UniquenessIndex(UNIQUENESS_SPILL_DIR, UNIQUENESS_MEMORY_MB, UNIQUENESS_PARTITIONS)
+    
+    # Posibles duplicados de ItemName (nombres casi iguales, MinHash/LSH)
+    near_duplicates = None
+    if NEAR_DUPLICATE_ENABLE:
+        from app.services.near_duplicates import NearDuplicateDetector
+        near_duplicates = NearDuplicateDetector(NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_PERMUTATIONS,
+                                                NEAR_DUPLICATE_BANDS, NEAR_DUPLICATE_MAX_BUCKET)
     
     try:
+        where, params = None, None
+        if INCREMENTAL_MODE:
+            from app.services.incremental import IncrementalStore, rules_fingerprint
+            store = IncrementalStore(INCREMENTAL_STATE_PATH, INCREMENTAL_WATERMARK_COLUMN)
+            store.begin_run(rules_fingerprint())
+            where, params = store.query_filter()
+            if near_duplicates is not None and not store.full_run:
+                print("[Incremental] Advertencia: los nombres casi duplicados solo se buscan entre los "
+                      "artículos revalidados en esta corrida.")
+        
+        # Proyección: solo las columnas que leen las reglas y el reporte
+        columns = None
+        if FETCH_PROJECTION:
+            extra = FETCH_EXTRA_COLUMNS + ([INCREMENTAL_WATERMARK_COLUMN] if store and INCREMENTAL_WATERMARK_COLUMN else [])
+            columns = required_columns(extra)
+
         # Iterador sobre chunks
-        data_iterator = fetch_data_in_chunks(HANA_VIEW_NAME, chunk_size=CHUNK_SIZE)
+        data_iterator = fetch_data_in_chunks(HANA_VIEW_NAME, chunk_size=CHUNK_SIZE, columns=columns,
+                                             where=where, params=params)
         
+        start = time.perf_counter()
         for df_chunk in data_iterator:
-            batch_count += 1
             total_processed += len(df_chunk)
+            if APPLY_SCHEMA:
+                # Tipos compactos una sola vez por chunk (categóricas, int32/float32)
+                df_chunk = apply_schema(df_chunk)
+            _add_timing(timings, 'lectura', start)
+            hashes = None
+            if store is not None:
+                # Solo lo nuevo o modificado (por marca de agua o hash de contenido)
+                df_chunk, hashes = store.prepare_chunk(df_chunk)
+                if df_chunk.empty:
+                    # Sin cambios: la 'lectura' del chunk siguiente se mide desde aquí
+                    start = time.perf_counter()
+                    continue
+            batch_count += 1
             
             # Procesar chunk
-            incidences = process_batch(df_chunk, batch_count)
-            all_incidences.extend(incidences)
+            incidences = process_batch(df_chunk, batch_count, cache, aggregates, timings, uniqueness,
+                                        near_duplicates)
+            if store is not None:
+                store.save_results(df_chunk, incidences, hashes)
+            if not incidences.empty:
+                all_incidences.append(incidences)
+            start = time.perf_counter()
+        
+        if uniqueness is not None:
+            start = time.perf_counter()
+            if store is not None and not store.full_run:
+                # Incremental: los artículos sin cambios entran con sus claves guardadas (lote 0),
+                # así la unicidad sigue siendo sobre todo el catálogo
+                for col, entries in store.load_unchanged_keys():
+                    uniqueness.add_seed(col, entries)
+            duplicates = uniqueness.finalize(store.save_unique_keys if store is not None else None)
+            uniqueness.close()
+            get_output_writer().write(DATA_QUALITY_OUTPUT, 'globalDuplicates', duplicates, per_batch=False)
+            # Válidos dentro de su lote pero repetidos en otro: pasan a inválidos en la corrida
+            # (los del lote 0 no se contaron en esta corrida)
+            newly = duplicates[duplicates['valido_en_lote'].astype(bool)]
+            aggregates.quality.invalidate(newly[newly['lote'] > 0]['Atributo'].value_counts().to_dict())
+            # Al reporte solo las columnas sin regla de perfilamiento (misma precedencia que el lote)
+            from app.services.business_rules import PROFILING_RULES
+            from app.services.report_builder import build_duplicate_incidents
+            reported = build_duplicate_incidents(newly[~newly['Atributo'].isin(list(PROFILING_RULES))])
+            if not reported.empty:
+                all_incidences.append(reported)
+            print(f"[Unicidad] Apariciones de claves repetidas: {len(duplicates)}, "
+                  f"nuevas entre lotes: {len(newly)} (volcados a disco: {uniqueness.spills})")
+            _add_timing(timings, 'unicidad', start)
+        
+        if near_duplicates is not None:
+            start = time.perf_counter()
+            clusters = near_duplicates.finalize()
+            get_output_writer().write(DATA_QUALITY_OUTPUT, 'nearDuplicates', clusters, per_batch=False)
+            from app.services.report_builder import build_near_duplicate_incidents
+            reported = build_near_duplicate_incidents(clusters)
+            if not reported.empty:
+                all_incidences.append(reported)
+            print(f"[Duplicados] Grupos de ItemName casi iguales: "
+                  f"{clusters['grupo'].nunique() if len(clusters) else 0} ({len(clusters)} artículos)")
+            _add_timing(timings, 'casi_duplicados', start)
+        
+        start = time.perf_counter()
+        run_id = get_output_writer().run_id
+        # Incremental: los perfiles cubren solo lo revalidado y se escriben aunque no haya cambios
+        # (si no, quedarían los de la corrida anterior como si fueran de esta)
+        incremental_run = store is not None and not store.full_run
+        if batch_count or incremental_run:
+            if incremental_run:
+                print(f"[Incremental] Perfiles de la corrida: solo artículos nuevos o modificados "
+                      f"({total_processed} registros leídos).")
+            aggregates.write()
+        close_output_writer()  # Manifiesto de la corrida
+        _add_timing(timings, 'escritura', start)
+        
+        if cache is not None:
+            cache.flush()
+            print(f"[Cache] Filas-regla desde caché: {cache.hits}, evaluadas: {cache.misses}")
+        
+        if store is not None:
+            store.finish_run()
+            reused = store.load_unchanged_incidents()
+            print(f"[Incremental] Artículos revalidados: {len(store.processed)}. "
+                  f"Incidencias reutilizadas de artículos sin cambios: {len(reused)}")
+            if not reused.empty:
+                all_incidences.append(reused)
+            store.close()
             
+        total_incidences = sum(len(df_inc) for df_inc in all_incidences)
         print(f"\n--- Procesamiento Completado ---")
         print(f"Total registros procesados: {total_processed}")
-        print(f"Total incidencias detectadas: {len(all_incidences)}")
+        print(f"Total incidencias detectadas: {total_incidences}")
+        
+        # Historial de corridas: métricas por regla y tiempos por etapa (consultas de tendencia)
+        if RUN_HISTORY_ENABLE:
+            from app.services.run_history import RunHistoryStore
+            from app.services.incremental import rules_fingerprint
+            _add_timing(timings, 'total', run_start)
+            history = RunHistoryStore(RUN_HISTORY_PATH)
+            history.record_run(run_id, started_at, rows_processed=total_processed, batches=batch_count,
+                               incidents=total_incidences, aggregates=aggregates, timings=timings,
+                               status='incremental' if incremental_run else 'ok',
+                               rules_fingerprint=rules_fingerprint())
+            drops = history.regressions()
+            history.close()
+            for row in drops.itertuples():
+                print(f"[Historial] Regresión en {row.rule}: {row.baseline_rate:.1%} -> {row.last_rate:.1%}")
         
         # 3. Enviar Reporte Unificado
         if all_incidences:
@@ -250,7 +280,7 @@ def main():
             from app.config.settings import EMAIL_RECIPIENTS
             
             print("Generando DataFrame de reporte...")
-            detailed_report_df = pd.DataFrame(all_incidences)
+            detailed_report_df = pd.concat(all_incidences, ignore_index=True)
             
             print(f"Enviando reporte por correo a {EMAIL_RECIPIENTS}...")
             email_svc = EmailService()
@@ -82,3 +82,12 @@ def test_check_item_name_tapa():
     df = pd.DataFrame(data)
     res = check_item_name_complex(df)
     assert res[0] == True
+
+def test_check_item_name_dispatch_by_type_then_prefix():
+    # El tipo del nombre (patron estricto) tiene prioridad sobre el prefijo de ItemCode
+    data = {
+        'ItemName': ['ENVASE PET 5 LT CRISTAL 84 g R 48 mm', 'TAPON PP 38 MM', 'TAPON PP', 'BALDE PEAD', 'CUALQUIER COSA', None],
+        'ItemCode': ['PTTAPA0001', 'PTTAPA0002', 'PTEPET0001', 'PTBALD0001', 'PTPR000001', 'PTEPET0002'],
+    }
+    res = check_item_name_complex(pd.DataFrame(data))
+    assert res.tolist() == [True, True, False, True, True, False]
@@ -0,0 +1,28 @@
+import pytest
+import pandas as pd
+import sqlite3
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.column_projection import required_columns, traced_columns
+from app.services.business_rules import check_toleran_day
+from app.infrastructure.projection import resolve_projection
+
+def test_traced_columns_include_columns_read_by_rule():
+    assert {'ToleranDay', 'LeadTime'} <= traced_columns(check_toleran_day)
+
+def test_required_columns_skip_auxiliary_view_columns():
+    columns = required_columns()
+
+    assert {'ItemCode', 'ItemName', 'UgpEntry', 'InvntryUom', 'U_EMPA_CARACTERISTICA_MP'} <= columns
+    assert 'TaxCodeAR_NombreImpuesto' not in columns
+    assert 'ItemType_Significado' not in columns
+
+def test_resolve_projection_keeps_view_order_and_existing_columns():
+    conn = sqlite3.connect(':memory:')
+    pd.DataFrame({'ItemName': ['A'], 'Extra_Nombre': ['x'], 'ItemCode': ['PT1']}).to_sql('VISTA', conn, index=False)
+
+    assert resolve_projection(conn, 'VISTA', {'ItemCode', 'ItemName', 'NoExiste'}) == ['ItemName', 'ItemCode']
@@ -0,0 +1,76 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sqlite3
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.infrastructure.columnar_fetch import read_columnar_chunks
+
+def _conn(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE VISTA (ItemCode TEXT, UgpEntry INTEGER, IWeight1 REAL, LeadTime, Vacia)")
+    conn.executemany("INSERT INTO VISTA VALUES (?, ?, ?, ?, ?)", rows)
+    return conn
+
+def test_columnar_chunks_match_read_sql_types_and_values():
+    rows = [(f'PT{i}', i % 3 + 1, None if i % 4 == 0 else i * 0.5, i, None) for i in range(10)]
+    rows[7] = ('PT7', 2, 3.5, 'abc', None)  # Texto en columna numérica, en un lote posterior
+    conn = _conn(rows)
+
+    expected = list(pd.read_sql("SELECT * FROM VISTA", conn, chunksize=4))
+    got = list(read_columnar_chunks(conn, "SELECT * FROM VISTA", chunk_size=4, fetch_size=2))
+
+    assert [len(c) for c in got] == [4, 4, 2]
+    for e, g in zip(expected, got):
+        assert dict(g.dtypes) == dict(e.dtypes)
+        pd.testing.assert_frame_equal(g, e)
+
+def test_columnar_chunks_empty_result():
+    conn = _conn([])
+
+    assert list(read_columnar_chunks(conn, "SELECT * FROM VISTA")) == []
+
+def test_columnar_chunks_keep_large_integers_exact():
+    big = 2 ** 60 + 1
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE VISTA (Id INTEGER, Nulo INTEGER, Chico INTEGER)")
+    conn.executemany("INSERT INTO VISTA VALUES (?, ?, ?)", [(big, big, 1), (3, None, None)])
+
+    expected = pd.read_sql("SELECT * FROM VISTA", conn)
+    got = next(read_columnar_chunks(conn, "SELECT * FROM VISTA", fetch_size=1))
+
+    assert got['Id'].dtype == expected['Id'].dtype == np.int64
+    assert got['Id'].tolist() == [big, 3]
+    # Con nulos pd.read_sql pasa a float64 y redondea; aquí quedan objetos exactos
+    assert got['Nulo'].tolist() == [big, None]
+    assert got['Chico'].dtype == expected['Chico'].dtype == np.float64
+
+class _Cursor:
+    """Cursor DB-API mínimo (sqlite no devuelve booleanos)."""
+
+    def __init__(self, description, rows):
+        self.description, self.rows = description, list(rows)
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+def test_columnar_chunks_booleans_like_read_sql():
+    rows = [(True, True), (False, None)]
+    conn = type('Conn', (), {'cursor': lambda self: _Cursor([('Activo', 28), ('ConNulo', 28)], rows)})()
+
+    got = next(read_columnar_chunks(conn, "SELECT * FROM VISTA", fetch_size=1))
+    expected = pd.DataFrame.from_records(rows, columns=['Activo', 'ConNulo'], coerce_float=True)
+
+    assert dict(got.dtypes) == dict(expected.dtypes)
+    assert got['Activo'].tolist() == [True, False] and got['ConNulo'].tolist() == [True, None]
@@ -0,0 +1,88 @@
+import pytest
+import sys
+import os
+import threading
+import types
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.infrastructure.connection_pool import ConnectionPool
+from app.infrastructure import database
+
+class FakeConnection:
+    def __init__(self, registry):
+        self.alive = True
+        self.closed = False
+        registry.append(self)
+
+    def isconnected(self):
+        return self.alive
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+def _fake_dbapi(registry):
+    return types.SimpleNamespace(connect=lambda **kwargs: FakeConnection(registry))
+
+def test_pool_reuses_warm_connections_and_replaces_dead_ones():
+    created = []
+    pool = ConnectionPool(lambda: FakeConnection(created), min_size=1, max_size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second and len(created) == 1
+
+    first.alive = False
+    with pool.connection() as third:
+        pass
+    assert third is not first and first.closed
+    assert pool.size == 1
+
+def test_pool_blocks_at_max_size_and_times_out():
+    created = []
+    pool = ConnectionPool(lambda: FakeConnection(created), min_size=0, max_size=1, acquire_timeout=0.05)
+
+    held = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+    waiter = {}
+    t = threading.Thread(target=lambda: waiter.setdefault('conn', pool.acquire()))
+    pool.acquire_timeout = 5
+    t.start()
+    pool.release(held)
+    t.join()
+    assert waiter['conn'] is held
+
+def test_pool_closes_idle_connections_after_timeout_above_min_size():
+    created = []
+    pool = ConnectionPool(lambda: FakeConnection(created), min_size=1, max_size=3, idle_timeout=0.01)
+    a, b = pool.acquire(), pool.acquire()
+    pool.release(a)
+    pool.release(b)
+
+    threading.Event().wait(0.05)
+    with pool.connection():
+        pass
+
+    assert pool.size == 1
+    assert sum(c.closed for c in created) == 1
+
+def test_database_access_goes_through_shared_pool(monkeypatch):
+    created = []
+    monkeypatch.setattr(database, 'dbapi', _fake_dbapi(created))
+    monkeypatch.setattr(database, '_pool', None)
+
+    with database.get_connection() as a:
+        pass
+    with database.get_connection() as b:
+        pass
+
+    assert a is b and len(created) == 1
+    database.get_connection_pool().close_all()
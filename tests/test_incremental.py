@@ -0,0 +1,97 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.incremental import IncrementalStore
+from app.services.uniqueness_index import UniquenessIndex
+from app.services.report_builder import REPORT_COLUMNS
+
+def _incidents(codes):
+    return pd.DataFrame([[c, 'N', 'LeadTime - Tiempo lead', 30, 20, 'x', 'y'] for c in codes], columns=REPORT_COLUMNS)
+
+def _run(path, df, failing):
+    store = IncrementalStore(path)
+    store.begin_run('v1')
+    changed, hashes = store.prepare_chunk(df)
+    store.save_results(changed, _incidents([c for c in failing if c in set(changed['ItemCode'])]), hashes)
+    store.finish_run()
+    reused = store.load_unchanged_incidents()
+    store.close()
+    return changed, reused
+
+def test_incremental_revalidates_only_changed_items_and_reuses_the_rest(tmp_path):
+    path = str(tmp_path / "estado.db")
+    df = pd.DataFrame({'ItemCode': ['PT1', 'PT2', 'PT3'], 'LeadTime': [30, 5, 30]})
+    changed, reused = _run(path, df, failing=['PT1', 'PT3'])
+    assert len(changed) == 3 and reused.empty
+
+    df2 = pd.DataFrame({'ItemCode': ['PT1', 'PT2', 'PT3'], 'LeadTime': [5, 5, 30]})
+    changed, reused = _run(path, df2, failing=[])
+
+    assert list(changed['ItemCode']) == ['PT1']
+    assert list(reused['ItemCode']) == ['PT3']
+    assert reused['Valor actual'][0] == 30
+
+def test_incremental_prunes_deleted_items(tmp_path):
+    path = str(tmp_path / "estado.db")
+    _run(path, pd.DataFrame({'ItemCode': ['PT1', 'PT2'], 'LeadTime': [30, 30]}), failing=['PT1', 'PT2'])
+
+    changed, reused = _run(path, pd.DataFrame({'ItemCode': ['PT2'], 'LeadTime': [30]}), failing=['PT2'])
+
+    assert changed.empty
+    assert list(reused['ItemCode']) == ['PT2']
+
+def test_rules_fingerprint_follows_decision_table_sheet_rows(tmp_path, monkeypatch):
+    from app.services import rule_engine, incremental
+    from app.infrastructure import excel
+    path = tmp_path / "rules.yaml"
+    path.write_text('tables:\n  - {name: "t", inputs: {A: "number"}, outputs: {B: "number"}, sheet: "Hoja"}\n')
+    monkeypatch.setattr(rule_engine, '_ENGINE', rule_engine.RuleEngine(str(path)))
+    monkeypatch.setattr(rule_engine, 'EXCEL_FILE_PATH', str(tmp_path / "diccionario.xlsx"))
+    sheet_rows = [{'A': 1, 'B': 8}]
+    monkeypatch.setattr(excel, 'load_decision_table_rows', lambda sheet: list(sheet_rows))
+
+    before = incremental.rules_fingerprint()
+    assert incremental.rules_fingerprint() == before
+    sheet_rows[0] = {'A': 1, 'B': 13}
+    (tmp_path / "diccionario.xlsx").write_bytes(b'cambio')  # El Excel vigilado cambió
+    assert incremental.rules_fingerprint() != before
+
+def test_incremental_uniqueness_is_seeded_with_unchanged_items(tmp_path):
+    path = str(tmp_path / "estado.db")
+
+    def run(df):
+        store = IncrementalStore(path)
+        store.begin_run('v1')
+        index = UniquenessIndex(str(tmp_path / "spill"), partitions=2, columns=['U_Codigo_Secundario'])
+        changed, hashes = store.prepare_chunk(df)
+        results = pd.DataFrame({'U_Codigo_Secundario': True}, index=changed.index)
+        index.add_batch(1, changed, results)
+        store.save_results(changed, None, hashes)
+        if not store.full_run:
+            for col, entries in store.load_unchanged_keys():
+                index.add_seed(col, entries)
+        duplicates = index.finalize(store.save_unique_keys)
+        index.close()
+        store.finish_run()
+        store.close()
+        return changed, duplicates
+
+    df = pd.DataFrame({'ItemCode': ['PT1', 'PT2'], 'ItemName': ['A', 'B'], 'U_Codigo_Secundario': ['S1', 'S2']})
+    run(df)
+    # PT3 es nuevo y repite el código secundario de PT1, que no cambió (no se revalida)
+    df = pd.DataFrame({'ItemCode': ['PT1', 'PT2', 'PT3'], 'ItemName': ['A', 'B', 'C'],
+                       'U_Codigo_Secundario': ['S1', 'S2', 'S1']})
+    changed, duplicates = run(df)
+
+    assert list(changed['ItemCode']) == ['PT3']
+    assert duplicates['ItemCode'].tolist() == ['PT1', 'PT3']
+    assert duplicates['lote'].tolist() == [0, 1] and set(duplicates['primer_ItemCode']) == {'PT1'}
+
+    # Tercera corrida sin cambios: el duplicado entre artículos guardados se sigue detectando
+    changed, duplicates = run(df)
+    assert changed.empty and sorted(duplicates['ItemCode']) == ['PT1', 'PT3']
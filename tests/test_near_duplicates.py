@@ -0,0 +1,36 @@
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.near_duplicates import NearDuplicateDetector, normalize_tokens
+from app.services.report_builder import build_near_duplicate_incidents
+
+def test_normalize_tokens_units_and_spacing():
+    tokens = normalize_tokens(pd.Series(['ENVASE PET 5LT 84 GR', 'LÁMINA PEBD 32,7CM', None]))
+    by_row = tokens.groupby('row')['token'].apply(list).to_dict()
+    assert by_row[0] == ['ENVASE', 'PET', '5', 'LT', '84', 'G']
+    assert by_row[1] == ['LAMINA', 'PEBD', '32.7', 'CM']
+
+def test_near_duplicate_clusters_across_batches():
+    detector = NearDuplicateDetector(threshold=0.85)
+    detector.add_batch(1, pd.DataFrame({
+        'ItemCode': ['PT01', 'PT02', 'PT03', 'PT04'],
+        'ItemName': ['ENVASE PET 5 LT CRISTAL 84 GR R 48 MM', 'ENVASE PET 5 LT AZUL 84 G R 48 MM',
+                     'TAPA PP 38 MM BLANCA', 'TAPA PP 38 MM BLANCA'],
+    }))
+    detector.add_batch(2, pd.DataFrame({
+        'ItemCode': ['PT05', 'PT06'],
+        'ItemName': ['ENVASE PET 5LT CRISTAL 84 G R 48 MM VOLCANIC', 'LAMINA PEBD 32,7 CM X 95 MC'],
+    }))
+    clusters = detector.finalize()
+    # Cambio de color (otro producto) y nombres idénticos (regla de unicidad) no se agrupan
+    assert clusters['ItemCode'].tolist() == ['PT01', 'PT05']
+    assert clusters['lote'].tolist() == [1, 2] and clusters['miembros'].tolist() == [2, 2]
+    assert clusters['similitud'].tolist() == [0.909, 0.909]
+
+    report = build_near_duplicate_incidents(clusters)
+    assert report['Detalle del error'].tolist() == ['⚠️ Posible duplicado de: PT05 (similitud 91%)',
+                                                    '⚠️ Posible duplicado de: PT01 (similitud 91%)']
@@ -0,0 +1,82 @@
+import threading
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.infrastructure.output_sink import AsyncOutputSink
+
+class _FakeWriter:
+    run_id = "prueba"
+
+    def __init__(self, fail_on=None, gate=None):
+        self.written = []
+        self.closed = False
+        self.fail_on = fail_on
+        self.gate = gate
+
+    def write(self, directory, name, df, per_batch=True, batch_index=None):
+        if self.gate is not None:
+            self.gate.wait()
+        if name == self.fail_on:
+            raise OSError("disco lleno")
+        self.written.append((name, batch_index, len(df)))
+
+    def close(self):
+        self.closed = True
+        return "manifiesto.json"
+
+def test_sink_writes_in_background_and_keeps_batch_and_snapshot():
+    writer = _FakeWriter()
+    sink = AsyncOutputSink(writer, max_pending=2)
+    df = pd.DataFrame({'ItemCode': ['PT1', 'PT2']})
+
+    sink.begin_batch(1)
+    sink.write('outputs', 'cleaned_data', df)
+    sink.begin_batch(2)
+    df.loc[len(df)] = ['PT3']  # Cambios posteriores del llamador no afectan lo encolado
+    sink.write('outputs', 'cleaned_data', df)
+
+    assert sink.close() == "manifiesto.json"
+    assert writer.written == [('cleaned_data', 1, 2), ('cleaned_data', 2, 3)]
+    assert writer.closed
+
+def test_sink_applies_backpressure_and_reraises_errors():
+    gate = threading.Event()
+    sink = AsyncOutputSink(_FakeWriter(fail_on='dataQuality', gate=gate), max_pending=1)
+    df = pd.DataFrame({'ItemCode': ['PT1']})
+
+    sink.write('outputs', 'dataQuality', df)  # El hilo la toma y queda bloqueado
+    sink.write('outputs', 'cleaned_data', df)  # Ocupa el único lugar de la cola
+    blocked = threading.Thread(target=sink.write, args=('outputs', 'otro', df))
+    blocked.start()
+    blocked.join(timeout=0.2)
+    assert blocked.is_alive()  # Cola llena: el productor espera
+
+    gate.set()
+    blocked.join()
+    with pytest.raises(RuntimeError, match="disco lleno"):
+        sink.flush()
+    sink.close()
+
+def test_sink_deep_copies_when_copy_on_write_is_off(monkeypatch):
+    from app.infrastructure import output_sink
+    monkeypatch.setattr(output_sink, '_copy_on_write', lambda: False)
+    gate = threading.Event()
+    writer = _FakeWriter(gate=gate)
+    sink = AsyncOutputSink(writer, max_pending=2)
+    df = pd.DataFrame({'Cantidad': [1.0, 2.0]})
+
+    sink.write('outputs', 'cleaned_data', df)
+    sink.write('outputs', 'dataValues', df)
+    queued = sink._queue.queue[-1][2]
+    assert queued is not df
+    assert not np.shares_memory(queued['Cantidad'].to_numpy(), df['Cantidad'].to_numpy())
+
+    gate.set()
+    sink.close()
+    assert [w[0] for w in writer.written] == ['cleaned_data', 'dataValues']
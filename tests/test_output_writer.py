@@ -0,0 +1,49 @@
+import json
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.infrastructure.output_writer import CsvOutputWriter, ParquetOutputWriter, create_output_writer
+
+def _frame(n):
+    return pd.DataFrame({'ItemCode': [f"PT{i}" for i in range(n)], 'SellItem': [True] * n})
+
+def test_csv_writer_keeps_legacy_paths_and_writes_manifest(tmp_path):
+    writer = CsvOutputWriter(manifest_dir=str(tmp_path / "manifiestos"))
+    for batch in (1, 2):
+        writer.begin_batch(batch)
+        path = writer.write(str(tmp_path), 'dataQuality', _frame(batch * 2))
+
+    manifest = json.load(open(writer.close(), encoding='utf-8'))
+
+    assert path == os.path.join(str(tmp_path), 'dataQuality.csv')
+    assert len(pd.read_csv(path)) == 4
+    dataset = manifest['datasets'][f"{tmp_path}/dataQuality"]
+    assert manifest['format'] == 'csv' and dataset['rows'] == 4 and len(dataset['files']) == 1
+
+def test_parquet_writer_appends_partitioned_parts(tmp_path):
+    pytest.importorskip("pyarrow")
+    writer = ParquetOutputWriter(manifest_dir=str(tmp_path / "manifiestos"))
+    for batch in (1, 2, 3):
+        writer.begin_batch(batch)
+        writer.write(str(tmp_path), 'finalDataQuality', _frame(batch))
+    writer.write(str(tmp_path), 'dataValues', pd.DataFrame({'valor': [101, 'Y', None], 'conteo': [3, 2, 1]}),
+                 per_batch=False)
+
+    manifest = json.load(open(writer.close(), encoding='utf-8'))
+
+    df = pd.read_parquet(str(tmp_path / 'finalDataQuality'))
+    assert len(df) == 6
+    assert len(pd.read_parquet(str(tmp_path / 'finalDataQuality'), filters=[('batch', '=', 3)])) == 3
+    assert manifest['datasets'][f"{tmp_path}/finalDataQuality"]['rows'] == 6
+    assert pd.read_parquet(str(tmp_path / 'dataValues'))['valor'].tolist()[:2] == ['101', 'Y']
+
+def test_null_writer_discards_outputs(tmp_path):
+    writer = create_output_writer('none', manifest_dir=str(tmp_path / "manifiestos"))
+    assert writer.write(str(tmp_path), 'dataQuality', _frame(3)) is None
+    assert writer.close() is None
+    assert os.listdir(str(tmp_path)) == []
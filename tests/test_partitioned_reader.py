@@ -0,0 +1,43 @@
+import pytest
+import pandas as pd
+import sqlite3
+from contextlib import closing
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.infrastructure.partitioned_reader import build_prefix_partitions, read_partitions
+
+def _make_view(path):
+    codes = [f"PTLAMI{i:06d}" for i in range(7)] + [f"PTMANG{i:06d}" for i in range(5)] \
+        + [f"PTEPET{i:06d}" for i in range(4)] + ["MP0001", None]
+    conn = sqlite3.connect(path)
+    pd.DataFrame({'ItemCode': codes, 'UgpEntry': range(len(codes))}).to_sql('VISTA', conn, index=False)
+    conn.close()
+    return codes
+
+def test_read_partitions_covers_view_exactly_once(tmp_path):
+    db = str(tmp_path / "vista.db")
+    codes = _make_view(db)
+    partitions = build_prefix_partitions(['PTLAMI', 'PTMANG'])
+
+    chunks = list(read_partitions('VISTA', partitions, lambda: closing(sqlite3.connect(db)), chunk_size=3, parallelism=2))
+    df = pd.concat(chunks, ignore_index=True)
+
+    assert len(partitions) == 3
+    assert max(len(c) for c in chunks) <= 3
+    assert sorted(df['UgpEntry']) == list(range(len(codes)))
+
+def test_read_partitions_propagates_errors(tmp_path):
+    db = str(tmp_path / "vista.db")
+    _make_view(db)
+    partitions = build_prefix_partitions(['PTLAMI'])
+
+    with pytest.raises(Exception):
+        list(read_partitions('VISTA_INEXISTENTE', partitions, lambda: closing(sqlite3.connect(db)), parallelism=2))
+
+def test_build_prefix_partitions_rejects_overlapping_prefixes():
+    with pytest.raises(ValueError):
+        build_prefix_partitions(['PTFUN', 'PTFUND'])
@@ -0,0 +1,43 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.infrastructure.prefetch import prefetch_chunks
+
+def test_prefetch_preserves_order_under_memory_cap():
+    chunks = [pd.DataFrame({'ItemCode': [f'PT{i}'] * 100}) for i in range(5)]
+
+    received = list(prefetch_chunks(iter(chunks), depth=3, max_bytes=1))
+
+    assert [c['ItemCode'][0] for c in received] == ['PT0', 'PT1', 'PT2', 'PT3', 'PT4']
+
+def test_prefetch_propagates_source_error_after_buffered_chunks():
+    def source():
+        yield pd.DataFrame({'ItemCode': ['PT1']})
+        raise RuntimeError("fallo de red")
+
+    it = prefetch_chunks(source(), depth=2)
+
+    assert next(it)['ItemCode'][0] == 'PT1'
+    with pytest.raises(RuntimeError, match="fallo de red"):
+        next(it)
+
+def test_prefetch_closes_source_when_consumer_stops():
+    closed = []
+
+    def source():
+        try:
+            for i in range(100):
+                yield pd.DataFrame({'ItemCode': [f'PT{i}']})
+        finally:
+            closed.append(True)
+
+    it = prefetch_chunks(source(), depth=2)
+    next(it)
+    it.close()
+
+    assert closed == [True]
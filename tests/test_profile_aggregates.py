@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.profile_aggregates import ValidityCounts, ValueCounts
+
+def test_batches_merge_to_whole_dataset_profile():
+    df = pd.DataFrame({
+        'ItemCode': [f"PT{i}" for i in range(6)],
+        'ItmsGrpCod': [101, 102, None, 101, 101, 102],
+        'SellItem': ['Y', 'N', 'Y', 'Y', None, 'N'],
+    })
+    results = pd.DataFrame({'ItemCode': df['ItemCode'], 'SellItem': df['SellItem'] == 'Y'})
+
+    whole_counts = ValidityCounts(with_nulls=True).update(results, df)
+    whole_values = ValueCounts().update(df)
+    counts = ValidityCounts(with_nulls=True)
+    values = ValueCounts()
+    for part in (slice(0, 2), slice(2, 6)):
+        counts.merge(ValidityCounts(with_nulls=True).update(results[part], df[part]))
+        values.merge(ValueCounts().update(df[part]))
+
+    pd.testing.assert_frame_equal(counts.to_frame(), whole_counts.to_frame())
+    merged = values.to_frame()
+    assert merged.astype(str).values.tolist() == whole_values.to_frame().astype(str).values.tolist()
+    grp = merged[merged['atributo'] == 'ItmsGrpCod']
+    # Los enteros no se reinterpretan como float al combinar lotes con y sin nulos
+    assert grp['valor'].tolist()[:2] == [101, 102]
+    assert grp['conteo'].tolist() == [3, 2, 1]
+    assert np.isnan(grp['valor'].iloc[2])
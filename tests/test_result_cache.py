@@ -0,0 +1,48 @@
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.result_cache import RuleResultCache
+from app.services.business_rules import rule_lead_time, check_u_codigo_secundario, split_rule_result
+
+def _df():
+    return pd.DataFrame({
+        'ItemCode': ['PTEPET000001', 'PTLAMI000001', 'PTEPET000002', 'MP0001'],
+        'ItemName': ['ENVASE PET', 'LAMINA', 'ENVASE PET', 'RESINA'],
+        'LeadTime': [5, 30, np.nan, 5],
+        'U_Codigo_Secundario': ['A', 'A', 'B', None],
+    })
+
+def test_cache_reuses_results_across_runs_and_matches_direct_evaluation(tmp_path):
+    df = _df()
+    expected_valid, expected_reasons = split_rule_result(rule_lead_time(df))
+
+    first = RuleResultCache(str(tmp_path))
+    first.evaluate('profiling', 'LeadTime', rule_lead_time, df)
+    first.flush()
+
+    second = RuleResultCache(str(tmp_path))
+    df2 = df.copy()
+    df2.loc[3, 'LeadTime'] = 50
+    valid, reasons = second.evaluate('profiling', 'LeadTime', rule_lead_time, df2)
+
+    direct_valid, direct_reasons = split_rule_result(rule_lead_time(df2))
+    assert (second.hits, second.misses) == (3, 1)
+    assert list(valid) == list(direct_valid)
+    assert list(reasons) == list(direct_reasons)
+    assert list(valid[:3]) == list(expected_valid[:3])
+
+def test_cross_row_rules_are_never_cached(tmp_path):
+    cache = RuleResultCache(str(tmp_path))
+
+    valid, _ = cache.evaluate('quality', 'U_Codigo_Secundario', check_u_codigo_secundario, _df())
+    cache.flush()
+
+    assert list(valid) == [False, False, True, True]
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert os.listdir(str(tmp_path)) == []
@@ -7,7 +7,9 @@ import os
 # Agregar root al path para importar app
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from app.services.rule_engine import apply_rule
+from app.services.rule_engine import apply_rule, RuleSet, RuleEngine
+from app.services.decision_tables import DecisionTable
+from app.services.report_builder import describe_errors
 
 def test_apply_rule_range():
     df = pd.DataFrame({'val': [1, 5, 20, 0, 21, np.nan]})
@@ -33,3 +35,200 @@ def test_apply_rule_value():
     assert res[1] == False
     assert res[2] == True
     assert res[3] == False
+
+def test_compiled_rule_types():
+    df = pd.DataFrame({
+        'grp': [102, 103, None, 114],
+        'wh': ['UIO_PROD', 'GYE_VENTA', None, 'uio_prod'],
+        'code': ['PT01', '', None, 'PTLAMI0001'],
+        'ToleranDay': [10, 5, 0, 20],
+        'LeadTime': [10, 5, 20, 0],
+        'IndirctTax': ['Y', 'N', 'Y', 'Y'],
+    })
+    rules = RuleSet([
+        {'field': 'grp', 'type': 'in_set', 'values': [102, 114]},
+        {'field': 'wh', 'type': 'regex', 'pattern': '_PROD', 'ignore_case': True},
+        {'field': 'code', 'type': 'not_null', 'allow_empty': False},
+        {'field': 'code', 'type': 'length', 'max': 4, 'allow_null': True},
+        {'field': 'ToleranDay', 'type': 'expr', 'expr': 'ToleranDay + LeadTime == 20', 'when': "IndirctTax == 'Y'"},
+    ])
+    assert rules.evaluate(df, 'grp').tolist() == [True, False, False, True]
+    assert rules.evaluate(df, 'wh').tolist() == [True, False, False, True]
+    assert rules.evaluate(df, 'code').tolist() == [True, False, False, False]  # AND de sus dos reglas
+    assert rules.evaluate(df, 'ToleranDay').tolist() == [True, True, True, True]
+    assert rules.columns('ToleranDay') == {'ToleranDay', 'LeadTime', 'IndirctTax'}
+    assert rules.evaluate(df, 'otro') is None
+
+def test_engine_recompiles_only_when_file_changes(tmp_path):
+    path = tmp_path / "rules.yaml"
+    path.write_text('rules:\n  - {field: "LeadTime", type: "range", min: 1, max: 20}\n')
+    engine = RuleEngine(str(path))
+    first = engine.get()
+    assert engine.get() is first  # Sin cambios: mismo objeto compilado
+
+    os.utime(path, ns=(0, 0))  # Cambia el mtime pero no el contenido: no recompila
+    assert engine.get() is first
+
+    path.write_text('rules:\n  - {field: "LeadTime", type: "range", min: 1, max: 5}\n')
+    df = pd.DataFrame({'LeadTime': [3, 10]})
+    assert engine.get().evaluate(df, 'LeadTime').tolist() == [True, False]
+
+    path.write_text('rules: [')  # YAML inválido: se conservan las reglas vigentes
+    assert engine.get().evaluate(df, 'LeadTime').tolist() == [True, False]
+
+def test_unknown_rule_type_is_skipped_without_dropping_others():
+    df = pd.DataFrame({'LeadTime': [3, 30], 'ItemName': ['A', None]})
+    rules = RuleSet([
+        {'field': 'LeadTime', 'type': 'rango', 'min': 1},  # Tipo mal escrito
+        {'field': 'LeadTime', 'type': 'range', 'min': 1, 'max': 20},
+        {'field': 'ItemName', 'type': 'not_null'},
+        {'field': 'ItemName', 'type': 'expr', 'expr': 'ItemName +'},  # Expresión inválida
+    ])
+    assert rules.evaluate(df, 'LeadTime').tolist() == [True, False]
+    assert rules.evaluate(df, 'ItemName').tolist() == [True, False]
+    assert apply_rule(df, {'field': 'LeadTime', 'type': 'rango'}).tolist() == [True, True]
+
+def test_rule_set_checks_file_once_per_batch(tmp_path, monkeypatch):
+    from app.services import rule_engine
+    path = tmp_path / "rules.yaml"
+    path.write_text('rules:\n  - {field: "LeadTime", type: "range", min: 1, max: 20}\n')
+    monkeypatch.setattr(rule_engine, '_ENGINE', RuleEngine(str(path)))
+    first = rule_engine.rule_set()
+
+    calls = []
+    real_stat = os.stat
+    monkeypatch.setattr(rule_engine.os, 'stat', lambda *a, **k: calls.append(a) or real_stat(*a, **k))
+    path.write_text('rules:\n  - {field: "LeadTime", type: "range", min: 1, max: 5}\n')
+    for _ in range(3):
+        assert rule_engine.rule_set() is first  # Dentro del lote: sin tocar el disco
+    assert calls == []
+    assert rule_engine.refresh_rules() is not first  # Al iniciar el lote siguiente
+    assert rule_engine.rule_set().evaluate(pd.DataFrame({'LeadTime': [10]}), 'LeadTime').tolist() == [False]
+
+def test_expr_rules_match_hand_written_checks():
+    from app.services import business_rules as br
+    df = pd.DataFrame({
+        'UgpEntry': [1, 1, 3, 11, 11, None, 7],
+        'PriceUnit': [8, None, 2, 12, 13, 5, 'x'],
+        'ToleranDay': [10, 0, 5, np.nan, 15, 20, 1],
+        'LeadTime': [10, 20, 5, 5, 5, 0, 19],
+        'IndirctTax': ['Y', 'Y', 'N', None, 'Y', 'Y', 'N'],
+        'TaxCodeAR': ['IVA', None, None, None, 'IVA', None, None],
+    })
+    # Reglas migradas a `expr` / tabla de decisión (rules.yaml): mismo resultado que las cadenas de np.where
+    assert br.check_price_unit(df).tolist() == list(br._price_unit_where(df))
+    assert br.check_indirct_tax(df).tolist() == list(br._indirct_tax_where(df))
+    assert br.check_toleran_day(df).tolist() == [True, True, False, False, True, True, True]
+    # El rango de perfilado de ToleranDay (0-24) no entra en el control de la suma
+    df = pd.DataFrame({'ToleranDay': [25, 25], 'LeadTime': [-5, 0]})
+    assert br.check_toleran_day(df).tolist() == [True, False]
+
+def test_expr_numexpr_path_matches_numpy(monkeypatch):
+    pytest.importorskip('numexpr')
+    from app.services import rule_engine
+    from app.services.rule_engine import CompiledExpr
+    df = pd.DataFrame({
+        'A': [1, -4, 7, None, 'x', 12, -7.5, 0],
+        'B': [3, -2, 7.5, 1, 2, 10, 1, 0],
+        'X': ['Z', 'Y', None, 'Z', 'W', 'Y', 'Z', ''],
+    })
+    expressions = [
+        ("A + B == 4", None),
+        ("A + B == 20", "X == 'Y'"),
+        ("abs(A - B) <= 2 and not (A > 10)", None),
+        ("A % 3 == 1 or A ** 2 > 50", None),
+        ("A / B >= 0.5", None),
+        ("A in [1, 12] and X != 'Z'", None),
+        ("notnull(X) or isnull(A)", None),
+        ("-A < B < 8", None),
+        ("1 == 1", None),
+    ]
+    for expr, when in expressions:
+        compiled = CompiledExpr(expr, when)
+        monkeypatch.setattr(rule_engine, 'NUMEXPR_INSTALLED', False)
+        with_numpy = compiled(df).tolist()
+        monkeypatch.setattr(rule_engine, 'NUMEXPR_INSTALLED', True)
+        monkeypatch.setattr(rule_engine, 'RULE_EXPR_NUMEXPR', True)
+        assert compiled(df).tolist() == with_numpy, expr
+
+def test_decision_table_first_match_validate_and_fill():
+    table = DecisionTable({
+        'name': 'prueba',
+        'inputs': {'Tipo': 'text', 'Grupo': 'number', 'Nombre': 'contains'},
+        'outputs': {'Unidad': 'text', 'Factor': 'number'},
+        'default': {'Factor': 0},
+        'rows': [
+            {'Tipo': ['A', 'B'], 'Grupo': 1, 'Unidad': 'UN', 'Factor': 8},
+            {'Tipo': 'A', 'Unidad': 'KG', 'Factor': 2},
+            {'Nombre': 'LAMINA|MANGA', 'Factor': 3},
+        ],
+    })
+    df = pd.DataFrame({
+        'Tipo': pd.Categorical(['A', 'B', 'A', 'C', None]),
+        'Grupo': [1, '1', 5, 1, 1],
+        'Nombre': ['X', 'Y', 'MANGA', 'LAMINA', None],
+        'Unidad': ['UN', 'KG', 'KG', 'UN', 'UN'],
+        'Factor': [8, 8, 3, 3, 1],
+    })
+    rows = table.lookup(df)
+    assert rows.tolist() == [0, 0, 1, 2, -1]  # Gana la primera fila; la fila 2 no define Unidad
+
+    valid, _ = table.validate(df, 'Unidad')
+    assert valid.tolist() == [True, False, True, True, True]
+    valid, _ = table.validate(df, 'Factor')
+    assert valid.tolist() == [True, True, False, True, True]
+
+    assert table.fill(df, 'Factor').tolist() == [8, 8, 2, 3, 0]  # Sin fila -> default
+    assert table.fill(df, 'Unidad').tolist() == ['UN', 'UN', 'KG', 'UN', 'UN']  # Sin expectativa -> actual
+    assert table.reason_templates('Factor')[0] == "❌ Para Tipo=A/B, Grupo=1 debe ser 8, actual: {valor}"
+
+def test_ugp_tables_match_np_where_fallback(monkeypatch):
+    from app.services import business_rules as br
+    df = pd.DataFrame({
+        'ItemCode': ['PTFUND0212', 'PTLAMI0001', 'PTENVA0001', 'PTMANG0001', 'PTOTRO0001', None],
+        'ItemName': ['FUNDA LAMINA', 'LAMINA PEBD', 'ENVASE PET', 'MANGA TERMO', 'OTRO', None],
+        'UgpEntry': [11, 1, 1, 'x', 3, None],
+        'PriceUnit': [13, 8, 2, 2, 2, None],
+        'InvntryUom': ['PKG', 'UN', 'KG', 'KG', 'KG', None],
+        'ItmsGrpCod': [100] * 6,
+    })
+    run = lambda: (br.rule_ugp_entry(df.copy()), br.rule_price_unit(df.copy()), br.check_invntry_uom(df.copy()),
+                   br.clean_ugp_entry(df.copy())['UgpEntry'], br.clean_price_unit(df.copy())['PriceUnit'])
+    # Los códigos de motivo difieren (fila de tabla vs bits), pero el detalle renderizado no
+    messages = lambda results: [describe_errors(col, df[col], df['ItemCode'], result.reasons).tolist()
+                                for col, result in zip(['UgpEntry', 'PriceUnit'], results)]
+    with_tables = run()
+    table_messages = messages(with_tables[:2])
+    monkeypatch.setattr(br, 'decision_table', lambda name: None)
+    fallback = run()
+
+    for table_result, where_result in zip(with_tables[:2], fallback[:2]):
+        assert list(table_result.valid) == list(where_result.valid)
+    assert table_messages == messages(fallback[:2])
+    assert list(with_tables[2]) == list(fallback[2])
+    assert with_tables[3].tolist() == fallback[3].tolist() == [11, 3, 1, 3, 1, 1]
+    assert with_tables[4].fillna(-1).tolist() == fallback[4].fillna(-1).tolist() == [13, 8, 8, 2, 2, -1]
+
+def test_table_reasons_support_more_rows_than_bits(monkeypatch):
+    from app.services import business_rules as br
+    table = DecisionTable({
+        'name': 'unidades_por_ugp',
+        'inputs': {'UgpEntry': 'number'},
+        'outputs': {'PriceUnit': 'number'},
+        'rows': [{'UgpEntry': n, 'PriceUnit': n + 1} for n in range(100)],
+    })
+    monkeypatch.setattr(br, 'decision_table', lambda name: table if name == 'unidades_por_ugp' else None)
+    df = pd.DataFrame({
+        'ItemCode': ['PT0001', 'PT0002', 'PT0003'],
+        'UgpEntry': [3, 70, 99],
+        'PriceUnit': [4, 5, 7],
+        'InvntryUom': ['UN', 'UN', 'UN'],
+    })
+    catalog = list(br.REASON_CATALOG['PriceUnit'])
+    result = br.rule_price_unit(df)
+    assert result.valid.tolist() == [True, False, False]
+    assert br.REASON_CATALOG['PriceUnit'] == catalog  # Evaluar no reescribe el catálogo global
+
+    details = describe_errors('PriceUnit', df['PriceUnit'], df['ItemCode'], result.reasons)
+    assert details[1] == "❌ Para UgpEntry=70 debe ser 71, actual: 5"
+    assert details[2] == "❌ Para UgpEntry=99 debe ser 100, actual: 7"
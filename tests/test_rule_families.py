@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.batch_context import BatchContext, RuleFamily
+from app.services.business_rules import evaluate_rule, RuleResult, QUALITY_RULES, check_item_code_complex
+
+def test_family_rows_by_prefix_and_group():
+    df = pd.DataFrame({
+        'ItemCode': ['PTLAMI0001', 'PTMANG0001', None, 'PTEPET0001', 'PTLAMI0002'],
+        'ItmsGrpCod': [102, '103', None, 102, '102'],  # 102 y '102' son el mismo grupo
+    })
+    ctx = BatchContext(df)
+    assert ctx.family_rows(RuleFamily(prefixes=('PTLAMI', 'PTMANG'))).tolist() == [0, 1, 4]
+    assert ctx.family_rows(RuleFamily(groups=(102,))).tolist() == [0, 3, 4]
+    assert ctx.family_rows(RuleFamily(prefixes=('PTLAMI',), groups=(103,))).tolist() == []
+    # La estructura de ItemCode se valida solo en las filas de cada grupo
+    assert check_item_code_complex(df, ctx).tolist() == [True, False, False, True, True]
+
+def test_evaluate_rule_runs_only_on_family_rows():
+    df = pd.DataFrame({
+        'ItemCode': ['PTLAMI0001', 'PTEPET0001', 'PTMANG0001', 'PTTAPA0001'],
+        'ItmsGrpCod': [102, 102, 102, 102],
+        'U_EMPA_ESPESOR': [30, 5, 200, 7],
+    })
+    seen = []
+
+    def rule(sub, ctx=None):
+        seen.append(sub.index.tolist())
+        return RuleResult(sub['U_EMPA_ESPESOR'] <= 125, np.where(sub['U_EMPA_ESPESOR'] > 125, 2, 0))
+
+    valid, reasons = evaluate_rule('quality', 'U_EMPA_ESPESOR', rule, df, BatchContext(df))
+    assert seen == [[0, 2]]
+    assert valid.tolist() == [True, True, False, True]  # Fuera de la familia: validez por defecto
+    assert reasons.tolist() == [0, 0, 2, 0]
+
+    # Sin partición se evalúa el lote completo, con el mismo resultado para la regla real
+    full, _ = evaluate_rule('quality', 'U_EMPA_ESPESOR', QUALITY_RULES['U_EMPA_ESPESOR'], df, partitioned=False)
+    part, _ = evaluate_rule('quality', 'U_EMPA_ESPESOR', QUALITY_RULES['U_EMPA_ESPESOR'], df)
+    assert full.tolist() == part.tolist() == [True, True, False, True]
+
+def test_family_prefix_matches_rule_predicate_when_not_leading():
+    # La familia usa el mismo criterio que is_lami_mang (contiene PTLAMI/PTMANG), no el inicio
+    df = pd.DataFrame({
+        'ItemCode': ['XXPTLAMI0001', 'PTEPET0001', 'ptlami0002'],
+        'ItmsGrpCod': [102, 102, 102],
+        'U_EMPA_ESPESOR': [99999, 5, 99999],
+    })
+    assert BatchContext(df).family_rows(RuleFamily(prefixes=('PTLAMI', 'PTMANG'))).tolist() == [0]
+    rule = QUALITY_RULES['U_EMPA_ESPESOR']
+    full, _ = evaluate_rule('quality', 'U_EMPA_ESPESOR', rule, df, partitioned=False)
+    part, _ = evaluate_rule('quality', 'U_EMPA_ESPESOR', rule, df, BatchContext(df))
+    assert full.tolist() == part.tolist() == [False, True, True]
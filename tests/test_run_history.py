@@ -0,0 +1,52 @@
+import pandas as pd
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.profile_aggregates import ProfileAggregates
+from app.services.run_history import RunHistoryStore
+
+def _aggregates(valid_sell, valid_name, rows=100):
+    aggregates = ProfileAggregates()
+    results = pd.DataFrame({
+        'ItemCode': [f"PT{i}" for i in range(rows)],
+        'SellItem': [i < valid_sell for i in range(rows)],
+        'ItemName': [i < valid_name for i in range(rows)],
+    })
+    aggregates.quality.update(results)
+    aggregates.profiling.update(results, results)
+    return aggregates
+
+def test_history_trend_and_regressions(tmp_path):
+    store = RunHistoryStore(str(tmp_path / "historial.db"))
+    start = datetime.now() - timedelta(days=3)
+    for day, (sell, name) in enumerate([(90, 80), (92, 80), (88, 81), (60, 80)]):
+        store.record_run(f"run{day}", start + timedelta(days=day), rows_processed=100, batches=1, incidents=10,
+                         aggregates=_aggregates(sell, name), timings={'perfilamiento': 1.5, 'total': 3.0})
+
+    trend = store.pass_rate_trend('SellItem')
+    assert trend['pass_rate'].tolist() == [0.90, 0.92, 0.88, 0.60]
+    assert store.recent_runs(1)['run_id'].tolist() == ['run3']
+    assert len(store.stage_timing_trend()) == 8
+
+    drops = store.regressions(threshold=0.05)
+    assert drops['rule'].tolist() == ['SellItem']
+    assert round(drops['drop'].iloc[0], 2) == 0.30
+    store.close()
+
+def test_incremental_runs_stay_out_of_regressions(tmp_path):
+    store = RunHistoryStore(str(tmp_path / "historial.db"))
+    start = datetime.now() - timedelta(days=3)
+    store.record_run("full0", start, aggregates=_aggregates(90, 80))
+    store.record_run("full1", start + timedelta(days=1), aggregates=_aggregates(91, 80))
+    # Delta de pocos artículos modificados: su tasa no es la del catálogo
+    store.record_run("delta", start + timedelta(days=2), aggregates=_aggregates(2, 8, rows=10),
+                     status='incremental')
+
+    assert store.regressions(threshold=0.05).empty
+    assert store.pass_rate_trend('SellItem')['run_id'].tolist() == ['full0', 'full1']
+    assert store.recent_runs(1)['status'].tolist() == ['incremental']
+    store.close()
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.schema import apply_schema, decode_categoricals
+
+def test_apply_schema_compacts_types_without_changing_values():
+    df = pd.DataFrame({
+        'ItemCode': ['PT1', 'PT2', 'PT3'],
+        'SellItem': ['Y', 'N', None],
+        'ItmsGrpCod': [102, 103, 114],
+        'LeadTime': [8.0, np.nan, 20.0],
+        'U_EMPA_ESPESOR': [0.92, 1.5, np.nan],
+        'U_EMPA_ANCHO': ['10', 'abc', None],
+    })
+
+    typed = apply_schema(df)
+
+    assert isinstance(typed['SellItem'].dtype, pd.CategoricalDtype)
+    assert typed['ItmsGrpCod'].dtype == np.int32
+    assert typed['LeadTime'].dtype == np.float32
+    assert typed['U_EMPA_ESPESOR'].dtype == np.float64
+    # Valores sucios: la columna queda como llegó para que la regla reporte 'abc'
+    assert typed['U_EMPA_ANCHO'].tolist() == df['U_EMPA_ANCHO'].tolist()
+    assert typed['ItemCode'].dtype == df['ItemCode'].dtype
+    assert typed['LeadTime'].astype(str).tolist() == df['LeadTime'].astype(str).tolist()
+    assert typed.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+
+def test_decode_categoricals_allows_new_values():
+    typed = apply_schema(pd.DataFrame({'MngMethod': ['A', None, 'A']}))
+
+    decoded = decode_categoricals(typed)
+    decoded['MngMethod'] = decoded['MngMethod'].fillna('R')
+
+    assert decoded['MngMethod'].tolist() == ['A', 'R', 'A']
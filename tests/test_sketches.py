@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.sketches import HyperLogLog, TDigest, hash_values
+from app.services.profile_aggregates import ValueCounts
+
+def test_hyperloglog_and_tdigest_are_close_and_mergeable():
+    values = [f"PTLAMI{i:06d}" for i in range(20000)]
+    left, right = HyperLogLog(), HyperLogLog()
+    left.add_hashes(hash_values(values[:12000]))
+    right.add_hashes(hash_values(values[8000:]))
+    assert abs(left.merge(right).estimate() - 20000) / 20000 < 0.05
+
+    data = np.random.default_rng(0).normal(100, 15, 50000)
+    digest = TDigest()
+    for part in np.array_split(data, 5):
+        digest.merge(TDigest().update(part))
+    assert abs(digest.quantile(0.5) - np.median(data)) < 1
+    assert abs(digest.quantile(0.99) - np.quantile(data, 0.99)) < 2
+
+def test_value_counts_switches_to_sketch_above_threshold():
+    names = pd.Series([f"ITEM{i}" for i in range(3000)] + ['REPETIDO'] * 500 + [None] * 20)
+    counts = ValueCounts(sketch_threshold=100, top_k=5)
+    for part in np.array_split(np.arange(len(names)), 4):
+        counts.update(pd.DataFrame({'ItemName': names.iloc[part].values, 'SellItem': 'Y'}))
+
+    assert 'ItemName' in counts.sketches and 'SellItem' in counts.counts
+    values = counts.to_frame()
+    top = values[values['atributo'] == 'ItemName']
+    assert len(top) <= 6
+    assert top.iloc[0]['valor'] == 'REPETIDO' and top.iloc[0]['conteo'] >= 500
+    summary = counts.sketch_frame().iloc[0]
+    assert summary['nulos'] == 20 and summary['filas'] == len(names)
+    assert abs(summary['distintos_aprox'] - 3001) / 3001 < 0.05
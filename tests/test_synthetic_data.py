@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.synthetic_data import FAMILIES, VIEW_COLUMNS, generate_items, iter_item_chunks
+from app.services.business_rules import ITEM_CODE_GROUP_PATTERNS, ITEM_NAME_STRICT_PATTERNS
+from benchmarks.run_benchmarks import compare_results, parse_rows
+
+def test_generator_is_seeded_and_chunks_keep_codes_unique():
+    chunks = list(iter_item_chunks(5000, chunk_size=2000, seed=7))
+    again = pd.concat(list(iter_item_chunks(5000, chunk_size=2000, seed=7)), ignore_index=True)
+    df = pd.concat(chunks, ignore_index=True)
+
+    assert [len(c) for c in chunks] == [2000, 2000, 1000] and list(df.columns) == VIEW_COLUMNS
+    pd.testing.assert_frame_equal(df, again)
+    assert not df['ItemCode'].duplicated().any()
+    assert not generate_items(500, seed=8).equals(generate_items(500, seed=7))
+
+def test_clean_rows_follow_families_and_name_formats():
+    df = generate_items(3000, seed=1, error_rate=0, null_rate=0)
+    code = df['ItemCode']
+    assert {p for p in FAMILIES if code.str.startswith(p).any()} == set(FAMILIES)
+    # Códigos con la estructura de su grupo (correlativo dentro del ancho del grupo)
+    for group, pattern in ITEM_CODE_GROUP_PATTERNS.items():
+        rows = (df['ItmsGrpCod'] == group) & ~code.str.startswith(('PTMANI', 'PTREPO'))
+        assert rows.any() and code[rows].str.match(pattern).all()
+    for kind, pattern in ITEM_NAME_STRICT_PATTERNS.items():
+        names = df['ItemName'][df['ItemName'].str.startswith(kind + ' ')]
+        assert len(names) and names.str.match(pattern).all()
+
+def test_benchmark_comparison_flags_only_real_regressions():
+    baseline = {'10000': {'calidad/ItemName': {'seconds': 0.10, 'peak_mb': 2.0},
+                          'calidad/ItemCode': {'seconds': 0.001, 'peak_mb': 0.1}}}
+    current = {'10000': {'calidad/ItemName': {'seconds': 0.16, 'peak_mb': 8.0},
+                         'calidad/ItemCode': {'seconds': 0.004, 'peak_mb': 0.1},
+                         'calidad/Nueva': {'seconds': 1.0, 'peak_mb': 1.0}}}
+
+    regressions = compare_results(current, baseline, tolerance=0.25)
+    assert [(r['benchmark'], r['metric']) for r in regressions] == [('calidad/ItemName', 'seconds'),
+                                                                  ('calidad/ItemName', 'peak_mb')]
+    # Máquina 1.5x más lenta (calibración): el tiempo ya no es regresión, la memoria sí
+    slower = compare_results(current, baseline, tolerance=0.25, speed=1.5)
+    assert [r['metric'] for r in slower] == ['peak_mb']
+    assert parse_rows('10k,1.5M,200') == [10000, 1500000, 200]
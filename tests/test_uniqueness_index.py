@@ -0,0 +1,47 @@
+import pandas as pd
+import sys
+import os
+
+# Agregar root al path para importar app
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.uniqueness_index import UniquenessIndex
+from app.services.profile_aggregates import ValidityCounts
+from app.services.report_builder import build_duplicate_incidents
+
+def _batch(codes, secondary):
+    df = pd.DataFrame({
+        'ItemCode': codes,
+        'ItemName': [f"ENVASE {c}" for c in codes],
+        'U_Codigo_Secundario': secondary,
+    })
+    results = pd.DataFrame({'ItemCode': True, 'U_Codigo_Secundario': True}, index=df.index)
+    return df, results
+
+def test_cross_batch_duplicates_with_spill(tmp_path):
+    index = UniquenessIndex(str(tmp_path), memory_mb=0, partitions=4,
+                            columns=['ItemCode', 'U_Codigo_Secundario'])
+    for batch, (codes, secondary) in enumerate([
+        (['PT01', 'PT02', 'PT03'], ['S1', 'S2', None]),
+        (['PT04', 'PT02'], ['S3', 'S1']),
+        (['PT05'], ['S1']),
+    ], start=1):
+        index.add_batch(batch, *_batch(codes, secondary))
+    assert index.spills == 3  # Presupuesto 0: cada lote se vuelca a disco
+
+    dup = index.finalize()
+    index.close()
+    assert not os.path.exists(index.spill_dir)
+
+    codes = dup[dup['Atributo'] == 'ItemCode']
+    assert codes[['lote', 'fila']].values.tolist() == [[1, 1], [2, 1]]
+    secondary = dup[dup['Atributo'] == 'U_Codigo_Secundario']
+    assert secondary['ItemCode'].tolist() == ['PT01', 'PT02', 'PT05']
+    assert set(secondary['primer_ItemCode']) == {'PT01'} and set(secondary['apariciones']) == {3}
+
+    counts = ValidityCounts().update(pd.DataFrame({'U_Codigo_Secundario': [True] * 6}))
+    counts.invalidate(dup[dup['valido_en_lote']]['Atributo'].value_counts().to_dict())
+    assert counts.valid['U_Codigo_Secundario'] == 3
+
+    report = build_duplicate_incidents(secondary)
+    assert len(report) == 3 and report['Detalle del error'].str.contains('PT01, lote 1').all()